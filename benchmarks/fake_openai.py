@@ -0,0 +1,218 @@
+"""Local stand-in for the OpenAI chat-completions endpoint, for offline benchmarks.
+
+    with FakeOpenAIServer(latency=0.2, malformed_rate=0.1) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        ...
+
+Scoring requests get a schema-shaped analysis, image requests a vision-shaped one.
+A `malformed_rate` fraction of responses is damaged the way real completions are
+(prose around the JSON, trailing commas, truncation, or outright garbage), an
+`error_rate` fraction is refused with `error_status` (429 carries Retry-After), and
+`stream: true` requests are answered as server-sent events.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.prompts import SCORING_JSON_SCHEMA, CORE_RESPONSE_FORMAT, GATE_RESPONSE_FORMAT
+
+MALFORMED_KINDS = ("prose", "trailing_comma", "truncated", "garbage")
+
+_FILLER = ("The claim leans on a causal link that the cited material does not establish, "
+           "and the timeline it relies on is contradicted by the public record. ")
+
+
+def sample_from_schema(schema, key=""):
+    """A plausible, schema-valid value for every field (long text where the model writes prose)."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {k: sample_from_schema(v, k) for k, v in schema["properties"].items()}
+    if kind == "array":
+        return [sample_from_schema(schema["items"], key) for _ in range(2)]
+    if kind == "integer":
+        return 100 if key in ("confidence_level", "truth_drift_score", "claim_length") else 7
+    if key in ("logic", "natural_law", "historical_accuracy", "source_credibility", "final_commentary", "reasoning"):
+        return _FILLER * 4
+    return f"sample {key}".strip()
+
+
+SCORING_RESPONSE = json.dumps(sample_from_schema(SCORING_JSON_SCHEMA))
+# Sharded scoring (EVALIA_SHARDED_SCORING) asks for these shapes instead.
+SHARD_RESPONSES = {
+    fmt["json_schema"]["name"]: json.dumps(sample_from_schema(fmt["json_schema"]["schema"]))
+    for fmt in (CORE_RESPONSE_FORMAT, GATE_RESPONSE_FORMAT)
+}
+IMAGE_RESPONSE = json.dumps({
+    "extracted_text": "BREAKING: scientists confirm the moon is hollow",
+    "description": "A screenshot of a social media post with a photo of the moon.",
+    "assessment": "Typical engagement-bait formatting; no source is shown.",
+})
+
+
+def damage(content, kind):
+    if kind == "prose":
+        return f"Here is the analysis you asked for:\n```json\n{content}\n```\nLet me know if you need more."
+    if kind == "trailing_comma":
+        return content[:-1] + ",}"
+    if kind == "truncated":
+        return content[: int(len(content) * 0.9)]
+    return "I'm sorry, I can't produce that analysis right now."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if server.should_fail():
+            headers = {"Retry-After": str(server.retry_after)} if server.error_status == 429 else {}
+            self._json({"error": {"message": "Simulated upstream error", "type": "server_error", "code": None}},
+                       server.error_status, headers)
+            return
+        content, kind = server.completion_for(body)
+        time.sleep(server.next_latency())
+        if body.get("stream"):
+            self._stream(body, content)
+        else:
+            self._json({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(json.dumps(body.get("messages", []))) // 4,
+                          "completion_tokens": len(content) // 4,
+                          "total_tokens": (len(json.dumps(body.get("messages", []))) + len(content)) // 4},
+            })
+
+    def _json(self, payload, status=200, headers=None):
+        out = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def _stream(self, body, content):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data):
+            raw = data.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(raw), raw))
+            self.wfile.flush()
+
+        size = server.stream_chunk_chars
+        for i in range(0, len(content), size):
+            chunk = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": body.get("model", "gpt-4o"),
+                     "choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]}
+            send(f"data: {json.dumps(chunk)}\n\n")
+            if server.stream_chunk_delay:
+                time.sleep(server.stream_chunk_delay)
+        send("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded fake endpoint; latency is `latency` seconds plus uniform jitter."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, malformed_rate=0.0,
+                 stream_chunk_chars=16, stream_chunk_delay=0.0, seed=0, error_rate=0.0, error_status=429,
+                 retry_after=1):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay = stream_chunk_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, **{k: 0 for k in MALFORMED_KINDS}}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_latency(self):
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def should_fail(self):
+        with self._lock:
+            failed = bool(self.error_rate) and self._rng.random() < self.error_rate
+            self.stats["errors"] += failed
+            return failed
+
+    def completion_for(self, body):
+        messages = body.get("messages") or [{}]
+        is_image = isinstance(messages[-1].get("content"), list)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["streamed"] += bool(body.get("stream"))
+            kind = None
+            if not is_image and self._rng.random() < self.malformed_rate:
+                kind = self._rng.choice(MALFORMED_KINDS)
+                self.stats[kind] += 1
+        shard = ((body.get("response_format") or {}).get("json_schema") or {}).get("name")
+        content = IMAGE_RESPONSE if is_image else SHARD_RESPONSES.get(shard, SCORING_RESPONSE)
+        return (damage(content, kind) if kind else content), kind
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI endpoint in the foreground.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform latency, seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests refused")
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args(argv)
+    server = FakeOpenAIServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                              malformed_rate=args.malformed_rate, stream_chunk_delay=args.stream_chunk_delay,
+                              error_rate=args.error_rate, error_status=args.error_status)
+    print(f"Fake OpenAI endpoint on {server.base_url} (set OPENAI_BASE_URL to this)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
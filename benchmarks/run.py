@@ -0,0 +1,343 @@
+"""Offline benchmark suite.
+
+    python -m benchmarks.run                        # full run, writes bench_results.json
+    python -m benchmarks.run --quick --only seal,pdf
+    python -m benchmarks.run --compare old.json     # diff against an earlier run
+
+Everything runs against benchmarks.fake_openai on localhost with caches disabled and a
+scratch directory for every database and log, so numbers reflect Evalia's own overhead
+plus the simulated model latency. Results are JSON: one record per benchmark with
+throughput and p50/p95/p99 latency, tagged with the git commit they were taken at.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.fake_openai import FakeOpenAIServer
+
+BENCHMARKS = ("startup", "sanitize", "score_claim", "score_stream", "save_to_memory", "similarity", "seal", "pdf")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _isolate(workdir, base_url):
+    # Must run before anything imports core.api_config / core.logging_config.
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": base_url,
+        "EVALIA_LOG_FILE": os.path.join(workdir, "evalia_debug.log"),
+        "EVALIA_LOG_LEVEL": "WARNING",
+        "EVALIA_MEMORY_DB": os.path.join(workdir, "evalia_memory.db"),
+        "EVALIA_SCORE_CACHE_FILE": os.path.join(workdir, "evalia_cache.db"),
+        "EVALIA_SCORE_CACHE_DISABLED": "1",
+        "EVALIA_IMAGE_CACHE_DISABLED": "1",
+        "EVALIA_METRICS_FILE": "",
+        # The shared rate limiter would throttle the run instead of measuring it.
+        "EVALIA_LLM_RPM_LIMIT": "0",
+        "EVALIA_LLM_TPM_LIMIT": "0",
+        "EVALIA_RATE_LIMIT_DB": os.path.join(workdir, "evalia_ratelimit.db"),
+        "EVALIA_JOBS_DB": os.path.join(workdir, "evalia_jobs.db"),
+        "EVALIA_LLM_MODE": "live",
+        "EVALIA_LLM_CORPUS": os.path.join(workdir, "evalia_llm_corpus.db"),
+    })
+
+
+def summarize(name, latencies, elapsed, **params):
+    from core.batch import percentile
+    ms = [v * 1000 for v in latencies]
+    return {
+        "name": name,
+        "params": params,
+        "samples": len(ms),
+        "elapsed_s": round(elapsed, 4),
+        "ops_per_s": round(len(ms) / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else None,
+    }
+
+
+def timed(fn, iterations):
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - started
+
+
+def _claim(i, words=60):
+    # Deterministic, and distinct enough that unrelated claims share almost no shingles.
+    return f"Claim {i}: " + " ".join(f"word{(i * 2654435761 + w * 40503) % 50021}" for w in range(words))
+
+
+def bench_startup(args, server):
+    # Wall time of a fresh interpreter importing what the app imports; see core.import_profile.
+    from core.import_profile import app_imports
+    code = "import " + ", ".join(app_imports())
+    latencies, elapsed = timed(lambda i: subprocess.run([sys.executable, "-c", code], check=True, env=os.environ),
+                               3 if args.quick else 10)
+    return [summarize("import_app", latencies, elapsed)]
+
+
+def bench_sanitize(args, server):
+    from core.analysis import sanitize_input
+    results = []
+    for size in (1024 * 1024, 10 * 1024 * 1024):
+        text = ("Ever since 5G towers went up <script>alert(1)</script> the birds {left}. " * (size // 70 + 1))[:size]
+        latencies, elapsed = timed(lambda i: sanitize_input(text), 3 if args.quick else 10)
+        results.append(summarize("sanitize_input", latencies, elapsed, input_bytes=size))
+    return results
+
+
+def bench_score_claim(args, server):
+    from core.analysis import score_claim, parse_stats
+    results = []
+    total = 40 if args.quick else args.requests
+    for concurrency in args.concurrency:
+        before = dict(server.stats)
+        latencies = []
+
+        def one(i):
+            t = time.perf_counter()
+            result = score_claim(_claim(i), brutality_mode=bool(i % 2), bypass_cache=True)
+            latencies.append(time.perf_counter() - t)
+            return "error" not in result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(one, range(total)))
+        record = summarize("score_claim", latencies, time.perf_counter() - started,
+                           concurrency=concurrency, latency_s=server.latency, malformed_rate=server.malformed_rate)
+        record["succeeded"] = ok
+        record["model_requests"] = server.stats["requests"] - before["requests"]
+        record["parse_stats"] = parse_stats()
+        results.append(record)
+    return results
+
+
+def bench_score_stream(args, server):
+    from core.analysis import iter_score_claim
+    first_field, latencies = [], []
+    started = time.perf_counter()
+    for i in range(10 if args.quick else 50):
+        t = time.perf_counter()
+        first = None
+        for event in iter_score_claim(_claim(i), bypass_cache=True):
+            if first is None and event[0] == "field":
+                first = time.perf_counter() - t
+        latencies.append(time.perf_counter() - t)
+        first_field.append(first if first is not None else latencies[-1])
+    elapsed = time.perf_counter() - started
+    record = summarize("score_claim_stream", latencies, elapsed, latency_s=server.latency,
+                       stream_chunk_delay=server.stream_chunk_delay)
+    record["first_field"] = summarize("first_field", first_field, elapsed)
+    return [record]
+
+
+def _fill_store(store, size):
+    from core.memory_store import enhance_entry
+    from benchmarks.fake_openai import SCORING_RESPONSE
+    analysis = json.loads(SCORING_RESPONSE)
+    conn = store._connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO evaluations (timestamp, verdict, persona, entry) VALUES (?, ?, ?, ?)",
+                (store._row(enhance_entry(_entry(i, analysis))) for i in range(size)),
+            )
+    finally:
+        conn.close()
+
+
+def _entry(i, analysis):
+    return {
+        "timestamp": datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat(),
+        "claim": _claim(i),
+        "url": None,
+        "image_analysis": None,
+        "scores": analysis["scores"],
+        "analysis": analysis,
+        "brutality_mode": bool(i % 3 == 0),
+    }
+
+
+def bench_save_to_memory(args, server, workdir):
+    import core.memory_store as memory_store
+    from core.resources import registry
+    from core.analysis import save_to_memory
+    from benchmarks.fake_openai import SCORING_RESPONSE
+    analysis = json.loads(SCORING_RESPONSE)
+    results = []
+    for size in args.history_sizes:
+        store = memory_store.MemoryStore(os.path.join(workdir, f"memory_{size}.db"))
+        store.initialize()
+        _fill_store(store, size)
+        registry.set("memory_store", store)  # save_to_memory writes through get_memory_store()
+        latencies, elapsed = timed(lambda i: save_to_memory(_entry(size + i, analysis)), 50 if args.quick else 200)
+        results.append(summarize("save_to_memory", latencies, elapsed, history_size=size))
+    registry.reset("memory_store")
+    return results
+
+
+def bench_similarity(args, server, workdir):
+    import core.memory_store as memory_store
+    from core.resources import registry
+    from core.analysis import sanitize_input
+    from core.similarity import SimilarityIndex
+    results = []
+    for size in args.history_sizes:
+        store = memory_store.MemoryStore(os.path.join(workdir, f"similarity_{size}.db"))
+        store.initialize()
+        _fill_store(store, size)
+        registry.set("memory_store", store)
+        index = SimilarityIndex(sanitize_input)
+        started = time.perf_counter()
+        index.refresh()  # signs every stored evaluation
+        sign_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        SimilarityIndex(sanitize_input).refresh()  # restart: signatures already persisted
+        load_elapsed = time.perf_counter() - started
+        queries = [sanitize_input("BREAKING: " + _claim(i * 7919 % size)) for i in range(200)]
+        latencies, elapsed = timed(lambda i: index.nearest(queries[i % len(queries)], "stoic"), 1000)
+        record = summarize("similarity_lookup", latencies, elapsed, history_size=size)
+        record["initial_sign_s"] = round(sign_elapsed, 3)
+        record["reload_s"] = round(load_elapsed, 3)
+        results.append(record)
+    registry.reset("memory_store")
+    return results
+
+
+def bench_seal(args, server):
+    from rendering.seal import SealRenderer
+    from core.resources import registry
+    import rendering.seal as seal
+    registry.set("seal_renderer", SealRenderer())
+    n = 50 if args.quick else 300
+    cold, cold_elapsed = timed(lambda i: seal.render_evalia_seal(f"Verdict {i}: implausible but popular", i % 2), n)
+    warm, warm_elapsed = timed(lambda i: seal.render_evalia_seal(f"Verdict {i % 10}: implausible but popular", i % 2), n)
+    return [summarize("render_evalia_seal", cold, cold_elapsed, cache="cold"),
+            summarize("render_evalia_seal", warm, warm_elapsed, cache="warm")]
+
+
+def bench_pdf(args, server):
+    from core.claim_output.pdf_report import generate_pdf_report
+    from benchmarks.fake_openai import SCORING_RESPONSE
+    analysis = json.loads(SCORING_RESPONSE)
+    n = 20 if args.quick else 100
+    cold, cold_elapsed = timed(lambda i: generate_pdf_report(_entry(i, analysis)), n)
+    warm, warm_elapsed = timed(lambda i: generate_pdf_report(_entry(i % 5, analysis)), n)
+    return [summarize("generate_pdf_report", cold, cold_elapsed, cache="cold"),
+            summarize("generate_pdf_report", warm, warm_elapsed, cache="warm")]
+
+
+def run(args):
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+    workdir = tempfile.mkdtemp(prefix="evalia-bench-")
+    server = FakeOpenAIServer(latency=args.latency, jitter=args.jitter, malformed_rate=args.malformed_rate,
+                              stream_chunk_delay=args.stream_chunk_delay, seed=args.seed).start()
+    _isolate(workdir, server.base_url)
+    results = []
+    try:
+        for name in BENCHMARKS:
+            if name not in selected:
+                continue
+            print(f"-- {name}", file=sys.stderr, flush=True)
+            if name in ("save_to_memory", "similarity"):
+                results.extend(globals()[f"bench_{name}"](args, server, workdir))
+            else:
+                results.extend(globals()[f"bench_{name}"](args, server))
+    finally:
+        server.stop()
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "fake_server": {"latency_s": args.latency, "jitter_s": args.jitter,
+                            "malformed_rate": args.malformed_rate, "seed": args.seed},
+            "workdir": workdir,
+        },
+        "results": results,
+    }
+
+
+def _key(record):
+    return (record["name"], json.dumps(record["params"], sort_keys=True))
+
+
+def compare(baseline, current, threshold=0.10):
+    """Print p50/p95 deltas per benchmark; returns the number of regressions beyond threshold."""
+    base = {_key(r): r for r in baseline["results"]}
+    regressions = 0
+    print(f"{'benchmark':<58} {'p50 ms':>16} {'p95 ms':>16}")
+    for record in current["results"]:
+        old = base.get(_key(record))
+        label = f"{record['name']} {json.dumps(record['params'], sort_keys=True)}"[:58]
+        if old is None:
+            print(f"{label:<58} {'(new)':>16}")
+            continue
+        cells = []
+        for field in ("p50_ms", "p95_ms"):
+            before, after = old[field] or 0.0, record[field] or 0.0
+            change = (after - before) / before if before else 0.0
+            regressions += field == "p95_ms" and change > threshold
+            cells.append(f"{after:>8.2f} ({change:+.0%})")
+        print(f"{label:<58} {cells[0]:>16} {cells[1]:>16}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Evalia's offline benchmarks.")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--only", help=f"comma-separated subset of: {','.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="smaller sample counts, for a smoke run")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra uniform latency, seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="fraction of damaged completions")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.002, help="seconds between SSE chunks")
+    parser.add_argument("--requests", type=int, default=200, help="score_claim calls per concurrency level")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32],
+                        help="comma-separated concurrency levels for score_claim")
+    parser.add_argument("--history-sizes", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[1000, 10000, 100000], help="memory sizes for save_to_memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p95 slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), report, args.threshold) else 0
+    for record in report["results"]:
+        print(f"{record['name']:<22} {json.dumps(record['params'], sort_keys=True):<60} "
+              f"p50={record['p50_ms']:.2f}ms p95={record['p95_ms']:.2f}ms ops/s={record['ops_per_s']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
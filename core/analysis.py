@@ -1,134 +1,601 @@
 
+import asyncio
 import json
+import random
 import re
-from core.logging_config import configure_evalia_logger
-from core.prompts import STOIC_SCORING_PROMPT, BRUTAL_SCORING_PROMPT
-from core.api_config import OPENAI_API_KEY, MEMORY_FILE
-import openai
+import threading
+import time
+from core.logging_config import configure_evalia_logger, should_log_payload
+from core.prompts import (STOIC_SCORING_PROMPT, BRUTAL_SCORING_PROMPT, SCORING_RESPONSE_FORMAT, INTEGER_FIELDS,
+                          STOIC_CORE_PROMPT, BRUTAL_CORE_PROMPT, CORE_RESPONSE_FORMAT, GATE_RESPONSE_FORMAT,
+                          SHARDED_GATES, gate_prompt)
+from core.api_config import (STRUCTURED_OUTPUT, SCORE_CACHE_FILE, SCORE_CACHE_TTL_SECONDS,
+                             SCORE_CACHE_MEMORY_ENTRIES, SCORE_CACHE_MAX_BYTES, SCORE_CACHE_DISABLED,
+                             SIMILARITY_DISABLED, SCORING_MODELS, CASCADE_SHADOW_RATE,
+                             SHARDED_SCORING, SHARD_REASONING_MODEL)
+from core.cache import ResultCache, make_cache_key
+from core.memory_store import enhance_entry, get_memory_store
+from core.similarity import SimilarityIndex
+from core.clients import get_async_client, run_sync, iter_sync
+from core.streaming_json import IncrementalJSONParser
+from core.json_repair import repair_json, coerce_int
+from core.tracing import span, record_span, start_trace, metrics
+from core.routing import CascadePolicy, cascade_stats, estimate_cost, usage_tokens
+from core.llm import create_completion, UpstreamUnavailable
 
 logger = configure_evalia_logger()
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
+scoring_policy = CascadePolicy(SCORING_MODELS)
+SCORING_MODEL = scoring_policy.tiers[-1]  # the authoritative (largest) model
+score_cache = ResultCache(
+    SCORE_CACHE_FILE,
+    table="score_cache",
+    max_memory_entries=SCORE_CACHE_MEMORY_ENTRIES,
+    max_disk_bytes=SCORE_CACHE_MAX_BYTES,
+    ttl_seconds=SCORE_CACHE_TTL_SECONDS,
+)
 
 def sanitize_input(text):
     text = re.sub(r'[\U00010000-\U0010ffff]', '', text)
     text = re.sub(r'[^\w\s\.,!?:/\-\(\)\[\]]', '', text)
     return " ".join(text.strip().split())
 
+similarity_index = SimilarityIndex(sanitize_input)
+
 def save_to_memory(entry):
+    """Append the entry to the memory store and index it; returns its id, or None on failure."""
     try:
-        enhanced_entry = {
-            **entry,
-            "claim_word_count": len(entry.get("claim", "").split()),
-            "had_url": bool(entry.get("url")),
-            "had_image": bool(entry.get("image_analysis")),
-            "persona_used": "brutal" if entry.get("brutality_mode") else "stoic",
-            "scores_generated": bool(entry.get("scores")),
-            "analysis_length": len(json.dumps(entry.get("analysis", ""))),
-            "verdict_extracted": bool(entry.get("analysis", {}).get("verdict")),
-            "all_scores_present": len(entry.get("scores", {})) == 5,
-        }
-        with open(MEMORY_FILE, 'r+') as f:
-            data = json.load(f)
-            data.append(enhanced_entry)
-            f.seek(0)
-            json.dump(data, f, indent=2)
-            f.truncate()
+        with span("memory_save"):
+            enhanced_entry = enhance_entry(entry)
+            entry_id = get_memory_store().append(enhanced_entry)
+        try:
+            similarity_index.add(entry_id, enhanced_entry)
+        except Exception:
+            logger.warning("Failed to index evaluation %s for near-duplicate matching", entry_id, exc_info=True)
         logger.info("Enhanced data saved: %s (%d words, %s mode)",
                     enhanced_entry.get("claim", "")[:50] + "...",
                     enhanced_entry['claim_word_count'],
                     enhanced_entry['persona_used'])
+        return entry_id
     except Exception:
         logger.error("Failed to save to memory", exc_info=True)
+        return None
+
+def score_cache_key(cleaned, brutality_mode, model="+".join(SCORING_MODELS), sharded=SHARDED_SCORING):
+    if sharded:
+        prompts = [BRUTAL_CORE_PROMPT if brutality_mode else STOIC_CORE_PROMPT, SHARD_REASONING_MODEL]
+        prompts += [gate_prompt(gate, brutality_mode) for gate in SHARDED_GATES]
+    else:
+        prompts = [BRUTAL_SCORING_PROMPT if brutality_mode else STOIC_SCORING_PROMPT]
+    prompt_hash = make_cache_key(*prompts)
+    return make_cache_key(cleaned, "brutal" if brutality_mode else "stoic", model, prompt_hash)
+
+_parse_stats = {"responses": 0, "clean": 0, "repaired": 0, "network_retries": 0, "failures": 0}
+_parse_stats_lock = threading.Lock()
+
+def _count(name):
+    with _parse_stats_lock:
+        _parse_stats[name] += 1
+
+def parse_stats():
+    """How often completions parsed cleanly, needed local repair, or still cost a network retry."""
+    with _parse_stats_lock:
+        return dict(_parse_stats)
+
+def parse_scored_response(response):
+    """Parse and validate a scoring completion, repairing it locally if needed.
+
+    Raises ValueError (or JSONDecodeError) only when repair can't recover a valid result,
+    which is the caller's cue to spend a network retry.
+    """
+    _count("responses")
+    response = re.sub(r'^```json\s*\n?', '', response.strip())
+    response = re.sub(r'\n?```$', '', response).strip()
+    try:
+        parsed = json.loads(response)
+        repaired = False
+    except json.JSONDecodeError:
+        parsed = repair_json(response)
+        repaired = True
+    if not isinstance(parsed, dict):
+        raise ValueError("Response is not a JSON object")
+    required_fields = ["verdict", "claim_summary", "scores", "reasoning"]
+    if not all(field in parsed for field in required_fields):
+        raise ValueError("Missing required JSON fields")
+    if not isinstance(parsed["scores"], dict) or not all(key in parsed["scores"] for key in ["logic", "natural_law", "historical_accuracy", "source_credibility", "overall_reasonableness"]):
+        raise ValueError("Missing required score fields")
+    # Convert string scores to integers
+    for key in parsed["scores"]:
+        try:
+            parsed["scores"][key] = int(parsed["scores"][key])
+        except (ValueError, TypeError):
+            logger.warning("Invalid score value for %s: %s, setting to 0", key, parsed["scores"][key])
+            parsed["scores"][key] = 0
+    for key in INTEGER_FIELDS:
+        if key in parsed and not isinstance(parsed[key], int):
+            parsed[key] = coerce_int(parsed[key])
+    _count("repaired" if repaired else "clean")
+    return parsed
+
+def _collect_metrics():
+    samples = [("llm_responses_total", {"outcome": k}, v) for k, v in parse_stats().items()]
+    samples += [("score_cache", {"stat": k}, v) for k, v in score_cache.stats().items()]
+    samples += [("similarity_index", {"stat": k}, v) for k, v in similarity_index.stats().items()]
+    samples += cascade_stats.metric_samples()
+    return samples
+
+metrics.register_collector(_collect_metrics)
+
+def _response_format(response_format=SCORING_RESPONSE_FORMAT):
+    return {"response_format": response_format} if STRUCTURED_OUTPUT else {}
+
+def fallback_result(error, claim_summary, claim_length=0):
+    return {
+        "error": error,
+        "verdict": "Unknown",
+        "claim_summary": claim_summary,
+        "scores": {
+            "logic": 0,
+            "natural_law": 0,
+            "historical_accuracy": 0,
+            "source_credibility": 0,
+            "overall_reasonableness": 0
+        },
+        "reasoning": {},
+        "grounding_meter": "",
+        "emotion_meter": "",
+        "ai_origin": "",
+        "detected_style": "",
+        "relevant_sources": [],
+        "suggested_research": [],
+        "final_commentary": "",
+        "confidence_level": 0,
+        "truth_drift_score": 0,
+        "claim_length": claim_length,
+        "temporal_reference": ""
+    }
+
+def error_result(e, cleaned=""):
+    """Fallback dict for a failed scoring call; an unavailable upstream is flagged for the UI."""
+    if isinstance(e, UpstreamUnavailable):
+        return {**fallback_result(str(e), "Analysis paused: the AI service is unavailable", len(cleaned.split())),
+                "upstream_unavailable": True}
+    return fallback_result(f"Unable to score claim: {str(e)}", "Analysis failed due to an issue", len(cleaned.split()))
+
+def score_claim(text, brutality_mode=False, bypass_cache=False):
+    """Blocking wrapper over score_claim_async; always returns a result dict."""
+    try:
+        return run_sync(score_claim_async(text, brutality_mode, bypass_cache))
+    except Exception as e:
+        logger.error("Scoring error: %s", str(e), exc_info=True)
+        return error_result(e, sanitize_input(text))
+
+def _cacheable(result):
+    """The result as stored in the score cache: routing describes one call, so it isn't kept."""
+    return {k: v for k, v in result.items() if k != "model_routing"}
+
+def _served_without_model(result, source):
+    """Attach routing for a result no model was called for; `source` is "cache_hit" or "prior_match"."""
+    return {**result, "model_routing": {"model": None, "escalated": False, "escalation_reason": None,
+                                        "tiers": [], source: True}}
 
-def score_claim(text, brutality_mode=False):
+async def score_claim_async(text, brutality_mode=False, bypass_cache=False):
+    """Score a claim, serving repeats from the result cache unless bypass_cache is set."""
+    cache_key = None
+    if not (bypass_cache or SCORE_CACHE_DISABLED):
+        try:
+            with span("score_cache_lookup") as lookup:
+                cache_key = score_cache_key(sanitize_input(text), brutality_mode)
+                cached = await asyncio.to_thread(score_cache.get, cache_key)
+                lookup.attrs["hit"] = cached is not None
+            if cached is not None:
+                logger.info("Score cache hit: %s", cache_key[:12])
+                return _served_without_model(cached, "cache_hit")
+        except Exception:
+            logger.warning("Score cache lookup failed", exc_info=True)
+    if not bypass_cache:
+        prior = await _prior_evaluation(text, brutality_mode)
+        if prior is not None:
+            return prior
+    result = await _score_claim(text, brutality_mode)
+    # Fallback dicts carry "error"; never let a failure stick for the whole TTL.
+    if cache_key and "error" not in result:
+        await asyncio.to_thread(score_cache.set, cache_key, _cacheable(result))
+    return result
+
+async def _prior_evaluation(text, brutality_mode):
+    """A stored analysis of a near-duplicate claim, or None (also when matching is off or fails)."""
+    if SIMILARITY_DISABLED:
+        return None
     try:
+        with span("similarity_lookup") as lookup:
+            prior = await asyncio.to_thread(similarity_index.find_prior, sanitize_input(text), brutality_mode)
+            lookup.attrs["hit"] = prior is not None
+        return _served_without_model(prior, "prior_match") if prior is not None else None
+    except Exception:
+        logger.warning("Similarity lookup failed", exc_info=True)
+        return None
+
+async def _ask_model(client, model, prompt, cleaned, retries=2, response_format=SCORING_RESPONSE_FORMAT):
+    """One model's scoring completion, repaired locally and retried up to `retries` times.
+
+    Returns (result, prompt_tokens, completion_tokens); result is a fallback dict when
+    nothing valid came back.
+    """
+    temp = 0.1
+    prompt_tokens = completion_tokens = 0
+    for attempt in range(retries + 1):
+        try:
+            with span("llm_attempt", attempt=attempt + 1, model=model):
+                completion = await create_completion(
+                    client,
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": f"Claim:\n{cleaned}"}
+                    ],
+                    temperature=temp,
+                    **_response_format(response_format),
+                )
+            used_prompt, used_completion = usage_tokens(completion)
+            prompt_tokens += used_prompt
+            completion_tokens += used_completion
+            response = (completion.choices[0].message.content or "").strip()
+            if should_log_payload():
+                logger.debug("Raw %s response (attempt %d): %s", model, attempt + 1, response[:500] + "..." if len(response) > 500 else response)
+            else:
+                logger.info("%s response received (attempt %d, %d chars)", model, attempt + 1, len(response))
+            with span("json_parse"):
+                return parse_scored_response(response), prompt_tokens, completion_tokens
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.warning("JSON parse failed on attempt %d: %s", attempt + 1, str(e))
+            if attempt < retries:
+                _count("network_retries")
+                prompt += "\nOutput ONLY a valid JSON object, no fences, no extra text."
+            else:
+                if retries:
+                    logger.error("All retries failed for JSON parsing")
+                _count("failures")
+                return fallback_result(
+                    f"Failed to parse JSON after {retries + 1} attempts: {str(e)}",
+                    "Analysis failed due to formatting error",
+                    len(cleaned.split()),
+                ), prompt_tokens, completion_tokens
+
+def _record_tier(model, started, prompt_tokens, completion_tokens, reason, task="scoring"):
+    latency = time.perf_counter() - started
+    cascade_stats.record_call(task, model, latency, prompt_tokens, completion_tokens, reason,
+                              reference_model=SCORING_MODEL)
+    return {
+        "model": model,
+        "latency_ms": round(latency * 1000, 1),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": round(estimate_cost(model, prompt_tokens, completion_tokens), 6),
+        "escalation_reason": reason,
+    }
+
+_shadow_tasks = set()
+
+def _maybe_shadow(model, result, sys_prompt, cleaned, response_format=SCORING_RESPONSE_FORMAT):
+    """Occasionally re-score an accepted cheap answer with the large model, to measure its accuracy."""
+    if not CASCADE_SHADOW_RATE or random.random() >= CASCADE_SHADOW_RATE:
+        return
+
+    async def shadow():
+        with start_trace("shadow_scoring", model=SCORING_MODEL):
+            started = time.perf_counter()
+            try:
+                reference, prompt_tokens, completion_tokens = await _ask_model(
+                    get_async_client(), SCORING_MODEL, sys_prompt, cleaned, retries=0, response_format=response_format)
+            except Exception:
+                logger.warning("Shadow scoring with %s failed", SCORING_MODEL, exc_info=True)
+                return
+            _record_tier(SCORING_MODEL, started, prompt_tokens, completion_tokens, None, task="scoring_shadow")
+            cascade_stats.record_agreement(model, result, reference)
+
+    task = asyncio.get_running_loop().create_task(shadow())
+    _shadow_tasks.add(task)
+    task.add_done_callback(_shadow_tasks.discard)
+
+async def _try_cheap_tiers(client, sys_prompt, cleaned, response_format=SCORING_RESPONSE_FORMAT):
+    """Run every tier below the final one until one is accepted.
+
+    Returns (accepted_result or None, routing, rejected) where routing lists each tier tried
+    and rejected holds (model, result) pairs that were escalated.
+    """
+    routing, rejected = [], []
+    for model in scoring_policy.tiers[:-1]:
+        started = time.perf_counter()
+        try:
+            # No retries on a cheap tier: escalating is the retry.
+            result, prompt_tokens, completion_tokens = await _ask_model(client, model, sys_prompt, cleaned, retries=0,
+                                                                        response_format=response_format)
+            reason = scoring_policy.escalation_reason(result)
+        except UpstreamUnavailable:
+            raise  # the larger tiers share the same upstream
+        except Exception as e:
+            logger.warning("Model %s failed, escalating: %s", model, str(e))
+            result, prompt_tokens, completion_tokens, reason = None, 0, 0, "request_failed"
+        routing.append(_record_tier(model, started, prompt_tokens, completion_tokens, reason))
+        if reason is None:
+            _maybe_shadow(model, result, sys_prompt, cleaned, response_format)
+            return result, routing, rejected
+        logger.info("Escalating from %s: %s", model, reason)
+        rejected.append((model, result))
+    return None, routing, rejected
+
+def _with_routing(result, routing, rejected):
+    for model, cheap in rejected:
+        cascade_stats.record_agreement(model, cheap, result)
+    reasons = [tier["escalation_reason"] for tier in routing if tier["escalation_reason"]]
+    return {
+        **result,
+        "model_routing": {
+            "model": routing[-1]["model"],
+            "escalated": bool(reasons),
+            "escalation_reason": reasons[0] if reasons else None,
+            "tiers": routing,
+        },
+    }
+
+async def _score_final(client, sys_prompt, cleaned, routing, rejected, response_format=SCORING_RESPONSE_FORMAT):
+    started = time.perf_counter()
+    result, prompt_tokens, completion_tokens = await _ask_model(client, SCORING_MODEL, sys_prompt, cleaned,
+                                                                response_format=response_format)
+    routing.append(_record_tier(SCORING_MODEL, started, prompt_tokens, completion_tokens, None))
+    return _with_routing(result, routing, rejected)
+
+def parse_gate_response(response):
+    """Parse a gate shard's {"score", "reasoning"} completion; ValueError if it can't be recovered."""
+    response = re.sub(r'^```json\s*\n?', '', response.strip())
+    response = re.sub(r'\n?```$', '', response).strip()
+    try:
+        parsed = json.loads(response)
+    except json.JSONDecodeError:
+        parsed = repair_json(response)
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("reasoning"), str) or not parsed["reasoning"].strip():
+        raise ValueError("Missing gate reasoning")
+    score = coerce_int(parsed.get("score"))
+    return {"score": min(max(score, 0), 10) if isinstance(score, int) else None, "reasoning": parsed["reasoning"]}
+
+async def _ask_gate(client, gate, cleaned, brutality_mode, retries=1):
+    """One gate's reasoning shard, or None when it failed (the core result still stands)."""
+    prompt = gate_prompt(gate, brutality_mode)
+    started = time.perf_counter()
+    prompt_tokens = completion_tokens = 0
+    failure = "shard_failed"
+    try:
+        for attempt in range(retries + 1):
+            with span("gate_shard", gate=gate, attempt=attempt + 1, model=SHARD_REASONING_MODEL):
+                completion = await create_completion(
+                    client,
+                    model=SHARD_REASONING_MODEL,
+                    messages=[
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": f"Claim:\n{cleaned}"}
+                    ],
+                    temperature=0.1,
+                    **_response_format(GATE_RESPONSE_FORMAT),
+                )
+            used_prompt, used_completion = usage_tokens(completion)
+            prompt_tokens += used_prompt
+            completion_tokens += used_completion
+            try:
+                shard = parse_gate_response(completion.choices[0].message.content or "")
+                failure = None
+                return shard
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.warning("Gate %s parse failed on attempt %d: %s", gate, attempt + 1, str(e))
+        return None
+    except Exception as e:
+        logger.warning("Gate %s shard failed: %s", gate, str(e))
+        return None
+    finally:
+        cascade_stats.record_call("gate_reasoning", SHARD_REASONING_MODEL, time.perf_counter() - started,
+                                  prompt_tokens, completion_tokens, failure)
+
+async def _score_core(client, cleaned, brutality_mode):
+    """The sharded mode's core call (everything but per-gate reasoning), through the model cascade."""
+    sys_prompt = BRUTAL_CORE_PROMPT if brutality_mode else STOIC_CORE_PROMPT
+    try:
+        accepted, routing, rejected = await _try_cheap_tiers(client, sys_prompt, cleaned, CORE_RESPONSE_FORMAT)
+        if accepted is not None:
+            return _with_routing(accepted, routing, rejected)
+        return await _score_final(client, sys_prompt, cleaned, routing, rejected, CORE_RESPONSE_FORMAT)
+    except Exception as e:
+        logger.error("Scoring error: %s", str(e), exc_info=True)
+        return error_result(e, cleaned)
+
+def merge_shards(core, gates):
+    """Fold gate shards into the core result, giving the same shape as a single scoring call.
+
+    A gate shard's own score replaces the core's for that gate, so the number shown next to
+    the reasoning is the one the reasoning argues for; overall_reasonableness and the verdict
+    stay the core's. Failed or still-pending gates are left out of "reasoning".
+    """
+    scores = dict(core["scores"])
+    reasoning = {gate: shard["reasoning"] for gate, shard in gates.items() if shard}
+    reasoning["overall_reasonableness"] = (core.get("reasoning") or {}).get("overall_reasonableness", "")
+    adjusted = {}
+    for gate, shard in gates.items():
+        if shard and shard["score"] is not None and shard["score"] != scores.get(gate):
+            adjusted[gate] = {"core": scores.get(gate), "shard": shard["score"]}
+            scores[gate] = shard["score"]
+    return {
+        **core,
+        "scores": scores,
+        "reasoning": reasoning,
+        "sharding": {
+            "gates": list(SHARDED_GATES),
+            "failed_gates": [gate for gate in SHARDED_GATES if gate in gates and not gates[gate]],
+            "score_adjustments": adjusted,
+        },
+    }
+
+async def score_sharded_events(cleaned, brutality_mode=False):
+    """Run the core call and every gate shard concurrently.
+
+    Yields ("field", key, value) as pieces land -- the core's fields first, then "scores" and
+    "reasoning" again as each gate arrives -- and finally ("result", merged_result). Wall time
+    is the slowest shard rather than the sum of everything the model writes.
+    """
+    client = get_async_client()
+    started = time.perf_counter()
+    core_task = asyncio.create_task(_score_core(client, cleaned, brutality_mode))
+    gate_tasks = {asyncio.create_task(_ask_gate(client, gate, cleaned, brutality_mode)): gate
+                  for gate in SHARDED_GATES}
+    pending = {core_task, *gate_tasks}
+    core, gates = None, {}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is core_task:
+                    core = task.result()
+                else:
+                    gates[gate_tasks[task]] = task.result()
+            if core is None:
+                continue
+            if "error" in core:
+                yield ("result", core)
+                return
+            merged = merge_shards(core, gates)
+            if core_task in done:
+                for key in core:
+                    if key not in ("scores", "reasoning", "model_routing"):
+                        yield ("field", key, merged[key])
+            yield ("field", "scores", merged["scores"])
+            yield ("field", "reasoning", merged["reasoning"])
+        record_span("sharded_scoring", started, gates=len(SHARDED_GATES),
+                    failed_gates=len(merged["sharding"]["failed_gates"]))
+        yield ("result", merged)
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _score_sharded(text, brutality_mode=False):
+    with span("sanitize"):
         cleaned = sanitize_input(text)
-        sys_prompt = BRUTAL_SCORING_PROMPT if brutality_mode else STOIC_SCORING_PROMPT
+    result = None
+    async for event in score_sharded_events(cleaned, brutality_mode):
+        if event[0] == "result":
+            result = event[1]
+    return result
 
-        def ask(prompt, brutality_mode, retries=2):
-            temp = 0.1
-            for attempt in range(retries + 1):
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": prompt},
-                            {"role": "user", "content": f"Claim:\n{cleaned}"}
-                        ],
-                        temperature=temp,
-                    ).choices[0].message.content.strip()
-                    logger.info("Raw GPT response (attempt %d): %s", attempt + 1, response[:500] + "..." if len(response) > 500 else response)
-                    response = re.sub(r'^```json\s*\n?', '', response)
-                    response = re.sub(r'\n?```$', '', response).strip()
-                    parsed = json.loads(response)
-                    required_fields = ["verdict", "claim_summary", "scores", "reasoning"]
-                    if not all(field in parsed for field in required_fields):
-                        raise ValueError("Missing required JSON fields")
-                    if not all(key in parsed["scores"] for key in ["logic", "natural_law", "historical_accuracy", "source_credibility", "overall_reasonableness"]):
-                        raise ValueError("Missing required score fields")
-                    # Convert string scores to integers
-                    for key in parsed["scores"]:
-                        try:
-                            parsed["scores"][key] = int(parsed["scores"][key])
-                        except (ValueError, TypeError):
-                            logger.warning("Invalid score value for %s: %s, setting to 0", key, parsed["scores"][key])
-                            parsed["scores"][key] = 0
-                    return parsed
-                except (json.JSONDecodeError, ValueError) as e:
-                    logger.warning("JSON parse failed on attempt %d: %s", attempt + 1, str(e))
-                    if attempt < retries:
-                        prompt += "\nOutput ONLY a valid JSON object, no fences, no extra text."
-                    else:
-                        logger.error("All retries failed for JSON parsing")
-                        return {
-                            "error": f"Failed to parse JSON after {retries + 1} attempts: {str(e)}",
-                            "verdict": "Unknown",
-                            "claim_summary": "Analysis failed due to formatting error",
-                            "scores": {
-                                "logic": 0,
-                                "natural_law": 0,
-                                "historical_accuracy": 0,
-                                "source_credibility": 0,
-                                "overall_reasonableness": 0
-                            },
-                            "reasoning": {},
-                            "grounding_meter": "",
-                            "emotion_meter": "",
-                            "ai_origin": "",
-                            "detected_style": "",
-                            "relevant_sources": [],
-                            "suggested_research": [],
-                            "final_commentary": "",
-                            "confidence_level": 0,
-                            "truth_drift_score": 0,
-                            "claim_length": len(cleaned.split()),
-                            "temporal_reference": ""
-                        }
-        return ask(sys_prompt, brutality_mode)
+async def _score_claim(text, brutality_mode=False):
+    if SHARDED_SCORING:
+        return await _score_sharded(text, brutality_mode)
+    cleaned = ""
+    try:
+        with span("sanitize"):
+            cleaned = sanitize_input(text)
+        sys_prompt = BRUTAL_SCORING_PROMPT if brutality_mode else STOIC_SCORING_PROMPT
+        client = get_async_client()
+        accepted, routing, rejected = await _try_cheap_tiers(client, sys_prompt, cleaned)
+        if accepted is not None:
+            return _with_routing(accepted, routing, rejected)
+        return await _score_final(client, sys_prompt, cleaned, routing, rejected)
     except Exception as e:
         logger.error("Scoring error: %s", str(e), exc_info=True)
-        return {
-            "error": f"Unable to score claim: {str(e)}",
-            "verdict": "Unknown",
-            "claim_summary": "Analysis failed due to an issue",
-            "scores": {
-                "logic": 0,
-                "natural_law": 0,
-                "historical_accuracy": 0,
-                "source_credibility": 0,
-                "overall_reasonableness": 0
-            },
-            "reasoning": {},
-            "grounding_meter": "",
-            "emotion_meter": "",
-            "ai_origin": "",
-            "detected_style": "",
-            "relevant_sources": [],
-            "suggested_research": [],
-            "final_commentary": "",
-            "confidence_level": 0,
-            "truth_drift_score": 0,
-            "claim_length": len(cleaned.split()) if 'cleaned' in locals() else 0,
-            "temporal_reference": ""
-        }
+        return error_result(e, cleaned)
+
+def iter_score_claim(text, brutality_mode=False, bypass_cache=False):
+    """Blocking iterator over score_claim_stream for the Streamlit script thread."""
+    try:
+        yield from iter_sync(score_claim_stream(text, brutality_mode, bypass_cache))
+    except Exception as e:
+        logger.error("Streaming scoring error: %s", str(e), exc_info=True)
+        yield ("result", error_result(e, sanitize_input(text)))
+
+async def score_claim_stream(text, brutality_mode=False, bypass_cache=False):
+    """Stream a scoring completion.
 
+    Yields ("field", key, value) for each top-level field as soon as the model closes it
+    (verdict, claim_summary and scores come first), then ("result", result) with the
+    validated result -- the same dict score_claim would have returned.
+    """
+    cache_key = None
+    if not (bypass_cache or SCORE_CACHE_DISABLED):
+        try:
+            with span("score_cache_lookup") as lookup:
+                cache_key = score_cache_key(sanitize_input(text), brutality_mode)
+                cached = await asyncio.to_thread(score_cache.get, cache_key)
+                lookup.attrs["hit"] = cached is not None
+            if cached is not None:
+                logger.info("Score cache hit: %s", cache_key[:12])
+                yield ("result", _served_without_model(cached, "cache_hit"))
+                return
+        except Exception:
+            logger.warning("Score cache lookup failed", exc_info=True)
+    if not bypass_cache:
+        prior = await _prior_evaluation(text, brutality_mode)
+        if prior is not None:
+            yield ("result", prior)
+            return
+
+    with span("sanitize"):
+        cleaned = sanitize_input(text)
+    if SHARDED_SCORING:
+        async for event in score_sharded_events(cleaned, brutality_mode):
+            if event[0] == "result" and cache_key and "error" not in event[1]:
+                await asyncio.to_thread(score_cache.set, cache_key, _cacheable(event[1]))
+            yield event
+        return
+    sys_prompt = BRUTAL_SCORING_PROMPT if brutality_mode else STOIC_SCORING_PROMPT
+    parser = IncrementalJSONParser()
+    client = get_async_client()
+    routing, rejected = [], []
+    try:
+        # Cheap tiers answer in one shot; only the final model is streamed.
+        accepted, routing, rejected = await _try_cheap_tiers(client, sys_prompt, cleaned)
+        if accepted is not None:
+            result = _with_routing(accepted, routing, rejected)
+            if cache_key:
+                await asyncio.to_thread(score_cache.set, cache_key, _cacheable(result))
+            yield ("result", result)
+            return
+        stream_started, first_field_ms = time.perf_counter(), None
+        usage = None
+        stream = await create_completion(
+            client,
+            model=SCORING_MODEL,
+            messages=[
+                {"role": "system", "content": sys_prompt},
+                {"role": "user", "content": f"Claim:\n{cleaned}"}
+            ],
+            temperature=0.1,
+            stream=True,
+            stream_options={"include_usage": True},
+            **_response_format(),
+        )
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk
+            if not chunk.choices:
+                continue
+            for key, value in parser.feed(chunk.choices[0].delta.content or ""):
+                if first_field_ms is None:
+                    first_field_ms = round((time.perf_counter() - stream_started) * 1000, 1)
+                yield ("field", key, value)
+        # Spans can't straddle the yields above, so the stream is timed by hand.
+        record_span("llm_stream", stream_started, model=SCORING_MODEL, first_field_ms=first_field_ms)
+        if should_log_payload():
+            logger.debug("Raw streamed GPT response: %s", parser.text[:500] + "..." if len(parser.text) > 500 else parser.text)
+        with span("json_parse"):
+            result = parse_scored_response(parser.text)
+        routing.append(_record_tier(SCORING_MODEL, stream_started, *usage_tokens(usage), None))
+        result = _with_routing(result, routing, rejected)
+    except (json.JSONDecodeError, ValueError) as e:
+        # Fall back to the non-streaming path and its retries.
+        logger.warning("Streamed JSON parse failed, retrying without streaming: %s", str(e))
+        try:
+            result = await _score_final(client, sys_prompt, cleaned, routing, rejected)
+        except Exception as e:
+            logger.error("Scoring error: %s", str(e), exc_info=True)
+            result = error_result(e, cleaned)
+    except Exception as e:
+        logger.error("Scoring error: %s", str(e), exc_info=True)
+        result = error_result(e, cleaned)
+    if cache_key and "error" not in result:
+        await asyncio.to_thread(score_cache.set, cache_key, _cacheable(result))
+    yield ("result", result)
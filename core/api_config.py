@@ -1,15 +1,120 @@
 """API keys & client setup (keep secrets out of repo)."""
 import os
-import json
-import streamlit as st
 from core.logging_config import configure_evalia_logger
 
 logger = configure_evalia_logger()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-MEMORY_FILE = "evalia_memory.json"
+OPENAI_MAX_CONNECTIONS = int(os.getenv("EVALIA_OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("EVALIA_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("EVALIA_OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("EVALIA_OPENAI_TIMEOUT", "120"))
+METRICS_FILE = os.getenv("EVALIA_METRICS_FILE", "static/evalia_metrics.prom")
+METRICS_EXPORT_INTERVAL = float(os.getenv("EVALIA_METRICS_EXPORT_INTERVAL", "10"))
+METRICS_WINDOW = int(os.getenv("EVALIA_METRICS_WINDOW", "2048"))
+METRICS_PORT = int(os.getenv("EVALIA_METRICS_PORT", "0")) or None
+MEMORY_FILE = "evalia_memory.json"  # legacy store, migrated into MEMORY_DB on startup
+MEMORY_DB = os.getenv("EVALIA_MEMORY_DB", "evalia_memory.db")
+URL_FETCH_TIMEOUT = float(os.getenv("EVALIA_URL_FETCH_TIMEOUT", "10"))
+URL_FETCH_MAX_BYTES = int(os.getenv("EVALIA_URL_FETCH_MAX_BYTES", str(1024 * 1024)))
+URL_TEXT_MAX_CHARS = int(os.getenv("EVALIA_URL_TEXT_MAX_CHARS", "3000"))
+URL_ARTIFACT_TIMEOUT = float(os.getenv("EVALIA_URL_ARTIFACT_TIMEOUT", "15"))
+URL_MAX_REDIRECTS = int(os.getenv("EVALIA_URL_MAX_REDIRECTS", "5"))
+# URL fetches refuse private, loopback and link-local hosts (at every redirect) unless this is set.
+URL_ALLOW_PRIVATE = os.getenv("EVALIA_URL_ALLOW_PRIVATE", "").lower() in ("1", "true", "yes")
+IMAGE_ARTIFACT_TIMEOUT = float(os.getenv("EVALIA_IMAGE_ARTIFACT_TIMEOUT", "60"))
+STRUCTURED_OUTPUT = os.getenv("EVALIA_STRUCTURED_OUTPUT", "1").lower() in ("1", "true", "yes")
+STREAM_SCORING = os.getenv("EVALIA_STREAM_SCORING", "1").lower() in ("1", "true", "yes")
+SCORE_CACHE_FILE = os.getenv("EVALIA_SCORE_CACHE_FILE", "evalia_cache.db")
+SCORE_CACHE_TTL_SECONDS = int(os.getenv("EVALIA_SCORE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SCORE_CACHE_MEMORY_ENTRIES = int(os.getenv("EVALIA_SCORE_CACHE_MEMORY_ENTRIES", "256"))
+SCORE_CACHE_MAX_BYTES = int(os.getenv("EVALIA_SCORE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SCORE_CACHE_DISABLED = os.getenv("EVALIA_SCORE_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+IMAGE_CACHE_FILE = os.getenv("EVALIA_IMAGE_CACHE_FILE", SCORE_CACHE_FILE)
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("EVALIA_IMAGE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+IMAGE_CACHE_MAX_DISTANCE = int(os.getenv("EVALIA_IMAGE_CACHE_MAX_DISTANCE", "3"))
+IMAGE_CACHE_DISABLED = os.getenv("EVALIA_IMAGE_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+SIMILARITY_THRESHOLD = float(os.getenv("EVALIA_SIMILARITY_THRESHOLD", "0.85"))
+SIMILARITY_NUM_PERM = int(os.getenv("EVALIA_SIMILARITY_NUM_PERM", "128"))
+SIMILARITY_BANDS = int(os.getenv("EVALIA_SIMILARITY_BANDS", "16"))
+SIMILARITY_SHINGLE_SIZE = int(os.getenv("EVALIA_SIMILARITY_SHINGLE_SIZE", "3"))
+SIMILARITY_REFRESH_SECONDS = float(os.getenv("EVALIA_SIMILARITY_REFRESH_SECONDS", "30"))
+SIMILARITY_DISABLED = os.getenv("EVALIA_SIMILARITY_DISABLED", "").lower() in ("1", "true", "yes")
+SCORING_INPUT_TOKEN_BUDGET = int(os.getenv("EVALIA_SCORING_INPUT_TOKEN_BUDGET", "2000"))
+# Share of the budget per source, e.g. "claim=0.35,url_text=0.4,image_extracted_text=0.1,..."
+SCORING_BUDGET_SHARES = {
+    name: float(share)
+    for name, share in (pair.split("=") for pair in os.getenv(
+        "EVALIA_SCORING_BUDGET_SHARES",
+        "claim=0.35,url_text=0.4,image_extracted_text=0.1,image_description=0.1,image_assessment=0.05",
+    ).split(",") if "=" in pair)
+}
+# Model cascade: cheapest first; the last tier is the authoritative model.
+SCORING_MODELS = [m.strip() for m in os.getenv("EVALIA_SCORING_MODELS", "gpt-4o-mini,gpt-4o").split(",") if m.strip()]
+IMAGE_MODELS = [m.strip() for m in os.getenv("EVALIA_IMAGE_MODELS", "gpt-4o-mini,gpt-4o").split(",") if m.strip()]
+CASCADE_MIN_CONFIDENCE = int(os.getenv("EVALIA_CASCADE_MIN_CONFIDENCE", "60"))
+# Inclusive overall_reasonableness band that always goes to the large model ("" disables).
+_CASCADE_BORDERLINE = os.getenv("EVALIA_CASCADE_BORDERLINE", "4-6")
+CASCADE_BORDERLINE = tuple(int(x) for x in _CASCADE_BORDERLINE.split("-")) if _CASCADE_BORDERLINE else None
+# Fraction of cheap-tier answers also sent to the large model, to measure cheap-tier accuracy.
+CASCADE_SHADOW_RATE = float(os.getenv("EVALIA_CASCADE_SHADOW_RATE", "0"))
+# Opt-in: one short core call plus one concurrent reasoning call per gate (see core.prompts).
+SHARDED_SCORING = os.getenv("EVALIA_SHARDED_SCORING", "").lower() in ("1", "true", "yes")
+SHARD_REASONING_MODEL = os.getenv("EVALIA_SHARD_REASONING_MODEL", "") or SCORING_MODELS[-1]
+# USD per million input/output tokens, "model=input/output,..."
+MODEL_PRICES = {
+    name: tuple(float(p) for p in prices.split("/"))
+    for name, prices in (pair.split("=") for pair in os.getenv(
+        "EVALIA_MODEL_PRICES", "gpt-4o=2.5/10,gpt-4o-mini=0.15/0.6").split(",") if "=" in pair)
+}
+# Standalone scoring service (python -m core.service); the app becomes its client when
+# EVALIA_SERVICE_URL is set, e.g. "http://127.0.0.1:8080".
+SERVICE_URL = os.getenv("EVALIA_SERVICE_URL", "").rstrip("/") or None
+SERVICE_HOST = os.getenv("EVALIA_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("EVALIA_SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("EVALIA_SERVICE_WORKERS", "8"))
+SERVICE_QUEUE_SIZE = int(os.getenv("EVALIA_SERVICE_QUEUE_SIZE", "64"))
+SERVICE_DRAIN_TIMEOUT = float(os.getenv("EVALIA_SERVICE_DRAIN_TIMEOUT", "30"))
+SERVICE_MAX_BODY_BYTES = int(os.getenv("EVALIA_SERVICE_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+# Seconds a client gets to send a request's headers and body (and an idle keep-alive connection lives).
+SERVICE_READ_TIMEOUT = float(os.getenv("EVALIA_SERVICE_READ_TIMEOUT", "30"))
+# Bearer token for the /v1 routes, sent by the app as its client; without one the service
+# only listens on loopback.
+SERVICE_TOKEN = os.getenv("EVALIA_SERVICE_TOKEN") or None
+SERVICE_CLIENT_TIMEOUT = float(os.getenv("EVALIA_SERVICE_CLIENT_TIMEOUT", "300"))
+SERVICE_CLIENT_RETRIES = int(os.getenv("EVALIA_SERVICE_CLIENT_RETRIES", "3"))
+# Durable evaluation jobs (core.jobs): the app enqueues and polls instead of scoring in the
+# script run. EVALIA_JOB_WORKERS processes are started by the app; 0 means run them
+# separately with `python -m core.jobs`.
+JOB_QUEUE = os.getenv("EVALIA_JOB_QUEUE", "").lower() in ("1", "true", "yes")
+JOBS_DB = os.getenv("EVALIA_JOBS_DB", "evalia_jobs.db")
+JOB_WORKERS = int(os.getenv("EVALIA_JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("EVALIA_JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("EVALIA_JOB_MAX_ATTEMPTS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("EVALIA_JOB_POLL_SECONDS", "1"))
+JOB_RETENTION_SECONDS = int(os.getenv("EVALIA_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# Shared OpenAI rate limits (core.llm), coordinated across processes through SQLite; 0 disables.
+RATE_LIMIT_DB = os.getenv("EVALIA_RATE_LIMIT_DB", "evalia_ratelimit.db")
+LLM_RPM_LIMIT = int(os.getenv("EVALIA_LLM_RPM_LIMIT", "500"))
+LLM_TPM_LIMIT = int(os.getenv("EVALIA_LLM_TPM_LIMIT", "150000"))
+# Tokens reserved for the completion when a request doesn't set max_tokens.
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("EVALIA_LLM_COMPLETION_TOKEN_ESTIMATE", "1000"))
+LLM_MAX_RATE_WAIT = float(os.getenv("EVALIA_LLM_MAX_RATE_WAIT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("EVALIA_LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("EVALIA_LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("EVALIA_LLM_BACKOFF_MAX", "30"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("EVALIA_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("EVALIA_BREAKER_COOLDOWN_SECONDS", "30"))
+# Completion backend (core.replay): "live", "record" (live + write EVALIA_LLM_CORPUS) or
+# "replay" (answer from the corpus offline). EVALIA_LLM_REPLAY_LATENCY scales the recorded
+# latencies on replay; 0 serves responses instantly.
+LLM_MODE = os.getenv("EVALIA_LLM_MODE", "live").lower()
+LLM_CORPUS = os.getenv("EVALIA_LLM_CORPUS", "evalia_llm_corpus.db")
+LLM_REPLAY_LATENCY = float(os.getenv("EVALIA_LLM_REPLAY_LATENCY", "0"))
 
 def initialize_memory():
-    if not os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, 'w') as f:
-            json.dump([], f)
-        logger.info("Initialized memory file: %s", MEMORY_FILE)
+    from core.memory_store import get_memory_store
+    store = get_memory_store()
+    store.initialize()
+    if os.path.exists(MEMORY_FILE):
+        store.migrate_json(MEMORY_FILE)
+    logger.info("Initialized memory store: %s", MEMORY_DB)
@@ -0,0 +1,199 @@
+"""Headless bulk evaluation over JSONL.
+
+    python -m core.batch claims.jsonl results.jsonl --concurrency 8 [--brutal] [--save-to-memory]
+
+Each input line is a JSON object with at least "claim" (optionally "id", "url",
+"brutality_mode"), or a bare JSON string. Results are appended to the output file as
+they complete; the output file doubles as the checkpoint, so re-running the same
+command skips every item already scored successfully.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from core.logging_config import configure_evalia_logger, correlation_scope
+from core.api_config import initialize_memory
+from core.analysis import score_claim, save_to_memory
+from core.routing import cascade_stats
+from core.fetchers import fetch_url_text
+from core.pipeline import budget_text_blob
+
+logger = configure_evalia_logger()
+
+
+def iter_claims(input_path):
+    """Yield (item_id, item) from a JSONL file, one line at a time."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping malformed JSONL line %d in %s", line_no, input_path)
+                continue
+            if isinstance(item, str):
+                item = {"claim": item}
+            if not isinstance(item, dict) or not (item.get("claim") or item.get("url")):
+                logger.warning("Skipping line %d in %s: no claim", line_no, input_path)
+                continue
+            yield str(item.get("id", line_no)), item
+
+
+def load_checkpoint(output_path):
+    """Ids already scored successfully in a previous (possibly interrupted) run."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a killed run
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)  # nearest-rank
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _score_item(item_id, item, brutality_mode):
+    """Score one item; any exception becomes a "failed" record so the rest of the run goes on."""
+    started = time.monotonic()
+    brutal = bool(item.get("brutality_mode", brutality_mode))
+    record = {
+        "id": item_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "claim": item.get("claim", ""),
+        "url": item.get("url"),
+        "brutality_mode": brutal,
+    }
+    try:
+        with correlation_scope(f"batch-{item_id}"):
+            url_text = fetch_url_text(item["url"]) if item.get("url") else None
+            text_blob, token_budget = budget_text_blob(item.get("claim", ""), url_text)
+            result = score_claim(text_blob, brutal)
+    except Exception as e:
+        logger.error("Batch item %s failed", item_id, exc_info=True)
+        return {**record, "status": "failed", "error": f"{type(e).__name__}: {e}",
+                "latency_s": round(time.monotonic() - started, 3), "token_budget": None, "analysis": None}
+    return {
+        **record,
+        "status": "failed" if "error" in result else "ok",
+        "latency_s": round(time.monotonic() - started, 3),
+        "token_budget": token_budget,
+        "analysis": result,
+    }
+
+
+def run_batch(input_path, output_path, concurrency=4, brutality_mode=False, save_memory=False, on_result=None):
+    """Score every claim in input_path, appending results to output_path.
+
+    At most `concurrency` claims are in flight; input is read lazily, so memory use is
+    bounded by the concurrency, not the backlog size. Returns a summary dict.
+    """
+    done = load_checkpoint(output_path)
+    if save_memory:
+        initialize_memory()
+    latencies, failures, skipped, scored = [], 0, 0, 0
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="evalia-batch")
+    in_flight = set()
+
+    def drain(out, block):
+        nonlocal failures, scored
+        if block:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        else:
+            finished = {f for f in in_flight if f.done()}
+        for fut in finished:
+            in_flight.discard(fut)
+            record = fut.result()
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            scored += 1
+            latencies.append(record["latency_s"])
+            if record["status"] != "ok":
+                failures += 1
+            elif save_memory:
+                try:
+                    save_to_memory({
+                        "timestamp": record["timestamp"],
+                        "claim": record["claim"],
+                        "url": record["url"],
+                        "image_analysis": None,
+                        "scores": record["analysis"].get("scores", {}),
+                        "analysis": record["analysis"],
+                        "brutality_mode": record["brutality_mode"],
+                    })
+                except Exception:
+                    logger.error("Failed to save batch item %s to memory", record["id"], exc_info=True)
+            if on_result:
+                on_result(record)
+
+    interrupted = False
+    with open(output_path, "a", encoding="utf-8") as out:
+        try:
+            for item_id, item in iter_claims(input_path):
+                if item_id in done:
+                    skipped += 1
+                    continue
+                while len(in_flight) >= concurrency:
+                    drain(out, block=True)
+                in_flight.add(executor.submit(_score_item, item_id, item, brutality_mode))
+                drain(out, block=False)
+            while in_flight:
+                drain(out, block=True)
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.warning("Batch interrupted; %d items in flight will be rescored on resume", len(in_flight))
+        finally:
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    summary = {
+        "scored": scored,
+        "failed": failures,
+        "skipped_from_checkpoint": skipped,
+        "elapsed_s": round(elapsed, 2),
+        "claims_per_min": round(scored / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "interrupted": interrupted,
+        "model_routing": cascade_stats.snapshot(),
+    }
+    logger.info("Batch finished: %s", summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a JSONL file of claims with Evalia.")
+    parser.add_argument("input", help="JSONL file of claims")
+    parser.add_argument("output", help="JSONL file results are appended to (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4, help="max claims scored at once")
+    parser.add_argument("--brutal", action="store_true", help="default to Brutality Mode")
+    parser.add_argument("--save-to-memory", action="store_true", help="also record results in the memory store")
+    args = parser.parse_args(argv)
+
+    def progress(record):
+        print(f"[{record['status']}] {record['id']} ({record['latency_s']}s)", flush=True)
+
+    summary = run_batch(args.input, args.output, concurrency=max(1, args.concurrency),
+                        brutality_mode=args.brutal, save_memory=args.save_to_memory, on_result=progress)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["interrupted"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+"""Two-tier result cache: bounded in-process LRU in front of a shared SQLite file."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from core.logging_config import configure_evalia_logger
+
+logger = configure_evalia_logger()
+
+
+def make_cache_key(*parts):
+    """Content-addressed key: sha256 over the parts, separated so they can't run together."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """LRU (per process) + SQLite (shared by every session and replica on the host/volume).
+
+    Values are JSON-serialisable dicts; they are stored serialised so callers always
+    get a fresh copy they are free to mutate.
+    """
+
+    def __init__(self, db_path, table="result_cache", max_memory_entries=256,
+                 max_disk_bytes=64 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.table = table
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._disk_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._disk_ready:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table}(last_access)")
+            conn.commit()
+            self._disk_ready = True
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key, created_at, payload):
+        with self._lock:
+            self._lru[key] = (created_at, payload)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_memory_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is not None:
+                if now - hit[0] <= self.ttl_seconds:
+                    self._lru.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return json.loads(hit[1])
+                del self._lru[key]
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] > self.ttl_seconds:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                elif row:
+                    conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logger.warning("Cache read failed for %s", self.db_path, exc_info=True)
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("disk_hits")
+        self._remember(key, row[1], row[0])
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        now = time.time()
+        self._remember(key, now, payload)
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+            self._count("writes")
+        except sqlite3.Error:
+            logger.warning("Cache write failed for %s", self.db_path, exc_info=True)
+
+    def _evict(self, conn, now):
+        expired = conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        evicted = 0
+        if total > self.max_disk_bytes:
+            for key, size in conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_disk_bytes:
+                    break
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        if expired or evicted:
+            with self._lock:
+                self._stats["evictions"] += expired + evicted
+            logger.debug("Cache %s evicted %d expired and %d oversize entries", self.table, expired, evicted)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        conn = self._connect()
+        try:
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
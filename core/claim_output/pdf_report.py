@@ -1,10 +1,22 @@
 """PDF report generation."""
-from fpdf import FPDF
+import argparse
+import hashlib
+import io
+import json
+import os
 import re
+import threading
 import unicodedata
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from core.logging_config import configure_evalia_logger
+from core.tracing import span
 
 logger = configure_evalia_logger()
+PDF_CACHE_SIZE = 64
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
 
 def sanitize_for_pdf(text: str) -> str:
     if not text:
@@ -51,72 +63,177 @@ def _pdf_scores_one_col(pdf, items):
         pdf.cell(0, 6, txt=f"{k}: {v}/10", ln=True)
     pdf.ln(2)
 
+def build_pdf_bytes(entry):
+    """Lay out the report for one analysis entry and return the PDF bytes."""
+    from fpdf import FPDF  # deferred so importing this module (e.g. for report_filename) stays cheap
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=12)
+    pdf.set_margins(10, 10, 10)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, txt="Evalia - Claim Analysis Report", ln=True, align='C')
+    _pdf_divider(pdf)
+    _pdf_h2(pdf, "Meta")
+    _pdf_kv(pdf, "Timestamp", sanitize_for_pdf(entry.get("timestamp", "")))
+    claim_clean = sanitize_for_pdf(entry.get("claim", ""))
+    if claim_clean:
+        _pdf_kv(pdf, "Claim", claim_clean)
+    url = entry.get("url")
+    if url:
+        _pdf_kv(pdf, "URL", sanitize_for_pdf(url))
+    img = entry.get("image_analysis") or {}
+    if any(img.values()):
+        _pdf_h2(pdf, "Image Summary")
+        parts = [
+            f"Description: {sanitize_for_pdf(img.get('description', ''))}" if img.get("description") else None,
+            f"Assessment: {sanitize_for_pdf(img.get('assessment', ''))}" if img.get("assessment") else None,
+            f"Extracted Text (snippet): {sanitize_for_pdf(img.get('extracted_text', '')[:400].rstrip() + '...' if len(img.get('extracted_text', '')) > 400 else img.get('extracted_text', ''))}" if img.get("extracted_text") else None
+        ]
+        parts = [p for p in parts if p]
+        if parts:
+            _pdf_p(pdf, "\n".join(parts))
+            _pdf_divider(pdf)
+    scores = entry.get("scores") or {}
+    if scores:
+        _pdf_h2(pdf, "Scores")
+        items = [(k.replace("_", " ").title(), v) for k, v in scores.items()]
+        _pdf_scores_one_col(pdf, items)
+    analysis = entry.get("analysis", {})
+    if analysis:
+        _pdf_divider(pdf)
+        _pdf_h1(pdf, "Analysis")
+        if analysis.get("error"):
+            _pdf_p(pdf, sanitize_for_pdf(analysis.get("error", "Analysis failed")))
+        else:
+            _pdf_kv(pdf, "Verdict", sanitize_for_pdf(analysis.get("verdict", "")))
+            _pdf_kv(pdf, "Claim Summary", sanitize_for_pdf(analysis.get("claim_summary", "")))
+            for category, reasoning in analysis.get("reasoning", {}).items():
+                _pdf_h2(pdf, category.replace("_", " ").title())
+                _pdf_p(pdf, sanitize_for_pdf(reasoning))
+            _pdf_kv(pdf, "Grounding Meter", sanitize_for_pdf(analysis.get("grounding_meter", "")))
+            _pdf_kv(pdf, "Emotion Meter", sanitize_for_pdf(analysis.get("emotion_meter", "")))
+            _pdf_kv(pdf, "AI Origin", sanitize_for_pdf(analysis.get("ai_origin", "")))
+            _pdf_kv(pdf, "Detected Style", sanitize_for_pdf(analysis.get("detected_style", "")))
+            _pdf_h2(pdf, "Relevant Sources")
+            for source in analysis.get("relevant_sources", []):
+                _pdf_p(pdf, f"{sanitize_for_pdf(source.get('annotation', ''))} - {sanitize_for_pdf(source.get('url', ''))}")
+            _pdf_h2(pdf, "Suggested Research")
+            for point in analysis.get("suggested_research", []):
+                _pdf_p(pdf, f"- {sanitize_for_pdf(point)}")
+            _pdf_kv(pdf, "Final Commentary", sanitize_for_pdf(analysis.get("final_commentary", "")))
+            _pdf_kv(pdf, "Confidence Level", str(analysis.get("confidence_level", 0)))
+            _pdf_kv(pdf, "Truth Drift Score", str(analysis.get("truth_drift_score", 0)))
+            _pdf_kv(pdf, "Claim Length", str(analysis.get("claim_length", 0)))
+            _pdf_kv(pdf, "Temporal Reference", sanitize_for_pdf(analysis.get("temporal_reference", "")))
+
+    # fpdf 1.7 returns the document as a latin-1 str
+    return pdf.output(dest="S").encode("latin1")
+
+def entry_digest(entry):
+    return hashlib.sha256(json.dumps(entry, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def report_filename(entry):
+    return f"evalia_report_{entry.get('timestamp', '').replace(':', '_')}.pdf"
+
 def generate_pdf_report(entry):
+    """PDF bytes for an analysis entry, memoized by a hash of its contents; None on failure."""
     try:
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=12)
-        pdf.set_margins(10, 10, 10)
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, txt="Evalia - Claim Analysis Report", ln=True, align='C')
-        _pdf_divider(pdf)
-        _pdf_h2(pdf, "Meta")
-        _pdf_kv(pdf, "Timestamp", sanitize_for_pdf(entry.get("timestamp", "")))
-        claim_clean = sanitize_for_pdf(entry.get("claim", ""))
-        if claim_clean:
-            _pdf_kv(pdf, "Claim", claim_clean)
-        url = entry.get("url")
-        if url:
-            _pdf_kv(pdf, "URL", sanitize_for_pdf(url))
-        img = entry.get("image_analysis") or {}
-        if any(img.values()):
-            _pdf_h2(pdf, "Image Summary")
-            parts = [
-                f"Description: {sanitize_for_pdf(img.get('description', ''))}" if img.get("description") else None,
-                f"Assessment: {sanitize_for_pdf(img.get('assessment', ''))}" if img.get("assessment") else None,
-                f"Extracted Text (snippet): {sanitize_for_pdf(img.get('extracted_text', '')[:400].rstrip() + '...' if len(img.get('extracted_text', '')) > 400 else img.get('extracted_text', ''))}" if img.get("extracted_text") else None
-            ]
-            parts = [p for p in parts if p]
-            if parts:
-                _pdf_p(pdf, "\n".join(parts))
-                _pdf_divider(pdf)
-        scores = entry.get("scores") or {}
-        if scores:
-            _pdf_h2(pdf, "Scores")
-            items = [(k.replace("_", " ").title(), v) for k, v in scores.items()]
-            _pdf_scores_one_col(pdf, items)
-        analysis = entry.get("analysis", {})
-        if analysis:
-            _pdf_divider(pdf)
-            _pdf_h1(pdf, "Analysis")
-            if analysis.get("error"):
-                _pdf_p(pdf, sanitize_for_pdf(analysis.get("error", "Analysis failed")))
-            else:
-                _pdf_kv(pdf, "Verdict", sanitize_for_pdf(analysis.get("verdict", "")))
-                _pdf_kv(pdf, "Claim Summary", sanitize_for_pdf(analysis.get("claim_summary", "")))
-                for category, reasoning in analysis.get("reasoning", {}).items():
-                    _pdf_h2(pdf, category.replace("_", " ").title())
-                    _pdf_p(pdf, sanitize_for_pdf(reasoning))
-                _pdf_kv(pdf, "Grounding Meter", sanitize_for_pdf(analysis.get("grounding_meter", "")))
-                _pdf_kv(pdf, "Emotion Meter", sanitize_for_pdf(analysis.get("emotion_meter", "")))
-                _pdf_kv(pdf, "AI Origin", sanitize_for_pdf(analysis.get("ai_origin", "")))
-                _pdf_kv(pdf, "Detected Style", sanitize_for_pdf(analysis.get("detected_style", "")))
-                _pdf_h2(pdf, "Relevant Sources")
-                for source in analysis.get("relevant_sources", []):
-                    _pdf_p(pdf, f"{sanitize_for_pdf(source.get('annotation', ''))} - {sanitize_for_pdf(source.get('url', ''))}")
-                _pdf_h2(pdf, "Suggested Research")
-                for point in analysis.get("suggested_research", []):
-                    _pdf_p(pdf, f"- {sanitize_for_pdf(point)}")
-                _pdf_kv(pdf, "Final Commentary", sanitize_for_pdf(analysis.get("final_commentary", "")))
-                _pdf_kv(pdf, "Confidence Level", str(analysis.get("confidence_level", 0)))
-                _pdf_kv(pdf, "Truth Drift Score", str(analysis.get("truth_drift_score", 0)))
-                _pdf_kv(pdf, "Claim Length", str(analysis.get("claim_length", 0)))
-                _pdf_kv(pdf, "Temporal Reference", sanitize_for_pdf(analysis.get("temporal_reference", "")))
-
-        pdf_file = f"evalia_report_{entry.get('timestamp', '').replace(':', '_')}.pdf"
-        pdf.output(pdf_file)
-        logger.info("Generated PDF report: %s", pdf_file)
-        return pdf_file
+        key = entry_digest(entry)
+        with _pdf_cache_lock:
+            if key in _pdf_cache:
+                _pdf_cache.move_to_end(key)
+                return _pdf_cache[key]
+        with span("pdf_build"):
+            data = build_pdf_bytes(entry)
+        with _pdf_cache_lock:
+            _pdf_cache[key] = data
+            while len(_pdf_cache) > PDF_CACHE_SIZE:
+                _pdf_cache.popitem(last=False)
+        logger.info("Generated PDF report: %s (%d bytes)", report_filename(entry), len(data))
+        return data
     except Exception:
         logger.error("Failed to generate PDF report", exc_info=True)
         return None
+
+def _bulk_job(entry):
+    # Runs in a worker process; fpdf layout is pure-Python and CPU-bound.
+    try:
+        return report_filename(entry), build_pdf_bytes(entry)
+    except Exception:
+        logger.error("Failed to generate PDF report in bulk export", exc_info=True)
+        return report_filename(entry), None
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable sink so ZipFile writes data descriptors and we can hand out bytes as they land."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_pdf_zip(entries, workers=None):
+    """Yield a ZIP of PDF reports chunk by chunk while the reports are still being built.
+
+    entries is any iterable (e.g. MemoryStore.iter_entries(since=..., until=...)); layout is
+    spread over a process pool with a bounded window, so neither the entries nor the
+    finished PDFs are all held in memory at once.
+    """
+    workers = workers or os.cpu_count() or 1
+    sink = _ChunkSink()
+    names = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        window = deque()
+        limit = 2 * workers
+        entries = iter(entries)
+        exhausted = False
+        while window or not exhausted:
+            while not exhausted and len(window) < limit:
+                try:
+                    window.append(pool.submit(_bulk_job, next(entries)))
+                except StopIteration:
+                    exhausted = True
+            if not window:
+                break
+            name, data = window.popleft().result()
+            if data is None:
+                continue
+            base, n = name, 1
+            while name in names:
+                n += 1
+                name = base.replace(".pdf", f"_{n}.pdf")
+            names.add(name)
+            zf.writestr(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+def main(argv=None):
+    from core.memory_store import get_memory_store
+    parser = argparse.ArgumentParser(description="Export stored evaluations as a ZIP of PDF reports.")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("--since", help="ISO timestamp (inclusive)")
+    parser.add_argument("--until", help="ISO timestamp (exclusive)")
+    parser.add_argument("--workers", type=int, default=None, help="PDF worker processes")
+    args = parser.parse_args(argv)
+    entries = get_memory_store().iter_entries(since=args.since, until=args.until)
+    with open(args.output, "wb") as f:
+        for chunk in iter_pdf_zip(entries, workers=args.workers):
+            f.write(chunk)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Shared OpenAI client and the background event loop that sync callers run on."""
+import asyncio
+import contextvars
+import threading
+import weakref
+from core.logging_config import configure_evalia_logger
+from core.api_config import (OPENAI_API_KEY, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                             OPENAI_KEEPALIVE_EXPIRY, OPENAI_TIMEOUT)
+
+logger = configure_evalia_logger()
+
+# httpx connection pools belong to the loop that opened them, so keep one client per loop.
+# Sync callers all share the single background loop below, i.e. a single client.
+_clients = weakref.WeakKeyDictionary()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _build_async_client():
+    # Imported on first use: openai alone is a large share of cold-start import time.
+    import httpx
+    import openai
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=10.0),
+    )
+    # Retries (with shared rate limiting and a circuit breaker) are handled in core.llm.
+    return openai.AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+
+def get_async_client():
+    """AsyncOpenAI client for the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _build_async_client()
+        _clients[loop] = client
+        logger.info("Created pooled AsyncOpenAI client (max_connections=%d)", OPENAI_MAX_CONNECTIONS)
+    return client
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="evalia-async", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the shared background loop and block for its result.
+
+    Safe to call from any thread (Streamlit script threads, batch workers), including
+    threads that already have their own running loop.
+    """
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), _get_loop()).result(timeout)
+
+
+async def _in_context(coro, ctx):
+    # The loop thread has its own context; carry the caller's (correlation id etc.) across.
+    for var, value in ctx.items():
+        var.set(value)
+    return await coro
+
+
+def iter_sync(agen):
+    """Drive an async generator on the shared background loop from a sync caller."""
+    loop = _get_loop()
+    ctx = contextvars.copy_context()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(_in_context(agen.__anext__(), ctx), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
@@ -1,52 +1,277 @@
 """External data fetchers (HTTP, files, etc.)."""
-import requests
+import asyncio
 import base64
-import io
+import ipaddress
+import json
+import socket
+import time
+import weakref
+from urllib.parse import urljoin, urlsplit
 from core.logging_config import configure_evalia_logger
-from core.api_config import OPENAI_API_KEY
-import openai
+from core.api_config import (URL_FETCH_MAX_BYTES, URL_TEXT_MAX_CHARS, URL_FETCH_TIMEOUT, URL_MAX_REDIRECTS,
+                             URL_ALLOW_PRIVATE, IMAGE_CACHE_FILE,
+                             IMAGE_CACHE_TTL_SECONDS, IMAGE_CACHE_MAX_DISTANCE, IMAGE_CACHE_DISABLED, IMAGE_MODELS)
+from core.cache import make_cache_key
+from core.clients import get_async_client, run_sync
+from core.html_text import extract_main_text
+from core.image_prep import ImageAnalysisCache, PreparedImage, prepare_image, sniff_mime
+from core.json_repair import repair_json
+from core.tracing import span, metrics
+from core.routing import cascade_stats, usage_tokens
+from core.llm import create_completion
+from core.resources import resource
 
 logger = configure_evalia_logger()
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
-def fetch_url_text(url):
+TEXT_CONTENT_TYPES = ("text/", "application/xhtml+xml", "application/xml", "application/json", "application/ld+json")
+HTTP_HEADERS = {
+    "User-Agent": "Evalia/1.0 (+claim evaluation)",
+    "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.5",
+}
+
+@resource("http_session", close=lambda session: session.close())
+def get_http_session():
+    """Process-wide requests.Session so repeat fetches reuse pooled keep-alive connections."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+_async_http_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    """httpx.AsyncClient for the running loop, for fetches that must be cancellable."""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        import httpx
+        client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(retries=1),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            headers=HTTP_HEADERS,
+            follow_redirects=False,  # followed by hand, so every hop is checked
+        )
+        _async_http_clients[loop] = client
+    return client
+
+class BlockedURL(ValueError):
+    """A URL Evalia won't fetch: not http(s), or its host is private, loopback or link-local."""
+
+
+def check_public_url(url):
+    """Raise BlockedURL unless url is http(s) and every address its host resolves to is public.
+
+    The connection resolves the host again, so this doesn't stop DNS rebinding; it keeps
+    callers from pointing the fetcher at internal services by name or address.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise BlockedURL(f"Only http(s) URLs can be fetched: {url}")
+    if URL_ALLOW_PRIVATE:
+        return
     try:
-        r = requests.get(url, timeout=10)
-        return r.text[:3000]
+        infos = socket.getaddrinfo(parts.hostname, parts.port or None, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError) as e:
+        raise BlockedURL(f"Cannot resolve {parts.hostname}: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise BlockedURL(f"Refusing to fetch {parts.hostname}: it resolves to non-public address {address}")
+
+
+def _open_url(url):
+    """GET url as a stream, following redirects by hand and checking every hop."""
+    session = get_http_session()
+    for _ in range(URL_MAX_REDIRECTS + 1):
+        check_public_url(url)
+        r = session.get(url, timeout=URL_FETCH_TIMEOUT, stream=True, allow_redirects=False)
+        if not r.is_redirect:
+            return r
+        r.close()
+        url = urljoin(url, r.headers["Location"])
+    raise BlockedURL(f"Too many redirects (more than {URL_MAX_REDIRECTS})")
+
+
+async def _open_url_async(url):
+    """_open_url on the event loop; the caller closes the returned response."""
+    client = get_async_http_client()
+    for _ in range(URL_MAX_REDIRECTS + 1):
+        await asyncio.to_thread(check_public_url, url)
+        r = await client.send(client.build_request("GET", url, timeout=URL_FETCH_TIMEOUT), stream=True)
+        if not r.is_redirect:
+            return r
+        await r.aclose()
+        url = urljoin(str(r.url), r.headers["Location"])
+    raise BlockedURL(f"Too many redirects (more than {URL_MAX_REDIRECTS})")
+
+def _unsupported_content_type(url, content_type):
+    if content_type and not content_type.startswith(TEXT_CONTENT_TYPES):
+        logger.info("Skipping non-text URL %s (%s)", url, content_type)
+        return f"Error fetching URL: unsupported content type {content_type}"
+    return None
+
+def _page_text(content_type, body, encoding, max_bytes, max_chars):
+    text = bytes(body[:max_bytes]).decode(encoding or "utf-8", errors="replace")
+    if content_type in ("text/html", "application/xhtml+xml") or (not content_type and "<html" in text[:1024].lower()):
+        with span("html_extract"):
+            text = extract_main_text(text)
+    return text[:max_chars]
+
+def fetch_url_text(url, max_bytes=URL_FETCH_MAX_BYTES, max_chars=URL_TEXT_MAX_CHARS):
+    """Readable text of a page, truncated to max_chars after HTML extraction.
+
+    The body is streamed and abandoned after max_bytes, and non-text responses are
+    rejected from their headers without downloading them. Private and internal hosts are
+    refused, including as redirect targets (see check_public_url).
+    """
+    try:
+        with span("url_fetch"), _open_url(url) as r:
+            content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            unsupported = _unsupported_content_type(url, content_type)
+            if unsupported:
+                return unsupported
+            body = bytearray()
+            for chunk in r.iter_content(chunk_size=16384):
+                body.extend(chunk)
+                if len(body) >= max_bytes:
+                    logger.info("URL %s exceeded %d bytes, truncating", url, max_bytes)
+                    break
+            # requests assumes ISO-8859-1 for text/* without a charset; most of the web is UTF-8.
+            encoding = r.encoding if "charset" in r.headers.get("Content-Type", "").lower() else "utf-8"
+        return _page_text(content_type, body, encoding, max_bytes, max_chars)
     except Exception as e:
         logger.error("URL fetch error for %s", url, exc_info=True)
         return f"Error fetching URL: {str(e)}"
 
-def analyze_image(img_file):
+async def fetch_url_text_async(url, max_bytes=URL_FETCH_MAX_BYTES, max_chars=URL_TEXT_MAX_CHARS):
+    """fetch_url_text on the event loop; cancelling it closes the connection mid-download."""
     try:
-        image_bytes = img_file.read()
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
-        prompt = """
+        with span("url_fetch"):
+            r = await _open_url_async(url)
+            try:
+                content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                unsupported = _unsupported_content_type(url, content_type)
+                if unsupported:
+                    return unsupported
+                body = bytearray()
+                async for chunk in r.aiter_bytes(16384):
+                    body.extend(chunk)
+                    if len(body) >= max_bytes:
+                        logger.info("URL %s exceeded %d bytes, truncating", url, max_bytes)
+                        break
+                encoding = r.charset_encoding or "utf-8"
+            finally:
+                await r.aclose()
+        return await asyncio.to_thread(_page_text, content_type, body, encoding, max_bytes, max_chars)
+    except Exception as e:
+        logger.error("URL fetch error for %s", url, exc_info=True)
+        return f"Error fetching URL: {str(e)}"
+
+IMAGE_MODEL = IMAGE_MODELS[-1]
+IMAGE_FIELDS = ("extracted_text", "description", "assessment")
+IMAGE_PROMPT = """
         Analyze the provided image for misinformation detection:
         1) Extract all legible text verbatim.
         2) Describe content/style/visual elements.
         3) Assess meme/AI/manipulation likelihood and flag telltales.
         Return JSON: {"extracted_text": "...", "description": "...", "assessment": "..."}
         """
-        response = client.chat.completions.create(
-            model="gpt-4o",
+# Results depend on model and prompt as well as the pixels.
+IMAGE_CACHE_VARIANT = make_cache_key("+".join(IMAGE_MODELS), IMAGE_PROMPT)[:16]
+image_cache = ImageAnalysisCache(IMAGE_CACHE_FILE, max_distance=IMAGE_CACHE_MAX_DISTANCE,
+                                 ttl_seconds=IMAGE_CACHE_TTL_SECONDS)
+metrics.register_collector(lambda: [("image_cache", {"stat": k}, v) for k, v in image_cache.stats().items()])
+
+def analyze_image(img_file, bypass_cache=False):
+    try:
+        return run_sync(analyze_image_async(img_file, bypass_cache))
+    except Exception:
+        logger.error("Image analysis error", exc_info=True)
+        return {"extracted_text": "Error extracting text.", "description": "", "assessment": ""}
+
+async def analyze_image_async(img_file, bypass_cache=False):
+    try:
+        image_bytes = img_file.read()
+        try:
+            with span("image_prep"):
+                prepared = await asyncio.to_thread(prepare_image, image_bytes)
+        except Exception:
+            logger.warning("Image pre-processing failed, sending original bytes", exc_info=True)
+            prepared = PreparedImage(image_bytes, sniff_mime(image_bytes), None, None, None)
+        use_cache = prepared.dhash is not None and not (bypass_cache or IMAGE_CACHE_DISABLED)
+        if use_cache:
+            with span("image_cache_lookup"):
+                cached = await asyncio.to_thread(image_cache.get, prepared.dhash, IMAGE_CACHE_VARIANT)
+            if cached is not None:
+                # Routing describes this call, which made no model request.
+                return {**{k: cached.get(k, "") for k in IMAGE_FIELDS},
+                        "model_routing": {"model": None, "escalated": False, "escalation_reason": None,
+                                          "tiers": [], "cache_hit": True}}
+        base64_image = base64.b64encode(prepared.data).decode('utf-8')
+        routing = []
+        for i, model in enumerate(IMAGE_MODELS):
+            final = i == len(IMAGE_MODELS) - 1
+            started = time.perf_counter()
+            try:
+                result, prompt_tokens, completion_tokens = await _vision_call(model, prepared, base64_image)
+                reason = None if final or _valid_image_result(result) else "validation_failed"
+            except Exception as e:
+                if final:
+                    raise
+                logger.warning("Vision model %s failed, escalating: %s", model, str(e))
+                result, prompt_tokens, completion_tokens, reason = None, 0, 0, "request_failed"
+            latency = time.perf_counter() - started
+            cascade_stats.record_call("image", model, latency, prompt_tokens, completion_tokens, reason,
+                                      reference_model=IMAGE_MODEL)
+            routing.append({"model": model, "latency_ms": round(latency * 1000, 1), "escalation_reason": reason})
+            if reason is None:
+                break
+        result["model_routing"] = {"model": model, "escalated": len(routing) > 1,
+                                   "escalation_reason": routing[0]["escalation_reason"], "tiers": routing}
+        if use_cache and _valid_image_result(result):
+            await asyncio.to_thread(image_cache.set, prepared.dhash, {k: result[k] for k in IMAGE_FIELDS},
+                                    IMAGE_CACHE_VARIANT)
+        return result
+    except Exception:
+        logger.error("Image analysis error", exc_info=True)
+        return {"extracted_text": "Error extracting text.", "description": "", "assessment": ""}
+
+def _valid_image_result(result):
+    return isinstance(result, dict) and all(isinstance(result.get(k), str) for k in IMAGE_FIELDS) \
+        and not result["description"].startswith("Error")
+
+async def _vision_call(model, prepared, base64_image):
+    """Returns (parsed result or None, prompt_tokens, completion_tokens)."""
+    with span("vision_call", model=model, bytes=len(prepared.data)):
+        response = await create_completion(
+            get_async_client(),
+            model=model,
             messages=[
                 {"role": "system", "content": "You are a precise image analysis assistant."},
                 {"role": "user", "content": [
-                    {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                    {"type": "text", "text": IMAGE_PROMPT},
+                    {"type": "image_url", "image_url": {"url": f"data:{prepared.mime};base64,{base64_image}"}}
                 ]}
-            ]
+            ],
+            response_format={"type": "json_object"},
         )
-        raw_content = response.choices[0].message.content
+    raw_content = response.choices[0].message.content or ""
+    try:
         try:
-            return json.loads(raw_content)
+            result = json.loads(raw_content)
         except json.JSONDecodeError:
-            return {
-                "extracted_text": raw_content,
-                "description": "Error parsing description.",
-                "assessment": "Error in assessment."
-            }
-    except Exception:
-        logger.error("Image analysis error", exc_info=True)
-        return {"extracted_text": "Error extracting text.", "description": "", "assessment": ""}
+            result = repair_json(raw_content)
+    except ValueError:
+        result = {
+            "extracted_text": raw_content,
+            "description": "Error parsing description.",
+            "assessment": "Error in assessment."
+        }
+    return result, *usage_tokens(response)
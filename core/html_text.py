@@ -0,0 +1,82 @@
+"""Single-pass HTML to readable text, preferring <article>/<main> content."""
+import re
+from html.parser import HTMLParser
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "nav", "header",
+             "footer", "aside", "form", "button", "iframe", "select"}
+MAIN_TAGS = {"article", "main"}
+BLOCK_TAGS = {"p", "div", "section", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+              "blockquote", "pre", "tr", "table", "article", "main", "figcaption", "dd", "dt"}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "base", "col", "embed"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.title = []
+        self.in_title = False
+        self.all_chunks = []
+        self.main_chunks = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self.in_title = True
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._emit("\n")
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in MAIN_TAGS:
+            self.main_depth += 1
+        if tag in BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.in_title = False
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in MAIN_TAGS and self.main_depth:
+            self.main_depth -= 1
+        if tag in BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title.append(data)
+        self._emit(data)
+
+    def _emit(self, text):
+        if self.skip_depth:
+            return
+        self.all_chunks.append(text)
+        if self.main_depth:
+            self.main_chunks.append(text)
+
+
+def _normalise(chunks):
+    text = "".join(chunks)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return re.sub(r"\n{2,}", "\n", "\n".join(line for line in lines if line)).strip()
+
+
+def extract_main_text(html):
+    """Visible text of an HTML document, without scripts, styles and page chrome.
+
+    Uses the text inside <article>/<main> when the page has any, otherwise all visible
+    body text. The title, if present, is kept as the first line.
+    """
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass  # keep whatever was extracted before the markup went bad
+    body = _normalise(parser.main_chunks) or _normalise(parser.all_chunks)
+    title = " ".join("".join(parser.title).split())
+    if title and not body.startswith(title):
+        return f"{title}\n{body}" if body else title
+    return body
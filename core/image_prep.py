@@ -0,0 +1,173 @@
+"""Image pre-processing for the vision call, plus a perceptual-hash keyed result cache."""
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from core.logging_config import configure_evalia_logger
+
+logger = configure_evalia_logger()
+
+# gpt-4o "high" detail fits the image in 2048x2048, then scales the short side to 768.
+VISION_MAX_LONG_SIDE = 2048
+VISION_MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+
+PreparedImage = namedtuple("PreparedImage", "data mime dhash width height")
+
+_MIME_BY_FORMAT = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp", "GIF": "image/gif"}
+
+
+def sniff_mime(data):
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:3] == b"GIF":
+        return "image/gif"
+    return "image/jpeg"
+
+
+def dhash(img, size=8):
+    """64-bit difference hash: robust to re-encoding, resizing and small edits."""
+    from PIL import Image
+    gray = img.convert("L").resize((size + 1, size), Image.LANCZOS)
+    px = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def prepare_image(image_bytes):
+    """Downscale to what the vision model actually sees and re-encode compactly.
+
+    Returns PreparedImage(data, mime, dhash, width, height). The original bytes are kept
+    when they are already within limits and smaller than the re-encode.
+    """
+    from PIL import Image, ImageOps  # deferred: Pillow is only needed once an image arrives
+    img = Image.open(io.BytesIO(image_bytes))
+    original_format = img.format
+    img = ImageOps.exif_transpose(img)
+    img.load()
+    hash_value = dhash(img)
+    w, h = img.size
+    scale = min(1.0, VISION_MAX_LONG_SIDE / max(w, h), VISION_MAX_SHORT_SIDE / min(w, h))
+    if scale < 1.0:
+        img = img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img.save(buf, format="PNG", optimize=True)
+        mime = "image/png"
+    else:
+        rgb = img.convert("RGB")
+        rgb.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime = "image/jpeg"
+        # Flat-colour screenshots and memes usually compress better (and stay sharper) as PNG.
+        if rgb.getcolors(maxcolors=1024) is not None:
+            png = io.BytesIO()
+            rgb.save(png, format="PNG", optimize=True)
+            if png.tell() < buf.tell():
+                buf, mime = png, "image/png"
+    data = buf.getvalue()
+    if scale == 1.0 and original_format in _MIME_BY_FORMAT and len(image_bytes) <= len(data):
+        data, mime = image_bytes, _MIME_BY_FORMAT[original_format]
+    logger.info("Prepared image %dx%d -> %dx%d, %d -> %d bytes (%s)",
+                w, h, img.size[0], img.size[1], len(image_bytes), len(data), mime)
+    return PreparedImage(data, mime, hash_value, img.size[0], img.size[1])
+
+
+def _bands(hash_value):
+    return [(hash_value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+
+
+class ImageAnalysisCache:
+    """SQLite cache of vision results keyed by dHash.
+
+    Lookups accept any stored hash within max_distance bits. The hash is split into four
+    16-bit bands, each indexed, so by pigeonhole any match within 3 bits shares a band.
+    """
+
+    def __init__(self, db_path, max_distance=3, ttl_seconds=30 * 24 * 3600):
+        self.db_path = db_path
+        self.max_distance = min(max_distance, 3)
+        self.ttl_seconds = ttl_seconds
+        self._ready = False
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_cache ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, variant TEXT NOT NULL, dhash TEXT NOT NULL, "
+                "b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            for band in range(4):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_image_cache_b{band} ON image_cache(b{band})")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, hash_value, variant=""):
+        bands = _bands(hash_value)
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT dhash, value FROM image_cache WHERE variant = ? AND created_at >= ? "
+                    "AND (b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?) ORDER BY id DESC LIMIT 200",
+                    (variant, cutoff, *bands),
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logger.warning("Image cache read failed", exc_info=True)
+            rows = []
+        best = None
+        for stored_hash, value in rows:
+            distance = bin(int(stored_hash, 16) ^ hash_value).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, value)
+        if best is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        logger.info("Image cache hit (hamming distance %d)", best[0])
+        return json.loads(best[1])
+
+    def set(self, hash_value, value, variant=""):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO image_cache (variant, dhash, b0, b1, b2, b3, value, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (variant, f"{hash_value:016x}", *_bands(hash_value), json.dumps(value), time.time()),
+                )
+                conn.execute("DELETE FROM image_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+                conn.commit()
+            finally:
+                conn.close()
+            self._count("writes")
+        except sqlite3.Error:
+            logger.warning("Image cache write failed", exc_info=True)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,110 @@
+"""Import-time profile of the app's cold start, to catch startup regressions.
+
+    python -m core.import_profile                      # what evaliamainapp.py imports
+    python -m core.import_profile core.analysis --top 15
+    python -m core.import_profile --budget-ms 1500     # exit 1 when over budget (CI)
+
+Each run imports the modules in a fresh interpreter under `python -X importtime` and
+reports the slowest modules by their own import cost, totals per top-level package, and
+the cumulative cost of each requested module. Timings are noisy, so the best of
+--repeat runs is kept per module.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "evaliamainapp.py")
+
+
+def app_imports(script=APP_SCRIPT):
+    """Top-level modules the app script imports, read from its source."""
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(modules, repeat=3):
+    """{module: (self_us, cumulative_us)}, the best of `repeat` fresh-interpreter imports."""
+    best = {}
+    code = "import " + ", ".join(modules)
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{proc.stderr[-2000:]}")
+        for name, self_us, cumulative_us, _ in parse_importtime(proc.stderr):
+            if name not in best or self_us < best[name][0]:
+                best[name] = (self_us, cumulative_us)
+    return best
+
+
+def report(modules, timings, top=20):
+    packages = defaultdict(int)
+    for name, (self_us, _) in timings.items():
+        packages[name.split(".")[0]] += self_us
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "total_ms": round(sum(self_us for self_us, _ in timings.values()) / 1000, 1),
+        "modules": len(timings),
+        "requested": {m: round(timings[m][1] / 1000, 1) for m in modules if m in timings},
+        "packages": {p: round(us / 1000, 1) for p, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]},
+        "slowest": [{"module": name, "self_ms": round(s / 1000, 1), "cumulative_ms": round(c / 1000, 1)}
+                    for name, (s, c) in slowest],
+    }
+
+
+def format_report(result):
+    lines = [f"Import time: {result['total_ms']:.1f} ms across {result['modules']} modules", "",
+             "Requested modules (cumulative ms):"]
+    lines += [f"  {ms:10.1f}  {name}" for name, ms in result["requested"].items()]
+    lines += ["", "By top-level package (self ms):"]
+    lines += [f"  {ms:10.1f}  {name}" for name, ms in result["packages"].items()]
+    lines += ["", "Slowest modules (self ms / cumulative ms):"]
+    lines += [f"  {row['self_ms']:10.1f} {row['cumulative_ms']:10.1f}  {row['module']}" for row in result["slowest"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile Evalia's import-time cost per module.")
+    parser.add_argument("modules", nargs="*", help="modules to import (default: the app's imports)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--budget-ms", type=float, help="exit with status 1 when total import time exceeds this")
+    args = parser.parse_args(argv)
+    modules = args.modules or app_imports()
+    result = report(modules, measure(modules, args.repeat), args.top)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"\nOver budget: {result['total_ms']:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
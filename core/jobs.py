@@ -0,0 +1,308 @@
+"""Durable evaluation jobs: a SQLite (WAL) queue drained by a pool of worker processes.
+
+    python -m core.jobs --workers 4
+
+The app enqueues an evaluation and polls it by id, so a browser reload or dropped
+websocket doesn't lose (or re-pay for) work that is already running. Workers claim a
+job by taking a lease and renew it while they work; a job whose worker died is
+reclaimed once its lease expires, up to EVALIA_JOB_MAX_ATTEMPTS attempts.
+"""
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from core.logging_config import configure_evalia_logger
+from core.api_config import (initialize_memory, JOBS_DB, JOB_WORKERS, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS,
+                             JOB_POLL_SECONDS, JOB_RETENTION_SECONDS)
+from core.resources import resource
+
+logger = configure_evalia_logger()
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    image BLOB,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+"""
+
+
+class JobQueue:
+    def __init__(self, db_path=JOBS_DB, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        if not self._ready:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(JOBS_SCHEMA)
+                conn.commit()
+                self._ready = True
+        return conn
+
+    def enqueue(self, claim, url=None, image_bytes=None, brutality_mode=False):
+        job_id = uuid.uuid4().hex
+        payload = {"claim": claim, "url": url or None, "brutality_mode": bool(brutality_mode)}
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, status, payload, image, progress, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, QUEUED, json.dumps(payload), image_bytes, "⏳ Waiting for a worker...", time.time()),
+                )
+        finally:
+            conn.close()
+        logger.info("Enqueued job %s", job_id)
+        return job_id
+
+    def get(self, job_id, with_image=False):
+        """The job as a dict (payload fields, status, progress, result, error), or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, status, payload, result, error, progress, attempts, created_at, started_at, finished_at"
+                + (", image" if with_image else "") + " FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+            position = None
+            if row and row[1] == QUEUED:
+                position = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                                        (QUEUED, row[7])).fetchone()[0]
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = {
+            **json.loads(row[2]),
+            "id": row[0], "status": row[1],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4], "progress": row[5], "attempts": row[6],
+            "created_at": row[7], "started_at": row[8], "finished_at": row[9],
+            "queue_position": position,
+        }
+        if with_image:
+            job["image_bytes"] = row[10]
+        return job
+
+    def claim(self, worker_id):
+        """Lease the oldest runnable job to worker_id; returns (job_id, payload, image_bytes) or None.
+
+        Runnable: queued, or running under a lease that expired (its worker died).
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs that already used every attempt on dead workers are failed, not retried forever.
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "Worker stopped before finishing the job", now, RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, payload, image FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "started_at = ?, progress = ? WHERE id = ?",
+                    (RUNNING, worker_id, now + self.lease_seconds, now, "🔍 Gathering artifacts...", row[0]),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def _update_own(self, job_id, worker_id, assignments, params):
+        # Only the worker holding the lease may touch a running job.
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = ?",
+                                   (*params, job_id, worker_id, RUNNING))
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id, worker_id, progress=None):
+        """Renew the lease (and optionally the progress text); False if the job was taken away."""
+        if progress is None:
+            return self._update_own(job_id, worker_id, "lease_expires = ?", (time.time() + self.lease_seconds,))
+        return self._update_own(job_id, worker_id, "lease_expires = ?, progress = ?",
+                                (time.time() + self.lease_seconds, progress))
+
+    def complete(self, job_id, worker_id, result):
+        return self._update_own(job_id, worker_id, "status = ?, result = ?, progress = ?, finished_at = ?",
+                                (DONE, json.dumps(result, default=str), "✅ Analysis complete!", time.time()))
+
+    def fail(self, job_id, worker_id, error):
+        return self._update_own(job_id, worker_id, "status = ?, error = ?, finished_at = ?",
+                                (FAILED, error, time.time()))
+
+    def purge(self, older_than=JOB_RETENTION_SECONDS):
+        """Delete finished jobs older than the retention window; returns how many."""
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                   (*FINISHED, time.time() - older_than))
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        finally:
+            conn.close()
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+@resource("job_queue")
+def get_job_queue():
+    return JobQueue(JOBS_DB)
+
+
+ARTIFACT_PROGRESS = {"url_text": "🌐 URL content fetched", "image_analysis": "🖼️ Image analyzed"}
+
+
+def run_job(queue, worker_id, job_id, payload, image_bytes):
+    """Evaluate one claimed job, renewing its lease until it finishes."""
+    from core.pipeline import evaluate
+    stop = threading.Event()
+
+    def keep_leased():
+        while not stop.wait(queue.lease_seconds / 3):
+            if not queue.heartbeat(job_id, worker_id):
+                logger.warning("Lost the lease on job %s", job_id)
+                return
+
+    def on_artifact(name, value, finished, total):
+        queue.heartbeat(job_id, worker_id, f"{ARTIFACT_PROGRESS[name]} ({finished}/{total})")
+
+    def on_stage(stage):
+        if stage == "score":
+            queue.heartbeat(job_id, worker_id, "🧠 Processing through AI analysis...")
+
+    renewer = threading.Thread(target=keep_leased, name=f"evalia-lease-{job_id[:8]}", daemon=True)
+    renewer.start()
+    try:
+        run = evaluate(payload["claim"], payload.get("url"), image_bytes, payload.get("brutality_mode", False),
+                       run_id=job_id[:12], on_artifact=on_artifact, on_stage=on_stage)
+        queue.complete(job_id, worker_id, run)
+    except Exception as e:
+        logger.error("Job %s failed", job_id, exc_info=True)
+        queue.fail(job_id, worker_id, f"Evaluation failed: {e}")
+    finally:
+        stop.set()
+
+
+def worker_loop(db_path=JOBS_DB, poll_seconds=JOB_POLL_SECONDS, stop=None):
+    """Claim and run jobs until stop is set (or SIGTERM, when run as its own process)."""
+    queue = JobQueue(db_path)
+    worker_id = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the parent, which forwards SIGTERM
+    initialize_memory()
+    logger.info("Job worker %s started on %s", worker_id, db_path)
+    last_purge = 0.0
+    while not stop.is_set():
+        if time.monotonic() - last_purge > 3600:
+            last_purge = time.monotonic()
+            purged = queue.purge()
+            if purged:
+                logger.info("Purged %d finished jobs", purged)
+        try:
+            claimed = queue.claim(worker_id)
+        except sqlite3.Error:
+            logger.warning("Job claim failed", exc_info=True)
+            claimed = None
+        if claimed is None:
+            stop.wait(poll_seconds)
+            continue
+        run_job(queue, worker_id, *claimed)  # a SIGTERM lets the current job finish first
+    logger.info("Job worker %s stopped", worker_id)
+
+
+def start_workers(count=JOB_WORKERS, db_path=JOBS_DB):
+    """Start `count` worker processes (daemonic, so they exit with the parent)."""
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for i in range(count):
+        process = ctx.Process(target=worker_loop, args=(db_path,), name=f"evalia-job-worker-{i}", daemon=True)
+        process.start()
+        processes.append(process)
+    logger.info("Started %d job worker processes", count)
+    return processes
+
+
+def launch_worker_pool(count=JOB_WORKERS, db_path=JOBS_DB):
+    """Run `python -m core.jobs` as a child process and stop it (gracefully) when we exit.
+
+    A separate interpreter rather than multiprocessing from the caller: Streamlit swaps its
+    script in as __main__, which spawned children would re-execute.
+    """
+    process = subprocess.Popen([sys.executable, "-m", "core.jobs", "--workers", str(count), "--db", db_path])
+    atexit.register(process.terminate)
+    logger.info("Launched job worker pool (pid %d, %d workers)", process.pid, count)
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Evalia job workers.")
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS))
+    parser.add_argument("--db", default=JOBS_DB)
+    args = parser.parse_args(argv)
+    processes = start_workers(args.workers, args.db)
+
+    def forward(signum, frame):
+        for process in processes:
+            process.terminate()  # SIGTERM: each worker finishes its current job, then exits
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
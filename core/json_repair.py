@@ -0,0 +1,75 @@
+"""Local repair of almost-JSON model output, so a stray fence or comma doesn't cost a retry."""
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _drop_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair_json(text):
+    """Parse the first JSON object in text, fixing what a model typically gets wrong.
+
+    Handles code fences and chatty prefixes/suffixes, trailing commas, and output that
+    was cut off mid-object (open strings and brackets are closed, a dangling partial
+    member is dropped). Raises ValueError if nothing usable can be recovered.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object found")
+    out, stack, cuts = [], [], []
+    in_string = escape = False
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            out.append(stack.pop() if stack else ch)
+            if not stack:
+                break  # anything after the root object is chatter
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    candidate = "".join(out)
+    if not stack:
+        return json.loads(candidate)
+
+    # Truncated: try closing where we stopped, then back off to each earlier member boundary.
+    tail = list(candidate + ('"' if in_string else ""))
+    _drop_trailing_comma(tail)
+    attempts = ["".join(tail) + "".join(reversed(stack))]
+    attempts += [candidate[:pos] + "".join(reversed(snapshot)) for pos, snapshot in reversed(cuts)]
+    for attempt in attempts:
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Could not repair truncated JSON")
+
+
+def coerce_int(value):
+    """int() the way the scorer always has: anything unparseable becomes 0."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
@@ -0,0 +1,317 @@
+"""The one path to chat completions: shared rate limits, backoff and a circuit breaker.
+
+Every call in core.analysis and core.fetchers goes through create_completion(), which
+
+1. fails fast with UpstreamUnavailable while the circuit breaker is open;
+2. waits for room in the per-model requests/minute and tokens/minute buckets, which live
+   in SQLite (EVALIA_RATE_LIMIT_DB) so every session, worker and replica on the host
+   draws from the same budget;
+3. retries 429s, 5xx and connection errors with jittered exponential backoff, honouring
+   Retry-After when the API sends it.
+
+The OpenAI client's own retries are off (core.clients), so this is the only retry loop.
+The call itself is made by a pluggable backend (core.replay, EVALIA_LLM_MODE): live,
+live-and-record, or replay from a recorded corpus, which skips all of the above.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from core.logging_config import configure_evalia_logger
+from core.api_config import (RATE_LIMIT_DB, LLM_RPM_LIMIT, LLM_TPM_LIMIT, LLM_COMPLETION_TOKEN_ESTIMATE,
+                             LLM_MAX_RATE_WAIT, LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX,
+                             BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN_SECONDS)
+from core.tracing import metrics
+from core.replay import build_backend
+
+logger = configure_evalia_logger()
+
+IMAGE_TOKEN_ESTIMATE = 800  # a detail:auto image is billed at a few hundred tokens
+
+
+class UpstreamUnavailable(Exception):
+    """The API is unhealthy (breaker open) or our rate budget can't be met in time."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, per model, shared through SQLite.
+
+    Each bucket holds up to a minute's allowance and refills continuously. A request takes
+    from both buckets at once or from neither, and the token debit is corrected once the
+    real usage is known.
+    """
+
+    def __init__(self, db_path=RATE_LIMIT_DB, rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT):
+        self.db_path = db_path
+        self.limits = {"rpm": rpm, "tpm": tpm}
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return any(self.limits.values())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        if not self._ready:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets "
+                             "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+                self._ready = True
+        return conn
+
+    def _level(self, conn, name, limit, now):
+        row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return float(limit)
+        return min(float(limit), row[0] + (now - row[1]) * limit / 60.0)
+
+    def try_acquire(self, model, tokens):
+        """Take 1 request and `tokens` tokens if both fit; returns 0, or the seconds to wait first."""
+        now = time.time()
+        wants = {"rpm": 1, "tpm": tokens}
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            levels, wait = {}, 0.0
+            for kind, limit in self.limits.items():
+                if not limit:
+                    continue
+                levels[kind] = self._level(conn, f"{kind}:{model}", limit, now)
+                # A request bigger than the whole bucket waits for a full bucket, not forever.
+                need = min(wants[kind], limit)
+                if levels[kind] < need:
+                    wait = max(wait, (need - levels[kind]) * 60.0 / limit)
+            if wait == 0.0:
+                conn.executemany(
+                    "INSERT INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    [(f"{kind}:{model}", level - wants[kind], now) for kind, level in levels.items()],
+                )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def adjust(self, model, tokens_delta):
+        """Charge (or refund) the difference between estimated and actual token usage."""
+        if not self.limits["tpm"] or not tokens_delta:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE rate_buckets SET tokens = tokens - ? WHERE name = ?", (tokens_delta, f"tpm:{model}"))
+        finally:
+            conn.close()
+
+    def refund(self, model, tokens):
+        """Give back a reservation whose request never counted upstream (e.g. it got a 429)."""
+        if not self.enabled:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE rate_buckets SET tokens = tokens + ? WHERE name = ?",
+                             [(amount, f"{kind}:{model}") for kind, amount in (("rpm", 1), ("tpm", tokens))
+                              if self.limits[kind]])
+        finally:
+            conn.close()
+
+    async def acquire(self, model, tokens, max_wait=LLM_MAX_RATE_WAIT):
+        """Wait until the request fits; raises UpstreamUnavailable past max_wait."""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, model, tokens)
+            if wait == 0.0:
+                if waited:
+                    metrics.inc("llm_rate_wait_seconds_total", waited, model=model)
+                return waited
+            if waited + wait > max_wait:
+                raise UpstreamUnavailable(f"Rate limit budget for {model} exhausted; try again shortly",
+                                          retry_after=wait)
+            wait += random.uniform(0, 0.05)  # don't wake every waiter on the same tick
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive calls fail on an outage (5xx or unreachable, after
+    their retries); after `cooldown` seconds one probe call is let through (half-open) and its
+    outcome closes or re-opens the breaker."""
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None or not self.threshold:
+                return
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            if remaining <= 0 and not self._probing:
+                self._probing = True  # this caller is the probe
+                return
+        raise UpstreamUnavailable(
+            f"The OpenAI API is currently unavailable; retrying in about {max(1, round(remaining))}s",
+            retry_after=max(remaining, 1.0),
+        )
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker closed")
+            self._failures, self._opened_at, self._probing = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self.threshold and self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self.trips += 1
+                logger.warning("Circuit breaker open for %.0fs after %d failures", self.cooldown, self._failures)
+
+    def release_probe(self):
+        # The probe ended without telling us anything about upstream health (e.g. a 400).
+        with self._lock:
+            self._probing = False
+
+
+rate_limiter = RateLimiter()
+breaker = CircuitBreaker()
+backend = build_backend()
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Rough prompt + completion tokens for a request, used to reserve TPM budget."""
+    chars, images = 0, 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            for part in content or ():
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                else:
+                    images += 1
+    return chars // 4 + images * IMAGE_TOKEN_ESTIMATE + (max_tokens or LLM_COMPLETION_TOKEN_ESTIMATE)
+
+
+def retry_after_seconds(error):
+    """Seconds the API asked us to wait (retry-after-ms / retry-after headers), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than what Retry-After asked for."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, LLM_BACKOFF_MAX) + random.uniform(0, LLM_BACKOFF_BASE))
+    return delay
+
+
+def _retryable_errors():
+    import openai  # already loaded by whoever built the client
+    return openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError
+
+
+def _is_outage(error):
+    # 5xx and unreachable upstream count against the breaker; 429s (throttling or billing) don't.
+    import openai
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+
+def _usage_total(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+async def create_completion(client, max_retries=LLM_MAX_RETRIES, **kwargs):
+    """client.chat.completions.create(**kwargs) behind the breaker, rate limiter and backoff."""
+    if backend.offline:
+        return await backend.create(client, kwargs)
+    model = kwargs["model"]
+    estimate = estimate_tokens(kwargs.get("messages", ()), kwargs.get("max_tokens"))
+    # One breaker check per call, so a half-open probe can still retry within its call.
+    breaker.before_call()
+    for attempt in range(max_retries + 1):
+        try:
+            await rate_limiter.acquire(model, estimate)
+        except UpstreamUnavailable:
+            breaker.release_probe()
+            raise
+        try:
+            response = await backend.create(client, kwargs)
+        except _retryable_errors() as e:
+            quota = getattr(e, "code", None) == "insufficient_quota"  # billing, not load: don't retry
+            await asyncio.to_thread(rate_limiter.refund, model, estimate)  # the retry reserves afresh
+            if attempt >= max_retries or quota:
+                metrics.inc("llm_failures_total", model=model, kind=type(e).__name__)
+                # Only a call that ran out of retries on an outage counts against the breaker.
+                if _is_outage(e) and not quota:
+                    breaker.record_failure()
+                else:
+                    breaker.release_probe()
+                raise
+            delay = backoff_delay(attempt, retry_after_seconds(e))
+            metrics.inc("llm_retries_total", model=model, kind=type(e).__name__)
+            logger.warning("%s from %s (attempt %d), retrying in %.1fs", type(e).__name__, model, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            continue
+        except Exception:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        actual = _usage_total(response)
+        if actual is not None:
+            await asyncio.to_thread(rate_limiter.adjust, model, actual - estimate)
+        return response
+
+
+def _collect_metrics():
+    return [
+        ("llm_breaker_open", {}, 0 if breaker.state == "closed" else 1),
+        ("llm_breaker_trips_total", {}, breaker.trips),
+    ]
+
+
+metrics.register_collector(_collect_metrics)
@@ -1,22 +1,127 @@
+import atexit
+import contextvars
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+LOG_FILE = os.getenv("EVALIA_LOG_FILE", "static/evalia_debug.log")
+LOG_LEVEL = os.getenv("EVALIA_LOG_LEVEL", "DEBUG").upper()
+# Fraction of evaluations whose full model payloads are logged.
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("EVALIA_LOG_PAYLOAD_SAMPLE_RATE", "0.05"))
+
+correlation_id_var = contextvars.ContextVar("evalia_correlation_id", default=None)
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line, ready for jq/Loki/etc."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "thread": record.threadName,
+            "correlation_id": getattr(record, "correlation_id", None),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _CorrelationFilter(logging.Filter):
+    # Runs in the emitting thread, where the context variable is visible.
+    def filter(self, record):
+        record.correlation_id = correlation_id_var.get()
+        return True
+
+
+class _EvaliaQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Merge args and render the traceback now, but leave the JSON shape to the listener.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
 
 def configure_evalia_logger():
+    """Return the "evalia" logger, configuring it on first call only.
+
+    Records are handed to a queue and written to the rotating JSON-lines file by a
+    background QueueListener, so request threads never block on disk I/O or rotation.
+    """
+    global _configured, _listener
     logger = logging.getLogger("evalia")
-    logger.setLevel(logging.DEBUG)
-
-    # Remove existing handlers to avoid duplication
-    for h in logger.handlers[:]:
-        logger.removeHandler(h)
-
-    log_file = "static/evalia_debug.log"
-    # Create static directory if it doesn't exist
-    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
-    fh = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=5)
-    fh.setLevel(logging.DEBUG)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
-
-    return logger
\ No newline at end of file
+    if _configured:
+        return logger
+    with _configure_lock:
+        if _configured:
+            return logger
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+        for h in logger.handlers[:]:
+            logger.removeHandler(h)
+
+        # Create static directory if it doesn't exist
+        os.makedirs(os.path.dirname(LOG_FILE) or '.', exist_ok=True)
+        fh = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5)
+        fh.setLevel(LOG_LEVEL)
+        fh.setFormatter(JsonLineFormatter())
+
+        log_queue = queue.SimpleQueue()
+        qh = _EvaliaQueueHandler(log_queue)
+        qh.addFilter(_CorrelationFilter())
+        logger.addHandler(qh)
+        _listener = QueueListener(log_queue, fh, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        _configured = True
+    return logger
+
+
+def new_correlation_id():
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def correlation_scope(correlation_id=None):
+    """Tag every log record emitted inside the block (and tasks/threads it hands context to)."""
+    token = correlation_id_var.set(correlation_id or new_correlation_id())
+    try:
+        yield correlation_id_var.get()
+    finally:
+        correlation_id_var.reset(token)
+
+
+def should_log_payload():
+    """Whether to log full model payloads for the current evaluation.
+
+    Derived from the correlation id, so an evaluation is either logged in full or not at all.
+    """
+    cid = correlation_id_var.get()
+    if cid is None:
+        return random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    return (uuid.uuid5(uuid.NAMESPACE_OID, cid).int % 10000) < LOG_PAYLOAD_SAMPLE_RATE * 10000
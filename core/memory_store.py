@@ -0,0 +1,227 @@
+"""Evaluation memory: append-only SQLite (WAL) store behind save_to_memory."""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from core.logging_config import configure_evalia_logger
+from core.api_config import MEMORY_DB, MEMORY_FILE
+from core.rollups import ROLLUP_SCHEMA, apply_rollups, read_rollups
+from core.resources import resource
+
+logger = configure_evalia_logger()
+
+
+def enhance_entry(entry):
+    """Derived fields recorded alongside every evaluation."""
+    return {
+        **entry,
+        "claim_word_count": len(entry.get("claim", "").split()),
+        "had_url": bool(entry.get("url")),
+        "had_image": bool(entry.get("image_analysis")),
+        "persona_used": "brutal" if entry.get("brutality_mode") else "stoic",
+        "scores_generated": bool(entry.get("scores")),
+        "analysis_length": len(json.dumps(entry.get("analysis", ""))),
+        "verdict_extracted": bool(entry.get("analysis", {}).get("verdict")),
+        "all_scores_present": len(entry.get("scores", {})) == 5,
+    }
+
+
+class MemoryStore:
+    """One row per evaluation; writes are a single INSERT, reads are paged by rowid."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        if not self._ready:
+            with self._lock:
+                self._create_schema(conn)
+                self._ready = True
+        return conn
+
+    def _create_schema(self, conn):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                verdict TEXT,
+                persona TEXT,
+                entry TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_evaluations_timestamp ON evaluations(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_evaluations_verdict ON evaluations(verdict);
+            CREATE INDEX IF NOT EXISTS idx_evaluations_persona ON evaluations(persona);
+            CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+            + ROLLUP_SCHEMA
+        )
+        conn.commit()
+        self._backfill_rollups(conn)
+
+    def _backfill_rollups(self, conn):
+        # Stores created before rollups existed get one full pass; afterwards writes keep them current.
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = 'rollups_built'").fetchone():
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'rollups_built'").fetchone():
+                conn.execute("DELETE FROM evaluation_rollups")
+                rows = conn.execute("SELECT entry FROM evaluations ORDER BY id")
+                apply_rollups(conn, (json.loads(payload) for (payload,) in rows))
+                conn.execute("INSERT INTO store_meta (key, value) VALUES ('rollups_built', '1')")
+                logger.info("Built history rollups for %s", self.db_path)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def initialize(self):
+        self._connect().close()
+
+    @staticmethod
+    def _row(entry):
+        analysis = entry.get("analysis") or {}
+        return (
+            entry.get("timestamp"),
+            analysis.get("verdict") if isinstance(analysis, dict) else None,
+            entry.get("persona_used") or ("brutal" if entry.get("brutality_mode") else "stoic"),
+            json.dumps(entry),
+        )
+
+    def append(self, entry):
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO evaluations (timestamp, verdict, persona, entry) VALUES (?, ?, ?, ?)",
+                    self._row(entry),
+                )
+                apply_rollups(conn, [entry])
+            return cur.lastrowid
+        finally:
+            conn.close()
+
+    def get(self, entry_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT entry FROM evaluations WHERE id = ?", (entry_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def rollups(self, granularity, since=None, metrics=None):
+        """Pre-aggregated (bucket, metric, key, count, total) rows; see core.rollups."""
+        conn = self._connect()
+        try:
+            return read_rollups(conn, granularity, since, metrics)
+        finally:
+            conn.close()
+
+    def count(self, verdict=None, persona=None, since=None, until=None):
+        where, params = self._filters(verdict, persona, since, until)
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM evaluations{where}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _filters(verdict, persona, since, until, after_id=None):
+        clauses, params = [], []
+        if verdict is not None:
+            clauses.append("verdict = ?")
+            params.append(verdict)
+        if persona is not None:
+            clauses.append("persona = ?")
+            params.append(persona)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def iter_entries(self, verdict=None, persona=None, since=None, until=None, batch_size=500):
+        """Yield stored entries oldest-first without holding more than one page in memory."""
+        last_id = 0
+        while True:
+            where, params = self._filters(verdict, persona, since, until, after_id=last_id)
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    f"SELECT id, entry FROM evaluations{where} ORDER BY id LIMIT ?",
+                    params + [batch_size],
+                ).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            for row_id, payload in rows:
+                last_id = row_id
+                yield json.loads(payload)
+
+    def migrate_json(self, json_path):
+        """One-shot import of a legacy evalia_memory.json; returns the number of entries imported."""
+        if not os.path.exists(json_path):
+            return 0
+        marker = "migrated:" + os.path.abspath(json_path)
+        with open(json_path, "r") as f:
+            try:
+                loaded = json.load(f)
+            except json.JSONDecodeError:
+                logger.warning("Corrupted JSON in %s, skipping migration", json_path)
+                return 0
+        if isinstance(loaded, dict):
+            loaded = loaded.get("entries", [loaded]) if loaded else []
+        if not isinstance(loaded, list):
+            logger.warning("Unexpected data type in %s: %s, skipping migration", json_path, type(loaded))
+            return 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM store_meta WHERE key = ?", (marker,)).fetchone():
+                conn.rollback()
+                return 0
+            entries = [e for e in loaded if isinstance(e, dict)]
+            conn.executemany(
+                "INSERT INTO evaluations (timestamp, verdict, persona, entry) VALUES (?, ?, ?, ?)",
+                (self._row(e) for e in entries),
+            )
+            apply_rollups(conn, entries)
+            conn.execute("INSERT INTO store_meta (key, value) VALUES (?, ?)", (marker, str(len(loaded))))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        os.replace(json_path, json_path + ".migrated")
+        logger.info("Migrated %d entries from %s into %s", len(loaded), json_path, self.db_path)
+        return len(loaded)
+
+
+@resource("memory_store")
+def get_memory_store():
+    return MemoryStore(MEMORY_DB)
+
+
+def iter_memory(**filters):
+    return get_memory_store().iter_entries(**filters)
+
+
+if __name__ == "__main__":
+    # python -m core.memory_store [legacy_json_path]
+    path = sys.argv[1] if len(sys.argv) > 1 else MEMORY_FILE
+    print(f"Imported {get_memory_store().migrate_json(path)} entries from {path} into {MEMORY_DB}")
@@ -0,0 +1,179 @@
+"""Evaluation pipeline stages shared by the Streamlit app and headless callers."""
+import asyncio
+import io
+import time
+from datetime import datetime, timezone
+from core.logging_config import configure_evalia_logger, correlation_scope, new_correlation_id
+from core.api_config import URL_ARTIFACT_TIMEOUT, IMAGE_ARTIFACT_TIMEOUT
+from core.fetchers import fetch_url_text_async, analyze_image_async
+from core.clients import iter_sync
+from core.token_budget import budget_sources
+from core.tracing import start_trace, span
+
+logger = configure_evalia_logger()
+
+# Fixed order used when assembling text_blob, independent of completion order.
+ARTIFACT_ORDER = ("url_text", "image_analysis")
+
+
+def _timeout_fallback(name, timeout):
+    if name == "url_text":
+        return f"Error fetching URL: timed out after {timeout}s"
+    return {"extracted_text": "Error extracting text.", "description": "", "assessment": ""}
+
+
+async def iter_artifacts(url=None, image_bytes=None,
+                         url_timeout=URL_ARTIFACT_TIMEOUT, image_timeout=IMAGE_ARTIFACT_TIMEOUT):
+    """Yield (name, value) as the URL fetch and image analysis finish, as concurrent tasks.
+
+    An artifact that misses its deadline is cancelled, so its request stops (and stops
+    costing) rather than running on in the background, and yields its fallback instead.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = {}
+    if url:
+        tasks[asyncio.ensure_future(fetch_url_text_async(url))] = ("url_text", url_timeout)
+    if image_bytes:
+        tasks[asyncio.ensure_future(analyze_image_async(io.BytesIO(image_bytes)))] = ("image_analysis", image_timeout)
+    try:
+        while tasks:
+            next_deadline = start + min(timeout for _, timeout in tasks.values())
+            done, _ = await asyncio.wait(tasks, timeout=max(0.0, next_deadline - loop.time()),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, timeout = tasks.pop(task)
+                try:
+                    value = task.result()
+                except Exception:
+                    logger.error("Artifact %s failed", name, exc_info=True)
+                    value = _timeout_fallback(name, timeout)
+                yield name, value
+            now = loop.time()
+            for task, (name, timeout) in list(tasks.items()):
+                if now >= start + timeout:
+                    task.cancel()
+                    del tasks[task]
+                    logger.warning("Artifact %s timed out after %ss and was cancelled", name, timeout)
+                    yield name, _timeout_fallback(name, timeout)
+    finally:
+        for task in tasks:
+            task.cancel()  # the caller stopped listening
+
+
+def gather_artifacts(url=None, image_bytes=None, on_artifact=None,
+                     url_timeout=URL_ARTIFACT_TIMEOUT, image_timeout=IMAGE_ARTIFACT_TIMEOUT):
+    """Fetch the URL and analyse the image concurrently.
+
+    on_artifact(name, value, finished, total) is called from the calling thread as each
+    artifact completes (or times out), so it is safe to drive Streamlit widgets from it.
+    Returns {"url_text": str|None, "image_analysis": dict|None}.
+    """
+    results = {name: None for name in ARTIFACT_ORDER}
+    total = bool(url) + bool(image_bytes)
+    if not total:
+        return results
+    start = time.monotonic()
+    for finished, (name, value) in enumerate(iter_sync(iter_artifacts(url, image_bytes, url_timeout, image_timeout)), 1):
+        results[name] = value
+        if on_artifact:
+            on_artifact(name, value, finished, total)
+    logger.info("Artifacts gathered in %.2fs: %s", time.monotonic() - start,
+                [name for name in ARTIFACT_ORDER if results[name] is not None])
+    return results
+
+
+def build_text_blob(claim, url_text=None, image_analysis=None):
+    text_blob = claim
+    if url_text:
+        text_blob += f"\n[URL Content]: {url_text}"
+    if image_analysis:
+        text_blob += (
+            f"\n[Image Extracted Text]: {image_analysis.get('extracted_text','')}"
+            f"\n[Image Description]: {image_analysis.get('description','')}"
+            f"\n[Image Assessment]: {image_analysis.get('assessment','')}"
+        )
+    return text_blob
+
+
+def budget_text_blob(claim, url_text=None, image_analysis=None, **budget_kwargs):
+    """build_text_blob after cleaning and trimming every source to its token share.
+
+    Returns (text_blob, report); the report (per-source token usage) belongs in analysis_log.
+    """
+    image_analysis = image_analysis or {}
+    trimmed, report = budget_sources({
+        "claim": claim,
+        "url_text": url_text,
+        "image_extracted_text": image_analysis.get("extracted_text"),
+        "image_description": image_analysis.get("description"),
+        "image_assessment": image_analysis.get("assessment"),
+    }, **budget_kwargs)
+    trimmed_image = None
+    if image_analysis:
+        trimmed_image = {
+            "extracted_text": trimmed["image_extracted_text"],
+            "description": trimmed["image_description"],
+            "assessment": trimmed["image_assessment"],
+        }
+    logger.info("Scoring input: %d tokens used, %d dropped (budget %d)",
+                report["used_tokens"], report["dropped_tokens"], report["budget_tokens"])
+    return build_text_blob(trimmed["claim"], trimmed["url_text"] or None, trimmed_image), report
+
+
+def evaluate(claim, url=None, image_bytes=None, brutality_mode=False, save=True, run_id=None,
+             on_artifact=None, on_stage=None, scorer=None):
+    """The whole evaluation: artifacts, token budget, scoring, memory.
+
+    on_artifact is passed to gather_artifacts; on_stage(name) is called as "artifacts",
+    "score" and "save" begin. scorer(text_blob, brutality_mode, analysis_log, url_text)
+    replaces score_claim, e.g. so the app can render a streamed result as it arrives. Returns {"run_id", "result", "analysis_log", "url_text_display", "memory_id"}, the
+    same pieces the Streamlit app keeps per run, with the trace attached to analysis_log; memory_id is None when
+    nothing was saved.
+    """
+    # Imported here so fetch-only callers don't pay for the scoring stack.
+    from core.analysis import score_claim, save_to_memory
+    run_id = run_id or new_correlation_id()
+    with correlation_scope(run_id), start_trace("evaluation", run_id=run_id) as trace:
+        analysis_log = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "correlation_id": run_id,
+            "claim": claim,
+            "url": url,
+            "image_analysis": None,
+            "scores": {},
+            "brutality_mode": brutality_mode,
+        }
+        on_stage = on_stage or (lambda stage: None)
+        on_stage("artifacts")
+        with span("artifacts"):
+            artifacts = gather_artifacts(url, image_bytes, on_artifact=on_artifact)
+        analysis_log["image_analysis"] = artifacts["image_analysis"]
+        with span("token_budget"):
+            text_blob, analysis_log["token_budget"] = budget_text_blob(claim, artifacts["url_text"],
+                                                                       analysis_log["image_analysis"])
+        result = None
+        if text_blob.strip():
+            on_stage("score")
+            with span("score", streaming=scorer is not None):
+                if scorer:
+                    result = scorer(text_blob, brutality_mode, analysis_log, artifacts["url_text"])
+                else:
+                    result = score_claim(text_blob, brutality_mode)
+            # An unscored claim (API unavailable) isn't worth remembering as all-zero scores.
+            analysis_log["scores"] = {} if result.get("upstream_unavailable") else result.get("scores", {})
+            analysis_log["analysis"] = result
+            analysis_log["model_routing"] = result.get("model_routing")
+        memory_id = None
+        if save and (analysis_log.get("scores") or analysis_log.get("image_analysis")):
+            on_stage("save")
+            memory_id = save_to_memory(analysis_log)
+    analysis_log["trace"] = trace.to_dict()
+    logger.info("Evaluation %s finished in %.0f ms", run_id, trace.duration * 1000)
+    return {
+        "run_id": run_id,
+        "result": result,
+        "analysis_log": analysis_log,
+        "url_text_display": artifacts["url_text"],
+        "memory_id": memory_id,
+    }
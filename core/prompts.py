@@ -1,4 +1,5 @@
 """Prompt templates and persona wiring."""
+import json
 OUTPUT_JSON_SCHEMA = """
 {
   "verdict": "Plausible|Implausible|Speculative|Unknown|Proven",
@@ -45,3 +46,89 @@ You are Evalia in Brutality Mode: a cocky, blunt, and sarcastic misinformation a
 {OUTPUT_JSON_SCHEMA}
 Keep all fields except 'reasoning' and 'final_commentary' neutral, factual, and concise.
 """
+
+
+def _schema_for(example):
+    # OUTPUT_JSON_SCHEMA describes each field by example; turn that into a JSON Schema node.
+    if isinstance(example, dict):
+        return {
+            "type": "object",
+            "properties": {k: _schema_for(v) for k, v in example.items()},
+            "required": list(example),
+            "additionalProperties": False,
+        }
+    if isinstance(example, list):
+        return {"type": "array", "items": _schema_for(example[0]) if example else {"type": "string"}}
+    if isinstance(example, str) and example.startswith("Integer"):
+        return {"type": "integer"}
+    if isinstance(example, str) and "|" in example and " " not in example:
+        return {"type": "string", "enum": example.split("|")}
+    return {"type": "string"}
+
+SCORING_JSON_SCHEMA = _schema_for(json.loads(OUTPUT_JSON_SCHEMA))
+INTEGER_FIELDS = [k for k, v in SCORING_JSON_SCHEMA["properties"].items() if v["type"] == "integer"]
+
+SCORING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "evalia_claim_analysis", "strict": True, "schema": SCORING_JSON_SCHEMA},
+}
+
+# Sharded scoring (EVALIA_SHARDED_SCORING): a short "core" call for everything except the
+# per-gate reasoning, plus one call per gate that writes that gate's reasoning in parallel.
+SHARDED_GATES = ("logic", "natural_law", "historical_accuracy", "source_credibility")
+
+_core_example = json.loads(OUTPUT_JSON_SCHEMA)
+_core_example["reasoning"] = {"overall_reasonableness": _core_example["reasoning"]["overall_reasonableness"]}
+CORE_OUTPUT_JSON_SCHEMA = json.dumps(_core_example, indent=2)
+
+GATE_OUTPUT_JSON_SCHEMA = """
+{
+  "score": "Integer from 0 to 10",
+  "reasoning": "2-4 short paragraphs explaining the score"
+}
+"""
+
+GATE_DESCRIPTIONS = {
+    "logic": "Logic: is the claim internally consistent, and do its conclusions follow from its premises?",
+    "natural_law": "Natural Law: is the claim consistent with established physics, biology and other natural laws?",
+    "historical_accuracy": "Historical Accuracy: does the claim match the documented historical and factual record?",
+    "source_credibility": "Source Credibility: how credible are the sources the claim cites or implies?",
+}
+
+STOIC_CORE_PROMPT = f"""
+You are Evalia, a disciplined and precise misinformation analysis tool. Analyze the provided claim and output ONLY a valid JSON object matching this exact schema:
+{CORE_OUTPUT_JSON_SCHEMA}
+The detailed reasoning for each gate is written separately; keep 'reasoning' to the overall synthesis.
+Do not include any text outside the JSON object.
+"""
+
+BRUTAL_CORE_PROMPT = f"""
+You are Evalia in Brutality Mode: a cocky, blunt, and sarcastic misinformation analysis tool. Shred the claim with ruthless wit and arrogance in the 'reasoning' and 'final_commentary' fields only. Output ONLY a valid JSON object matching this exact schema:
+{CORE_OUTPUT_JSON_SCHEMA}
+The detailed reasoning for each gate is written separately; keep 'reasoning' to the overall synthesis.
+Keep all fields except 'reasoning' and 'final_commentary' neutral, factual, and concise.
+"""
+
+def gate_prompt(gate, brutality_mode=False):
+    persona = (
+        "You are Evalia in Brutality Mode: a cocky, blunt, and sarcastic misinformation analysis tool. "
+        "Shred the claim with ruthless wit and arrogance in 'reasoning'."
+        if brutality_mode else
+        "You are Evalia, a disciplined and precise misinformation analysis tool."
+    )
+    return f"""
+{persona} Judge the provided claim on ONE gate of reason only.
+{GATE_DESCRIPTIONS[gate]}
+Output ONLY a valid JSON object matching this exact schema:
+{GATE_OUTPUT_JSON_SCHEMA}
+Do not include any text outside the JSON object.
+"""
+
+def _response_format_for(name, example):
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": _schema_for(json.loads(example))},
+    }
+
+CORE_RESPONSE_FORMAT = _response_format_for("evalia_claim_core", CORE_OUTPUT_JSON_SCHEMA)
+GATE_RESPONSE_FORMAT = _response_format_for("evalia_gate_reasoning", GATE_OUTPUT_JSON_SCHEMA)
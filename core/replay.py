@@ -0,0 +1,361 @@
+"""Record/replay completion backends, for reproducing production traffic offline.
+
+EVALIA_LLM_MODE picks the backend core.llm.create_completion uses:
+
+    live     call the API (the default)
+    record   call the API and also store every request/response pair, with its
+             timings, in the EVALIA_LLM_CORPUS SQLite file
+    replay   answer from that corpus without touching the network; responses are
+             served instantly, or at EVALIA_LLM_REPLAY_LATENCY times their recorded
+             latency (1 = as recorded)
+
+Requests are keyed by their normalized form: transport-only options (stream, timeouts,
+headers) are dropped and inline images are reduced to a digest, so a streamed and a
+plain call for the same prompt share one entry. A key recorded several times replays
+its responses in turn.
+
+    python -m core.replay stats
+    python -m core.replay drive --concurrency 16   # re-score every recorded claim
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from core.logging_config import configure_evalia_logger
+from core.api_config import LLM_MODE, LLM_CORPUS, LLM_REPLAY_LATENCY
+from core.tracing import metrics
+
+logger = configure_evalia_logger()
+
+CORPUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    model TEXT NOT NULL,
+    request BLOB NOT NULL,
+    response BLOB NOT NULL,
+    streamed INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_key ON completions(key, id);
+"""
+
+# Options that change how a response is delivered, not what it says.
+TRANSPORT_OPTIONS = ("stream", "stream_options", "timeout", "extra_headers", "extra_query", "extra_body", "user")
+STREAM_PIECE_CHARS = 16  # chunk size when a plain recording is replayed as a stream
+
+
+class ReplayMiss(LookupError):
+    """Replay mode got a request that isn't in the corpus."""
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def _normalize_part(part):
+    url = (part.get("image_url") or {}).get("url", "") if isinstance(part, dict) else ""
+    if url.startswith("data:"):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return {**part, "image_url": {**part["image_url"], "url": f"sha256:{digest}"}}
+    return part
+
+
+def normalize_request(kwargs):
+    """The request with transport options dropped and inline images replaced by their digest."""
+    request = {k: v for k, v in kwargs.items() if k not in TRANSPORT_OPTIONS}
+    request["messages"] = [
+        {**m, "content": [_normalize_part(p) for p in m["content"]]} if isinstance(m.get("content"), list) else m
+        for m in request.get("messages", ())
+    ]
+    return request
+
+
+def request_key(request):
+    return hashlib.sha256(json.dumps(request, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class Corpus:
+    def __init__(self, db_path=LLM_CORPUS):
+        self.db_path = db_path
+        self._ready = False
+        self._lock = threading.Lock()
+        self._entries = None  # key -> cycle of responses, loaded once for replay
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        if not self._ready:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(CORPUS_SCHEMA)
+                conn.commit()
+                self._ready = True
+        return conn
+
+    def add(self, request, response, streamed):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO completions (key, model, request, response, streamed, latency, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (request_key(request), request.get("model", ""), _pack(request), _pack(response),
+                     int(streamed), response["latency"], time.time()),
+                )
+        finally:
+            conn.close()
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        responses = defaultdict(list)
+        conn = self._connect()
+        try:
+            for key, blob in conn.execute("SELECT key, response FROM completions ORDER BY id"):
+                responses[key].append(_unpack(blob))
+        finally:
+            conn.close()
+        with self._lock:
+            if self._entries is None:
+                self._entries = {key: itertools.cycle(items) for key, items in responses.items()}
+                logger.info("Loaded %d recorded completions (%d distinct requests) from %s",
+                            sum(map(len, responses.values())), len(responses), self.db_path)
+        return self._entries
+
+    def lookup(self, request):
+        """The next recorded response for this request, or None."""
+        entries = self._load()
+        key = request_key(request)
+        with self._lock:
+            return next(entries[key]) if key in entries else None
+
+    def requests(self):
+        conn = self._connect()
+        try:
+            return [_unpack(blob) for (blob,) in conn.execute("SELECT request FROM completions ORDER BY id")]
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT model, COUNT(*), COUNT(DISTINCT key), SUM(streamed), SUM(latency), "
+                "SUM(LENGTH(request) + LENGTH(response)) FROM completions GROUP BY model ORDER BY model"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {model: {"completions": n, "distinct": distinct, "streamed": streamed or 0,
+                        "recorded_latency_s": round(latency or 0.0, 3), "bytes": size or 0}
+                for model, n, distinct, streamed, latency, size in rows}
+
+
+def _usage_dict(usage):
+    return usage.model_dump() if usage is not None else None
+
+
+class LiveBackend:
+    offline = False
+
+    async def create(self, client, kwargs):
+        return await client.chat.completions.create(**kwargs)
+
+
+class RecordingBackend(LiveBackend):
+    """Live calls, with each successful response written to the corpus."""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+
+    async def _save(self, kwargs, response, streamed):
+        try:
+            await asyncio.to_thread(self.corpus.add, normalize_request(kwargs), response, streamed)
+        except sqlite3.Error:
+            logger.warning("Failed to record completion", exc_info=True)
+
+    async def create(self, client, kwargs):
+        started = time.perf_counter()
+        response = await super().create(client, kwargs)
+        if kwargs.get("stream"):
+            return self._recorded_stream(kwargs, response, started)
+        choice = response.choices[0]
+        await self._save(kwargs, {
+            "model": response.model,
+            "content": choice.message.content,
+            "finish_reason": choice.finish_reason,
+            "usage": _usage_dict(response.usage),
+            "latency": round(time.perf_counter() - started, 4),
+        }, streamed=False)
+        return response
+
+    async def _recorded_stream(self, kwargs, stream, started):
+        pieces, model, finish_reason, usage = [], kwargs["model"], "stop", None
+        async for chunk in stream:
+            model = chunk.model or model
+            if chunk.usage is not None:
+                usage = _usage_dict(chunk.usage)
+            if chunk.choices:
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                if choice.delta.content:
+                    pieces.append([round(time.perf_counter() - started, 4), choice.delta.content])
+            yield chunk
+        # Only streams that ran to the end are recorded.
+        await self._save(kwargs, {
+            "model": model,
+            "content": "".join(text for _, text in pieces),
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "latency": round(time.perf_counter() - started, 4),
+            "chunks": pieces,
+        }, streamed=True)
+
+
+class ReplayBackend:
+    """Serves recorded responses; `latency_scale` 0 replays instantly, 1 at recorded speed."""
+
+    offline = True
+
+    def __init__(self, corpus, latency_scale=LLM_REPLAY_LATENCY):
+        self.corpus = corpus
+        self.latency_scale = latency_scale
+        self._ids = itertools.count(1)
+
+    async def create(self, client, kwargs):
+        request = normalize_request(kwargs)
+        recorded = await asyncio.to_thread(self.corpus.lookup, request)
+        if recorded is None:
+            metrics.inc("llm_replay_misses_total", model=request.get("model", ""))
+            raise ReplayMiss(f"No recorded completion for this {request.get('model')} request")
+        metrics.inc("llm_replay_hits_total", model=request.get("model", ""))
+        if kwargs.get("stream"):
+            return self._stream(recorded, kwargs)
+        if self.latency_scale:
+            await asyncio.sleep(recorded["latency"] * self.latency_scale)
+        return self._completion(recorded)
+
+    def _envelope(self, recorded, kind):
+        return {"id": f"replay-{next(self._ids)}", "object": kind, "created": int(time.time()),
+                "model": recorded["model"]}
+
+    def _completion(self, recorded):
+        from openai.types.chat import ChatCompletion
+        return ChatCompletion.model_validate({
+            **self._envelope(recorded, "chat.completion"),
+            "choices": [{"index": 0, "finish_reason": recorded["finish_reason"],
+                         "message": {"role": "assistant", "content": recorded["content"]}}],
+            "usage": recorded["usage"],
+        })
+
+    async def _stream(self, recorded, kwargs):
+        from openai.types.chat import ChatCompletionChunk
+        envelope = self._envelope(recorded, "chat.completion.chunk")
+        chunks = recorded.get("chunks")
+        if chunks is None:
+            # Recorded without streaming: spread the content evenly over the recorded latency.
+            content = recorded["content"] or ""
+            pieces = [content[i:i + STREAM_PIECE_CHARS] for i in range(0, len(content), STREAM_PIECE_CHARS)]
+            step = recorded["latency"] / max(1, len(pieces))
+            chunks = [[step * (i + 1), piece] for i, piece in enumerate(pieces)]
+        started = time.perf_counter()
+        for offset, text in chunks:
+            if self.latency_scale:
+                delay = offset * self.latency_scale - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield ChatCompletionChunk.model_validate(
+                {**envelope, "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]})
+        yield ChatCompletionChunk.model_validate(
+            {**envelope, "choices": [{"index": 0, "delta": {}, "finish_reason": recorded["finish_reason"]}]})
+        if (kwargs.get("stream_options") or {}).get("include_usage") and recorded["usage"]:
+            yield ChatCompletionChunk.model_validate({**envelope, "choices": [], "usage": recorded["usage"]})
+
+
+def build_backend(mode=LLM_MODE, corpus_path=LLM_CORPUS, latency_scale=LLM_REPLAY_LATENCY):
+    if mode == "live":
+        return LiveBackend()
+    if mode == "record":
+        logger.info("Recording completions to %s", corpus_path)
+        return RecordingBackend(Corpus(corpus_path))
+    if mode == "replay":
+        logger.info("Replaying completions from %s (latency x%g)", corpus_path, latency_scale)
+        return ReplayBackend(Corpus(corpus_path), latency_scale)
+    raise ValueError(f"Unknown EVALIA_LLM_MODE {mode!r}; expected live, record or replay")
+
+
+def recorded_claims(corpus):
+    """(scoring text, brutality_mode) for every distinct scoring request in the corpus."""
+    from core.prompts import STOIC_SCORING_PROMPT, BRUTAL_SCORING_PROMPT, STOIC_CORE_PROMPT, BRUTAL_CORE_PROMPT
+    prompts = {STOIC_SCORING_PROMPT: False, STOIC_CORE_PROMPT: False,
+               BRUTAL_SCORING_PROMPT: True, BRUTAL_CORE_PROMPT: True}
+    claims = {}
+    for request in corpus.requests():
+        messages = request.get("messages", [])
+        if len(messages) != 2 or messages[0].get("content") not in prompts:
+            continue
+        user = messages[1].get("content")
+        if isinstance(user, str) and user.startswith("Claim:\n"):
+            claims.setdefault((user[len("Claim:\n"):], prompts[messages[0]["content"]]), None)
+    return list(claims)
+
+
+def drive(corpus, concurrency=8):
+    """Re-score every recorded claim through score_claim and time the run."""
+    from concurrent.futures import ThreadPoolExecutor
+    from core.analysis import score_claim
+    claims = recorded_claims(corpus)
+    latencies = []
+
+    def one(claim):
+        started = time.perf_counter()
+        result = score_claim(claim[0], brutality_mode=claim[1], bypass_cache=True)
+        latencies.append(time.perf_counter() - started)
+        return "error" not in result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(one, claims))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "claims": len(claims),
+        "ok": ok,
+        "elapsed_s": round(elapsed, 3),
+        "claims_per_s": round(len(claims) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded completion corpus.")
+    parser.add_argument("command", choices=("stats", "drive"))
+    parser.add_argument("--corpus", default=LLM_CORPUS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+    corpus = Corpus(args.corpus)
+    if args.command == "stats":
+        print(json.dumps(corpus.stats(), indent=2))
+        return 0
+    from core import llm
+    llm.backend = ReplayBackend(corpus, LLM_REPLAY_LATENCY)  # drive never calls the API
+    print(json.dumps(drive(corpus, args.concurrency), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+"""Process-wide registry of shared resources (HTTP sessions, stores, renderers, ...).
+
+Each resource is registered with a factory and built on first use, once per process,
+so importing a module never pays for clients or connections it may not need:
+
+    @resource("http_session", close=lambda s: s.close())
+    def get_http_session():
+        return requests.Session()
+
+The AsyncOpenAI clients are the exception: httpx pools belong to an event loop, so
+core.clients keeps one per loop rather than one per process.
+"""
+import atexit
+import functools
+import threading
+import time
+from core.logging_config import configure_evalia_logger
+
+logger = configure_evalia_logger()
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._build_ms = {}
+        self._lock = threading.RLock()  # factories may fetch other resources
+
+    def register(self, name, factory, close=None):
+        with self._lock:
+            self._factories[name] = (factory, close)
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                factory, _ = self._factories[name]
+                started = time.perf_counter()
+                self._instances[name] = factory()
+                self._build_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+                logger.info("Created shared resource %s in %.1fms", name, self._build_ms[name])
+            return self._instances[name]
+
+    def set(self, name, instance):
+        """Use `instance` for `name` (e.g. a scratch store in benchmarks) until reset."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name):
+        """Forget `name` without closing it; the next get() builds a fresh one."""
+        with self._lock:
+            self._instances.pop(name, None)
+            self._build_ms.pop(name, None)
+
+    def created(self):
+        """{name: milliseconds its factory took} for every resource built so far."""
+        with self._lock:
+            return dict(self._build_ms)
+
+    def close_all(self):
+        with self._lock:
+            instances, self._instances, self._build_ms = self._instances, {}, {}
+        for name, instance in instances.items():
+            close = self._factories[name][1]
+            if close is None:
+                continue
+            try:
+                close(instance)
+            except Exception:
+                logger.warning("Failed to close resource %s", name, exc_info=True)
+
+
+registry = ResourceRegistry()
+atexit.register(registry.close_all)
+
+
+def resource(name, close=None):
+    """Register the decorated factory under `name`; calling the result returns the shared instance."""
+    def decorate(factory):
+        registry.register(name, factory, close)
+
+        @functools.wraps(factory)
+        def get():
+            return registry.get(name)
+        return get
+    return decorate
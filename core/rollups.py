@@ -0,0 +1,89 @@
+"""Pre-aggregated history rollups, maintained in the same transaction as each memory write.
+
+One row per (granularity, bucket, metric, key) holding a count and a running total, e.g.
+("day", "2025-03-01", "verdict", "Implausible") or ("hour", "2025-03-01T14", "score", "logic").
+Dashboards read a bounded number of buckets, so their cost doesn't grow with history.
+"""
+from datetime import datetime, timezone
+
+GRANULARITIES = {"hour": 13, "day": 10}  # bucket = prefix of the UTC ISO timestamp
+ALL_TIME = "all"
+SCORE_GATES = ("logic", "natural_law", "historical_accuracy", "source_credibility", "overall_reasonableness")
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluation_rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket, metric, key)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = (
+    "INSERT INTO evaluation_rollups (granularity, bucket, metric, key, count, total) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (granularity, bucket, metric, key) DO UPDATE SET "
+    "count = count + excluded.count, total = total + excluded.total"
+)
+
+
+def _utc_iso(timestamp):
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        parsed = datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def observations(entry):
+    """(metric, key, value) facts an enhanced entry contributes to every bucket it falls in."""
+    analysis = entry.get("analysis") if isinstance(entry.get("analysis"), dict) else {}
+    facts = [
+        ("evaluations", "", 0),
+        ("verdict", analysis.get("verdict") or "None", 0),
+        ("persona", entry.get("persona_used") or ("brutal" if entry.get("brutality_mode") else "stoic"), 0),
+        ("had_url", "yes" if entry.get("had_url", bool(entry.get("url"))) else "no", 0),
+        ("had_image", "yes" if entry.get("had_image", bool(entry.get("image_analysis"))) else "no", 0),
+        ("claim_words", "", entry.get("claim_word_count", 0) or 0),
+    ]
+    if analysis.get("matched_prior_evaluation"):
+        facts.append(("matched_prior", "", 0))
+    scores = entry.get("scores") or {}
+    for gate in SCORE_GATES:
+        try:
+            facts.append(("score", gate, float(scores[gate])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return facts
+
+
+def rollup_rows(entry):
+    iso = _utc_iso(entry.get("timestamp"))
+    buckets = [(name, iso[:width]) for name, width in GRANULARITIES.items()] + [(ALL_TIME, ALL_TIME)]
+    return [(granularity, bucket, metric, key, 1, value)
+            for granularity, bucket in buckets
+            for metric, key, value in observations(entry)]
+
+
+def apply_rollups(conn, entries):
+    """Fold entries into the rollups on an open connection (inside the caller's transaction)."""
+    conn.executemany(_UPSERT, (row for entry in entries for row in rollup_rows(entry)))
+
+
+def read_rollups(conn, granularity, since=None, metrics=None):
+    """Rows (bucket, metric, key, count, total) for one granularity, oldest bucket first."""
+    clauses, params = ["granularity = ?"], [granularity]
+    if since is not None:
+        clauses.append("bucket >= ?")
+        params.append(since)
+    if metrics:
+        clauses.append(f"metric IN ({','.join('?' * len(metrics))})")
+        params.extend(metrics)
+    return conn.execute(
+        f"SELECT bucket, metric, key, count, total FROM evaluation_rollups WHERE {' AND '.join(clauses)} "
+        "ORDER BY bucket", params,
+    ).fetchall()
@@ -0,0 +1,134 @@
+"""Cost-aware model cascade: answer with a cheap model, escalate only when its result isn't trustworthy.
+
+Tiers are tried in order (EVALIA_SCORING_MODELS, e.g. "gpt-4o-mini,gpt-4o"). A tier's
+result is accepted unless it failed validation, reports low confidence, or lands in the
+borderline score band; the last tier is always accepted. CascadeStats keeps per-tier
+call counts, latency, token spend and escalation reasons, plus how often a cheap tier
+agreed with the large model whenever both answered the same claim.
+"""
+import threading
+from collections import defaultdict
+from core.api_config import CASCADE_MIN_CONFIDENCE, CASCADE_BORDERLINE, MODEL_PRICES
+
+
+class CascadePolicy:
+    def __init__(self, tiers, min_confidence=CASCADE_MIN_CONFIDENCE, borderline=CASCADE_BORDERLINE):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = list(tiers)
+        self.min_confidence = min_confidence
+        self.borderline = borderline
+
+    def escalation_reason(self, result):
+        """Why a scoring result should go to the next tier, or None to accept it."""
+        if not isinstance(result, dict) or "error" in result:
+            return "validation_failed"
+        confidence = result.get("confidence_level")
+        if isinstance(confidence, int) and confidence < self.min_confidence:
+            return "low_confidence"
+        overall = (result.get("scores") or {}).get("overall_reasonableness")
+        if self.borderline and isinstance(overall, int) and self.borderline[0] <= overall <= self.borderline[1]:
+            return "borderline_score"
+        return None
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """USD for one call at MODEL_PRICES (per million input/output tokens); 0.0 for unknown models."""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def usage_tokens(response):
+    usage = getattr(response, "usage", None)
+    return (getattr(usage, "prompt_tokens", 0) or 0), (getattr(usage, "completion_tokens", 0) or 0)
+
+
+class CascadeStats:
+    """Counters per (task, model): calls, accepted, escalations by reason, latency, tokens, cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers = defaultdict(lambda: {
+            "calls": 0, "accepted": 0, "escalated": 0, "latency_s": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            "escalations": defaultdict(int),
+            "reference_model": None, "accepted_latency_s": 0.0, "saved_cost_usd": 0.0,
+        })
+        self._agreement = defaultdict(lambda: {"compared": 0, "verdict_agreed": 0, "score_abs_diff": 0.0})
+
+    def record_call(self, task, model, latency_s, prompt_tokens, completion_tokens, escalation_reason=None,
+                    reference_model=None):
+        """reference_model: the model this call stood in for, used to estimate what acceptance saved."""
+        with self._lock:
+            tier = self._tiers[(task, model)]
+            tier["calls"] += 1
+            tier["latency_s"] += latency_s
+            tier["prompt_tokens"] += prompt_tokens
+            tier["completion_tokens"] += completion_tokens
+            tier["cost_usd"] += estimate_cost(model, prompt_tokens, completion_tokens)
+            if escalation_reason:
+                tier["escalated"] += 1
+                tier["escalations"][escalation_reason] += 1
+            else:
+                tier["accepted"] += 1
+                if reference_model and reference_model != model:
+                    tier["reference_model"] = reference_model
+                    tier["accepted_latency_s"] += latency_s
+                    tier["saved_cost_usd"] += (estimate_cost(reference_model, prompt_tokens, completion_tokens)
+                                               - estimate_cost(model, prompt_tokens, completion_tokens))
+
+    def record_agreement(self, model, cheap, reference):
+        """Compare a cheap tier's scoring result with the large model's for the same claim."""
+        if not all(isinstance(r, dict) and "error" not in r for r in (cheap, reference)):
+            return
+        cheap_scores, ref_scores = cheap.get("scores") or {}, reference.get("scores") or {}
+        gates = [g for g in ref_scores if isinstance(cheap_scores.get(g), int) and isinstance(ref_scores[g], int)]
+        with self._lock:
+            agreement = self._agreement[model]
+            agreement["compared"] += 1
+            agreement["verdict_agreed"] += cheap.get("verdict") == reference.get("verdict")
+            if gates:
+                agreement["score_abs_diff"] += sum(abs(cheap_scores[g] - ref_scores[g]) for g in gates) / len(gates)
+
+    def snapshot(self):
+        with self._lock:
+            tiers = {f"{task}:{model}": {**t, "escalations": dict(t["escalations"])} for (task, model), t in self._tiers.items()}
+            agreement = {model: dict(a) for model, a in self._agreement.items()}
+        for tier in tiers.values():
+            tier["avg_latency_ms"] = round(tier["latency_s"] / tier["calls"] * 1000, 1) if tier["calls"] else 0.0
+        for key, tier in tiers.items():
+            reference = tiers.get(f"{key.split(':', 1)[0]}:{tier['reference_model']}")
+            if reference and reference["calls"] and tier["accepted_latency_s"]:
+                # Accepted cheap answers vs. what the reference model takes on average.
+                expected = reference["latency_s"] / reference["calls"] * tier["accepted"]
+                tier["saved_latency_s"] = round(expected - tier["accepted_latency_s"], 3)
+        for model, a in agreement.items():
+            a["verdict_agreement_rate"] = round(a["verdict_agreed"] / a["compared"], 3) if a["compared"] else None
+            a["mean_abs_score_diff"] = round(a["score_abs_diff"] / a["compared"], 3) if a["compared"] else None
+        return {"tiers": tiers, "agreement": agreement}
+
+    def metric_samples(self):
+        samples = []
+        with self._lock:
+            for (task, model), t in self._tiers.items():
+                labels = {"task": task, "model": model}
+                samples += [
+                    ("model_calls_total", labels, t["calls"]),
+                    ("model_accepted_total", labels, t["accepted"]),
+                    ("model_latency_seconds_total", labels, round(t["latency_s"], 6)),
+                    ("model_tokens_total", {**labels, "kind": "prompt"}, t["prompt_tokens"]),
+                    ("model_tokens_total", {**labels, "kind": "completion"}, t["completion_tokens"]),
+                    ("model_cost_usd_total", labels, round(t["cost_usd"], 6)),
+                    ("model_saved_cost_usd_total", labels, round(t["saved_cost_usd"], 6)),
+                ]
+                samples += [("model_escalations_total", {**labels, "reason": reason}, n)
+                            for reason, n in t["escalations"].items()]
+            for model, a in self._agreement.items():
+                samples += [
+                    ("cascade_compared_total", {"model": model}, a["compared"]),
+                    ("cascade_verdict_agreed_total", {"model": model}, a["verdict_agreed"]),
+                ]
+        return samples
+
+
+cascade_stats = CascadeStats()
@@ -0,0 +1,488 @@
+"""Standalone HTTP scoring service, so Evalia can be called (and scaled) without Streamlit.
+
+    python -m core.service --port 8080 --workers 8 --queue-size 64
+
+Plain asyncio streams, HTTP/1.1 with keep-alive and JSON bodies:
+
+    GET  /healthz              liveness
+    GET  /readyz               503 while draining or when the queue is full
+    GET  /metrics              Prometheus text
+    POST /v1/score             {"claim", "brutality_mode", "bypass_cache"} -> scoring result
+    POST /v1/evaluate          {"claim", "url", "image_base64", "brutality_mode", "save"} -> full run
+    POST /v1/artifacts/url     {"url"} -> {"url_text"}
+    POST /v1/artifacts/image   {"image_base64", "bypass_cache"} -> {"image_analysis"}
+    POST /v1/seal              {"verdict_text", "brutality_mode", "with_logo"} -> image/png
+    POST /v1/report            {"analysis_log"} -> application/pdf
+
+The /v1 routes need "Authorization: Bearer $EVALIA_SERVICE_TOKEN"; without a token the
+service refuses to listen anywhere but loopback. URLs are only fetched from public hosts
+(core.fetchers.check_public_url), and clients get EVALIA_SERVICE_READ_TIMEOUT seconds to
+send each request.
+
+Work is handed to a fixed pool of workers through a bounded queue; when it is full the
+request is refused with 429 and a Retry-After estimated from recent service times.
+SIGTERM/SIGINT stop accepting connections, fail readiness, and let queued and in-flight
+work finish (up to EVALIA_SERVICE_DRAIN_TIMEOUT) before exiting.
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import hmac
+import io
+import ipaddress
+import json
+import math
+import signal
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from core.logging_config import configure_evalia_logger, correlation_scope, new_correlation_id
+from core.api_config import (initialize_memory, SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_QUEUE_SIZE,
+                             SERVICE_DRAIN_TIMEOUT, SERVICE_MAX_BODY_BYTES, SERVICE_READ_TIMEOUT, SERVICE_TOKEN)
+from core.tracing import metrics
+
+logger = configure_evalia_logger()
+
+SEAL_LOGO = "static/Evalia Logo Silver.png"
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Request:
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        return self.headers.get("connection", "").lower() != "close"
+
+    def json(self):
+        try:
+            payload = json.loads(self.body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "JSON body must be an object")
+        return payload
+
+
+class Response:
+    def __init__(self, status=200, body=b"", content_type="application/json", headers=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, payload, status=200, headers=None):
+        return cls(status, json.dumps(payload, default=str).encode("utf-8"), headers=headers)
+
+
+class WorkerPool:
+    """Fixed number of worker tasks fed by a bounded queue; submit() raises QueueFull instead of waiting."""
+
+    def __init__(self, workers=SERVICE_WORKERS, queue_size=SERVICE_QUEUE_SIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.busy = 0
+        self._tasks = []
+        self._service_times = deque(maxlen=256)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(), name=f"evalia-service-worker-{i}")
+                       for i in range(self.workers)]
+
+    def submit(self, job, request_id):
+        """Queue job() (a coroutine function); returns a future for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((job, request_id, future))
+        return future
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up, from recent service times."""
+        average = sum(self._service_times) / len(self._service_times) if self._service_times else 1.0
+        return max(1, math.ceil(average * (self.queue.qsize() + self.busy) / self.workers))
+
+    async def _worker(self):
+        while True:
+            job, request_id, future = await self.queue.get()
+            try:
+                if future.done():  # the caller went away while the job was queued
+                    continue
+                self.busy += 1
+                started = time.perf_counter()
+                try:
+                    with correlation_scope(request_id):
+                        result = await job()
+                    if not future.done():
+                        future.set_result(result)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self.busy -= 1
+                    self._service_times.append(time.perf_counter() - started)
+            finally:
+                self.queue.task_done()
+
+    async def drain(self, timeout):
+        """Wait for queued and running jobs, then stop the workers; False if the timeout hit first."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            drained = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        return drained
+
+
+def _decode_image(payload):
+    data = payload.get("image_base64")
+    if not data:
+        return None
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPError(400, "image_base64 is not valid base64")
+
+
+async def _require_public_url(url):
+    from core.fetchers import check_public_url, BlockedURL
+    try:
+        await asyncio.to_thread(check_public_url, url)
+    except BlockedURL as e:
+        raise HTTPError(400, str(e))
+
+
+# Route handlers validate the request on the event loop and return a coroutine function
+# for the worker pool, so malformed requests never take a queue slot.
+
+def _score_job(payload, request_id):
+    claim = payload.get("claim")
+    if not isinstance(claim, str) or not claim.strip():
+        raise HTTPError(400, "'claim' is required")
+
+    async def job():
+        from core.analysis import score_claim_async
+        return Response.json(await score_claim_async(claim, bool(payload.get("brutality_mode")),
+                                                     bool(payload.get("bypass_cache"))))
+    return job
+
+
+def _evaluate_job(payload, request_id):
+    claim, url = payload.get("claim") or "", payload.get("url") or None
+    if not isinstance(claim, str) or not (url is None or isinstance(url, str)):
+        raise HTTPError(400, "'claim' and 'url' must be strings")
+    image_bytes = _decode_image(payload)
+    if not (claim.strip() or url or image_bytes):
+        raise HTTPError(400, "Provide a claim, url or image_base64")
+
+    async def job():
+        from core.pipeline import evaluate
+        if url:
+            await _require_public_url(url)
+        run = await asyncio.to_thread(evaluate, claim, url, image_bytes, bool(payload.get("brutality_mode")),
+                                      payload.get("save", True), request_id)
+        return Response.json(run)
+    return job
+
+
+def _url_job(payload, request_id):
+    url = payload.get("url")
+    if not isinstance(url, str) or not url.strip():
+        raise HTTPError(400, "'url' is required")
+
+    async def job():
+        from core.fetchers import fetch_url_text_async
+        await _require_public_url(url)
+        return Response.json({"url_text": await fetch_url_text_async(url)})
+    return job
+
+
+def _image_job(payload, request_id):
+    image_bytes = _decode_image(payload)
+    if not image_bytes:
+        raise HTTPError(400, "'image_base64' is required")
+
+    async def job():
+        from core.fetchers import analyze_image_async
+        analysis = await analyze_image_async(io.BytesIO(image_bytes), bool(payload.get("bypass_cache")))
+        return Response.json({"image_analysis": analysis})
+    return job
+
+
+def _seal_job(payload, request_id):
+    verdict_text = payload.get("verdict_text")
+    if not isinstance(verdict_text, str) or not verdict_text.strip():
+        raise HTTPError(400, "'verdict_text' is required")
+
+    async def job():
+        from rendering.seal import render_evalia_seal
+        logo_path = SEAL_LOGO if payload.get("with_logo", True) else None
+        png = await asyncio.to_thread(render_evalia_seal, verdict_text, bool(payload.get("brutality_mode")), logo_path)
+        return Response(200, png, "image/png")
+    return job
+
+
+def _report_job(payload, request_id):
+    entry = payload.get("analysis_log")
+    if not isinstance(entry, dict):
+        raise HTTPError(400, "'analysis_log' object is required")
+
+    async def job():
+        from core.claim_output.pdf_report import generate_pdf_report, report_filename
+        pdf = await asyncio.to_thread(generate_pdf_report, entry)
+        if pdf is None:
+            raise HTTPError(500, "PDF generation failed")
+        return Response(200, pdf, "application/pdf",
+                        {"Content-Disposition": f'attachment; filename="{report_filename(entry)}"'})
+    return job
+
+
+ROUTES = {
+    "/v1/score": _score_job,
+    "/v1/evaluate": _evaluate_job,
+    "/v1/artifacts/url": _url_job,
+    "/v1/artifacts/image": _image_job,
+    "/v1/seal": _seal_job,
+    "/v1/report": _report_job,
+}
+OPEN_PATHS = ("/healthz", "/readyz", "/metrics")
+
+
+class EvaliaService:
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, workers=SERVICE_WORKERS,
+                 queue_size=SERVICE_QUEUE_SIZE, drain_timeout=SERVICE_DRAIN_TIMEOUT,
+                 max_body_bytes=SERVICE_MAX_BODY_BYTES, read_timeout=SERVICE_READ_TIMEOUT, token=SERVICE_TOKEN):
+        self.host = host
+        self.port = port
+        self.pool = WorkerPool(workers, queue_size)
+        self.drain_timeout = drain_timeout
+        self.max_body_bytes = max_body_bytes
+        self.read_timeout = read_timeout
+        self.token = token
+        self.draining = False
+        self._server = None
+        self._connections = set()
+        self._in_flight = 0
+        self._stopped = None
+
+    async def start(self):
+        if not self.token and not _is_loopback(self.host):
+            raise RuntimeError(f"Set EVALIA_SERVICE_TOKEN to listen on {self.host}; "
+                               "without a token the service only binds to loopback")
+        self._stopped = asyncio.Event()
+        self.pool.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Evalia service listening on http://%s:%d (%d workers, queue %d)",
+                    self.host, self.port, self.pool.workers, self.pool.queue.maxsize)
+        return self
+
+    async def serve_forever(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, lambda: asyncio.ensure_future(self.shutdown()))
+            except (NotImplementedError, RuntimeError):  # not on Windows / not the main thread
+                pass
+        await self._stopped.wait()
+
+    async def shutdown(self):
+        """Graceful drain: refuse new work, finish what was accepted, then close."""
+        if self.draining:
+            return
+        self.draining = True
+        logger.info("Draining: %d queued, %d running", self.pool.queue.qsize(), self.pool.busy)
+        self._server.close()
+        drained = await self.pool.drain(self.drain_timeout)
+        # Let handlers whose jobs just finished write their responses.
+        deadline = time.monotonic() + 5
+        while self._in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for writer in list(self._connections):
+            writer.close()
+        logger.info("Service stopped (%s)", "drained" if drained else "drain timed out")
+        self._stopped.set()
+
+    def readiness(self):
+        if self.draining:
+            status = "draining"
+        elif self.pool.queue.full():
+            status = "saturated"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "queue_depth": self.pool.queue.qsize(),
+            "queue_size": self.pool.queue.maxsize,
+            "workers": self.pool.workers,
+            "busy_workers": self.pool.busy,
+        }
+
+    async def _read_request(self, reader):
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+        except asyncio.TimeoutError:
+            return None  # idle keep-alive connection
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        try:
+            headers, body = await asyncio.wait_for(self._read_head(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, f"Request not received within {self.read_timeout:g}s")
+        return Request(method.upper(), urlsplit(target).path.rstrip("/") or "/", headers, body)
+
+    async def _read_head(self, reader):
+        headers = {}
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Chunked request bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f"Body exceeds {self.max_body_bytes} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return headers, body
+
+    def _authorized(self, request):
+        if not self.token:
+            return True
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), self.token.encode())
+
+    async def _dispatch(self, request, request_id):
+        if request.path == "/healthz":
+            return Response.json({"status": "ok"})
+        if request.path == "/readyz":
+            readiness = self.readiness()
+            return Response.json(readiness, 200 if readiness["status"] == "ready" else 503)
+        if request.path == "/metrics":
+            return Response(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        route = ROUTES.get(request.path)
+        if route is None:
+            raise HTTPError(404, f"No route for {request.path}")
+        if not self._authorized(request):
+            raise HTTPError(401, "Missing or invalid bearer token", {"WWW-Authenticate": "Bearer"})
+        if request.method != "POST":
+            raise HTTPError(405, "Use POST", {"Allow": "POST"})
+        if self.draining:
+            raise HTTPError(503, "Service is shutting down", {"Retry-After": "5"})
+        job = route(request.json(), request_id)
+        try:
+            future = self.pool.submit(job, request_id)
+        except asyncio.QueueFull:
+            retry_after = self.pool.retry_after()
+            raise HTTPError(429, "Request queue is full", {"Retry-After": str(retry_after)})
+        try:
+            return await future
+        finally:
+            future.cancel()  # no-op once done; frees the slot if we were cancelled while queued
+
+    async def _handle_connection(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write(writer, Response.json({"error": str(e)}, e.status, e.headers), False)
+                    return
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if request is None:
+                    return
+                self._in_flight += 1
+                started = time.perf_counter()
+                request_id = request.headers.get("x-request-id") or new_correlation_id()
+                try:
+                    response = await self._dispatch(request, request_id)
+                except HTTPError as e:
+                    response = Response.json({"error": str(e)}, e.status, e.headers)
+                except Exception as e:
+                    logger.error("Service error on %s", request.path, exc_info=True)
+                    response = Response.json({"error": f"Internal error: {e}"}, 500)
+                finally:
+                    self._in_flight -= 1
+                response.headers["X-Request-ID"] = request_id
+                keep_alive = request.keep_alive and not self.draining
+                await self._write(writer, response, keep_alive)
+                path = request.path if request.path in ROUTES or request.path in OPEN_PATHS else "other"
+                metrics.observe(f"service{path.replace('/', '_')}", time.perf_counter() - started)
+                metrics.inc("service_responses_total", path=path, status=response.status)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _write(self, writer, response, keep_alive):
+        head = [f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}",
+                f"Content-Type: {response.content_type}",
+                f"Content-Length: {len(response.body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{name}: {value}" for name, value in response.headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(**kwargs):
+    # Same one-time setup the Streamlit app does in shared_resources().
+    from core.analysis import similarity_index
+    await asyncio.to_thread(initialize_memory)
+    await asyncio.to_thread(similarity_index.refresh)
+    service = await EvaliaService(**kwargs).start()
+    await service.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Evalia scoring service.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE)
+    parser.add_argument("--drain-timeout", type=float, default=SERVICE_DRAIN_TIMEOUT)
+    args = parser.parse_args(argv)
+    asyncio.run(serve(host=args.host, port=args.port, workers=args.workers,
+                      queue_size=args.queue_size, drain_timeout=args.drain_timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
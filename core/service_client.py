@@ -0,0 +1,77 @@
+"""Client for the standalone scoring service (core.service), used when EVALIA_SERVICE_URL is set."""
+import base64
+import time
+from core.logging_config import configure_evalia_logger, correlation_id_var
+from core.api_config import SERVICE_URL, SERVICE_TOKEN, SERVICE_CLIENT_TIMEOUT, SERVICE_CLIENT_RETRIES
+from core.resources import resource
+
+logger = configure_evalia_logger()
+
+# Longest Retry-After we'll sit through before giving the user an error instead.
+MAX_RETRY_WAIT = 30
+
+class ServiceError(Exception):
+    pass
+
+
+@resource("service_client", close=lambda client: client.close())
+def _get_client():
+    import httpx
+    headers = {"Authorization": f"Bearer {SERVICE_TOKEN}"} if SERVICE_TOKEN else None
+    return httpx.Client(base_url=SERVICE_URL, headers=headers,
+                        timeout=httpx.Timeout(SERVICE_CLIENT_TIMEOUT, connect=5.0))
+
+
+def _post(path, payload, retries=SERVICE_CLIENT_RETRIES):
+    """POST JSON to the service, waiting out 429/503 (per Retry-After) up to `retries` times."""
+    import httpx
+    headers = {}
+    if correlation_id_var.get():
+        headers["X-Request-ID"] = correlation_id_var.get()
+    for attempt in range(retries + 1):
+        try:
+            response = _get_client().post(path, json=payload, headers=headers)
+        except httpx.HTTPError as e:
+            raise ServiceError(f"Evalia service unreachable at {SERVICE_URL}: {e}") from e
+        if response.status_code in (429, 503) and attempt < retries:
+            wait = min(float(response.headers.get("Retry-After", "1") or 1), MAX_RETRY_WAIT)
+            logger.warning("Service busy (%d) on %s, retrying in %.0fs", response.status_code, path, wait)
+            time.sleep(wait)
+            continue
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("error", response.text)
+            except ValueError:
+                detail = response.text
+            raise ServiceError(f"Evalia service returned {response.status_code}: {detail}")
+        return response
+    raise ServiceError("Evalia service is busy; try again shortly")
+
+
+def evaluate_remote(claim, url=None, image_bytes=None, brutality_mode=False, save=True):
+    """core.pipeline.evaluate, run by the service; same return shape."""
+    payload = {"claim": claim, "url": url or None, "brutality_mode": bool(brutality_mode), "save": save}
+    if image_bytes:
+        payload["image_base64"] = base64.b64encode(image_bytes).decode("ascii")
+    return _post("/v1/evaluate", payload).json()
+
+
+def score_claim_remote(text, brutality_mode=False, bypass_cache=False):
+    return _post("/v1/score", {"claim": text, "brutality_mode": brutality_mode, "bypass_cache": bypass_cache}).json()
+
+
+def seal_png_remote(verdict_text, brutality_mode=False):
+    return _post("/v1/seal", {"verdict_text": verdict_text, "brutality_mode": brutality_mode}).content
+
+
+def pdf_report_remote(analysis_log):
+    return _post("/v1/report", {"analysis_log": analysis_log}).content
+
+
+def service_ready():
+    """The service's /readyz payload, or None when it can't be reached."""
+    import httpx
+    try:
+        return _get_client().get("/readyz").json()
+    except (httpx.HTTPError, ValueError):
+        return None
@@ -0,0 +1,239 @@
+"""Near-duplicate claim index: MinHash signatures over word shingles, bucketed with LSH.
+
+Reworded reposts ("BREAKING: ...", different punctuation, a reordered sentence) share most
+of their word shingles, so their MinHash signatures agree in most slots. Signatures are
+split into bands; any stored evaluation sharing a whole band with the query is a candidate,
+and the fraction of agreeing slots estimates the Jaccard similarity.
+
+Signatures are persisted next to the evaluations (table evaluation_minhash) so a restart
+only reloads them; rows written by other processes are picked up on the next refresh.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from core.logging_config import configure_evalia_logger
+from core.api_config import (SIMILARITY_THRESHOLD, SIMILARITY_NUM_PERM, SIMILARITY_BANDS,
+                             SIMILARITY_SHINGLE_SIZE, SIMILARITY_REFRESH_SECONDS)
+from core.memory_store import get_memory_store
+from core.pipeline import build_text_blob
+
+logger = configure_evalia_logger()
+
+MATCH_LABEL = "matched prior evaluation"
+_PRIME = (1 << 61) - 1
+
+
+def shingles(cleaned, size=SIMILARITY_SHINGLE_SIZE):
+    """Lower-cased word n-grams of sanitized text; punctuation and spacing don't matter."""
+    words = re.findall(r"\w+", cleaned.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def index_text(entry):
+    """The scoring input an entry stands for, or None if it can't be reconstructed.
+
+    Fetched URL text isn't stored with the entry, so URL evaluations aren't indexed.
+    Failed and already-matched results aren't either.
+    """
+    analysis = entry.get("analysis")
+    if entry.get("url") or not isinstance(analysis, dict) or "error" in analysis:
+        return None
+    if not analysis.get("verdict") or "matched_prior_evaluation" in analysis:
+        return None
+    return build_text_blob(entry.get("claim", ""), None, entry.get("image_analysis"))
+
+
+class MinHasher:
+    def __init__(self, num_perm=SIMILARITY_NUM_PERM, seed=1):
+        import numpy as np  # deferred: only needed once something is signed
+        rng = np.random.RandomState(seed)
+        # a < 2**31 and 32-bit shingle hashes keep a*h + b inside uint64.
+        self.a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        import numpy as np
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set),
+        )
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+class SimilarityIndex:
+    def __init__(self, normalize, threshold=SIMILARITY_THRESHOLD, num_perm=SIMILARITY_NUM_PERM,
+                 bands=SIMILARITY_BANDS, refresh_seconds=SIMILARITY_REFRESH_SECONDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.normalize = normalize
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.refresh_seconds = refresh_seconds
+        self.num_perm = num_perm
+        self._hasher = None
+        self._lock = threading.RLock()
+        self._ids, self._personas = [], []
+        self._positions = {}
+        self._signatures = None  # (capacity, num_perm) uint32, allocated on first insert
+        self._buckets = [dict() for _ in range(bands)]
+        self._scanned_to = 0  # highest evaluation id already signed (or skipped)
+        self._loaded_to = 0   # highest signature row already in memory
+        self._synced_at = None
+        self._stats = {"lookups": 0, "matches": 0, "indexed": 0}
+
+    def _connect(self):
+        store = get_memory_store()
+        store.initialize()
+        conn = sqlite3.connect(store.db_path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS evaluation_minhash ("
+            "id INTEGER PRIMARY KEY, persona TEXT, signature BLOB)"
+        )
+        return conn
+
+    @property
+    def hasher(self):
+        if self._hasher is None:
+            self._hasher = MinHasher(self.num_perm)
+        return self._hasher
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def signature_for(self, text):
+        shingle_set = shingles(self.normalize(text))
+        return self.hasher.signature(shingle_set) if shingle_set else None
+
+    def _insert(self, entry_id, persona, signature):
+        if entry_id in self._positions:
+            return
+        capacity = 0 if self._signatures is None else len(self._signatures)
+        if len(self._ids) == capacity:
+            import numpy as np
+            grown = np.zeros((max(1024, 2 * capacity), self.num_perm), dtype=np.uint32)
+            if capacity:
+                grown[:len(self._ids)] = self._signatures[:len(self._ids)]
+            self._signatures = grown
+        pos = len(self._ids)
+        self._signatures[pos] = signature
+        self._ids.append(entry_id)
+        self._personas.append(persona)
+        self._positions[entry_id] = pos
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(pos)
+
+    def _sign_entry(self, entry):
+        text = index_text(entry)
+        return self.signature_for(text) if text else None
+
+    def refresh(self):
+        """Sign evaluations that have no signature yet, then load signatures not yet in memory."""
+        conn = self._connect()
+        try:
+            with self._lock:
+                scanned_to, loaded_to = self._scanned_to, self._loaded_to
+            top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM evaluations").fetchone()[0]
+            rows = conn.execute(
+                "SELECT e.id, e.persona, e.entry FROM evaluations e "
+                "LEFT JOIN evaluation_minhash m ON m.id = e.id "
+                "WHERE e.id > ? AND e.id <= ? AND m.id IS NULL ORDER BY e.id", (scanned_to, top),
+            ).fetchall()
+            if rows:
+                signed = []
+                for entry_id, persona, payload in rows:
+                    signature = self._sign_entry(json.loads(payload))
+                    # Unindexable rows get a NULL signature so they aren't rescanned.
+                    signed.append((entry_id, persona, signature.tobytes() if signature is not None else None))
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO evaluation_minhash (id, persona, signature) VALUES (?, ?, ?)", signed)
+            loaded = conn.execute(
+                "SELECT id, persona, signature FROM evaluation_minhash "
+                "WHERE id > ? AND signature IS NOT NULL ORDER BY id", (loaded_to,),
+            ).fetchall()
+        finally:
+            conn.close()
+        import numpy as np
+        with self._lock:
+            for entry_id, persona, blob in loaded:
+                self._insert(entry_id, persona, np.frombuffer(blob, dtype=np.uint32))
+            self._scanned_to = max(self._scanned_to, top)
+            if loaded:
+                self._loaded_to = max(self._loaded_to, loaded[-1][0])
+            self._synced_at = time.monotonic()
+            self._stats["indexed"] = len(self._ids)
+        if rows or loaded:
+            logger.info("Similarity index: signed %d new evaluations, %d entries indexed", len(rows), len(self._ids))
+
+    def _maybe_refresh(self):
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.refresh_seconds:
+            self.refresh()
+
+    def add(self, entry_id, entry):
+        """Index one freshly saved evaluation (called from save_to_memory)."""
+        signature = self._sign_entry(entry)
+        persona = entry.get("persona_used") or ("brutal" if entry.get("brutality_mode") else "stoic")
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO evaluation_minhash (id, persona, signature) VALUES (?, ?, ?)",
+                             (entry_id, persona, signature.tobytes() if signature is not None else None))
+        finally:
+            conn.close()
+        if signature is not None:
+            with self._lock:
+                self._insert(entry_id, persona, signature)
+                self._stats["indexed"] = len(self._ids)
+
+    def nearest(self, cleaned, persona):
+        """(evaluation_id, estimated_similarity) of the closest indexed evaluation, or None."""
+        self._maybe_refresh()
+        shingle_set = shingles(cleaned)
+        if not shingle_set:
+            return None
+        signature = self.hasher.signature(shingle_set)
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(key, ()))
+            candidates = [pos for pos in candidates if self._personas[pos] == persona]
+            if not candidates:
+                return None
+            agreement = (self._signatures[candidates] == signature).mean(axis=1)
+            best = int(agreement.argmax())
+            return self._ids[candidates[best]], float(agreement[best])
+
+    def find_prior(self, cleaned, brutality_mode):
+        """Stored analysis for a near-duplicate above the threshold, labelled as a match; else None."""
+        persona = "brutal" if brutality_mode else "stoic"
+        match = self.nearest(cleaned, persona)
+        with self._lock:
+            self._stats["lookups"] += 1
+        if match is None or match[1] < self.threshold:
+            return None
+        entry = get_memory_store().get(match[0])
+        analysis = (entry or {}).get("analysis")
+        if not isinstance(analysis, dict) or not analysis.get("verdict"):
+            return None
+        with self._lock:
+            self._stats["matches"] += 1
+        logger.info("Near-duplicate of evaluation %d (similarity %.2f)", match[0], match[1])
+        return {
+            **analysis,
+            "matched_prior_evaluation": {
+                "label": MATCH_LABEL,
+                "evaluation_id": match[0],
+                "similarity": round(match[1], 3),
+                "evaluated_at": entry.get("timestamp"),
+            },
+        }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,78 @@
+"""Incremental parser that surfaces top-level JSON members as soon as they close."""
+import json
+
+
+class IncrementalJSONParser:
+    """Feed text chunks of a single JSON object; get back (key, value) pairs as each
+    top-level member completes.
+
+    Every character is scanned exactly once, so total work is linear in the response
+    length regardless of chunking. Text before the first "{" (code fences, "Here is
+    the JSON:") is ignored.
+    """
+
+    def __init__(self):
+        self._chunks = []        # everything fed so far; joined only when .text is read
+        self._member = []        # pieces of the member still open, from earlier chunks
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.finished = False
+        self.fields = {}
+
+    def feed(self, chunk):
+        if self.finished or not chunk:
+            return []
+        self._chunks.append(chunk)
+        emitted = []
+        member_start = 0         # where the open member resumes within this chunk
+        for i, ch in enumerate(chunk):
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self._depth = 1
+                    member_start = i + 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    emitted.extend(self._close_member(chunk[member_start:i]))
+                    self.finished = True
+                    return emitted
+            elif ch == "," and self._depth == 1:
+                emitted.extend(self._close_member(chunk[member_start:i]))
+                member_start = i + 1
+        if self.started:
+            self._member.append(chunk[member_start:])
+        return emitted
+
+    def _close_member(self, tail):
+        self._member.append(tail)
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return []  # leave it to the full parse at the end
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+    @property
+    def text(self):
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
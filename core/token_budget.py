@@ -0,0 +1,157 @@
+"""Token budget for the scoring prompt: clean, dedupe and trim each source to its share.
+
+Sources, in priority order: the claim, fetched URL text, and the image analysis's
+extracted text, description and assessment. Each gets a configurable share of the
+budget; shares a source doesn't need are handed to the others (water-filling), so a
+short claim leaves more room for the article and vice versa.
+
+Tokens are counted with tiktoken when it is installed (and its encoding is available
+offline), otherwise with the ~4 characters per token rule of thumb.
+"""
+import math
+import re
+import threading
+from core.logging_config import configure_evalia_logger
+from core.api_config import SCORING_INPUT_TOKEN_BUDGET, SCORING_BUDGET_SHARES
+
+logger = configure_evalia_logger()
+
+SOURCES = ("claim", "url_text", "image_extracted_text", "image_description", "image_assessment")
+TRUNCATION_MARK = " [...]"
+# Lines/sentences shorter than this are only dropped as exact repeats, never as substrings.
+MIN_SUBSTRING_DEDUPE_CHARS = 20
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.encoding_for_model("gpt-4o")
+                except Exception:  # not installed, or the BPE file can't be fetched offline
+                    _encoding = False
+                    logger.info("tiktoken unavailable; using the 4-chars-per-token estimate")
+    return _encoding or None
+
+
+def tokenizer_name():
+    encoding = _get_encoding()
+    return f"tiktoken:{encoding.name}" if encoding else "heuristic:4cpt"
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens (including the truncation mark), on a word boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    room = max_tokens - count_tokens(TRUNCATION_MARK)
+    if room <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:room])
+    else:
+        cut = text[:room * 4]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def normalize_whitespace(text):
+    lines = [" ".join(line.split()) for line in (text or "").splitlines()]
+    return "\n".join(line for line in lines if line).strip()
+
+
+def _fingerprint(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def dedupe_units(text, seen, earlier):
+    """Drop lines/sentences already seen, or contained in an earlier source (OCR of the claim, etc.)."""
+    kept = []
+    for unit in re.split(r"\n+|(?<=[.!?])\s+", text):
+        fp = _fingerprint(unit)
+        if not fp or fp in seen or (len(fp) >= MIN_SUBSTRING_DEDUPE_CHARS and fp in earlier):
+            continue
+        seen.add(fp)
+        kept.append(unit.strip())
+    return " ".join(kept)
+
+
+def allocate(needs, shares, budget):
+    """Split budget by share; whatever a source doesn't need is redistributed to the rest."""
+    allocation = {name: 0 for name in needs}
+    active = {name for name, need in needs.items() if need > 0}
+    remaining = budget
+    while active:
+        weights = {name: shares.get(name, 0.0) for name in active}
+        total = sum(weights.values())
+        if total <= 0:
+            weights, total = {name: 1.0 for name in active}, float(len(active))
+        fair = {name: remaining * weights[name] / total for name in active}
+        satisfied = {name for name in active if needs[name] <= fair[name]}
+        if not satisfied:
+            for name in active:
+                allocation[name] = int(fair[name])
+            break
+        for name in satisfied:
+            allocation[name] = needs[name]
+            remaining -= needs[name]
+        active -= satisfied
+    return allocation
+
+
+def budget_sources(sources, budget=SCORING_INPUT_TOKEN_BUDGET, shares=SCORING_BUDGET_SHARES):
+    """Clean and trim {source: text} to fit budget; returns (trimmed_sources, report).
+
+    report["sources"][name] records original/used/dropped tokens per source.
+    """
+    cleaned, seen, earlier = {}, set(), ""
+    original = {}
+    for name in SOURCES:
+        text = sources.get(name) or ""
+        original[name] = count_tokens(text)
+        text = normalize_whitespace(text)
+        if name != "claim" and text:
+            text = dedupe_units(text, seen, earlier)
+        elif text:
+            seen.update(_fingerprint(u) for u in re.split(r"\n+|(?<=[.!?])\s+", text))
+        earlier += " | " + _fingerprint(text)
+        cleaned[name] = text
+    needs = {name: count_tokens(text) for name, text in cleaned.items()}
+    allocation = allocate(needs, shares, budget)
+    trimmed, per_source = {}, {}
+    for name in SOURCES:
+        text = truncate_to_tokens(cleaned[name], allocation[name]) if needs[name] > allocation[name] else cleaned[name]
+        trimmed[name] = text
+        used = count_tokens(text)
+        if original[name]:
+            per_source[name] = {
+                "original_tokens": original[name],
+                "after_cleanup_tokens": needs[name],
+                "allotted_tokens": allocation[name],
+                "used_tokens": used,
+                "dropped_tokens": max(0, original[name] - used),
+                "truncated": needs[name] > allocation[name],
+            }
+    report = {
+        "budget_tokens": budget,
+        "tokenizer": tokenizer_name(),
+        "used_tokens": sum(s["used_tokens"] for s in per_source.values()),
+        "dropped_tokens": sum(s["dropped_tokens"] for s in per_source.values()),
+        "sources": per_source,
+    }
+    return trimmed, report
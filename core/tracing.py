@@ -0,0 +1,209 @@
+"""Lightweight per-evaluation tracing and rolling stage metrics (Prometheus text format).
+
+    with start_trace("evaluation") as root:
+        with span("url_fetch"):
+            ...
+    analysis_log["trace"] = root.to_dict()
+
+Spans nest through a context variable, so they follow work into asyncio tasks (the
+artifact fetches, for one) and asyncio.to_thread calls, which both copy the context.
+Every finished span also feeds a rolling per-stage latency window that
+render_prometheus() exposes as p50/p95/p99.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.logging_config import configure_evalia_logger
+from core.api_config import METRICS_FILE, METRICS_EXPORT_INTERVAL, METRICS_WINDOW
+
+logger = configure_evalia_logger()
+
+_current_span = contextvars.ContextVar("evalia_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "started_at", "duration", "children", "_lock")
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.started_at = time.perf_counter()
+        self.duration = None
+        self.children = []
+        self._lock = threading.Lock()
+
+    def add_child(self, child):
+        with self._lock:
+            self.children.append(child)
+
+    def to_dict(self, origin=None):
+        origin = self.started_at if origin is None else origin
+        with self._lock:
+            children = list(self.children)
+        return {
+            "name": self.name,
+            "start_ms": round((self.started_at - origin) * 1000, 2),
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"children": [c.to_dict(origin) for c in sorted(children, key=lambda c: c.started_at)]} if children else {}),
+        }
+
+
+class MetricsRegistry:
+    """Rolling latency windows per stage plus monotonically increasing counters."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self._windows = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: [0, 0.0])  # stage -> [count, sum_seconds]
+        self._counters = defaultdict(float)
+        self._collectors = []
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._windows[stage].append(seconds)
+            total = self._totals[stage]
+            total[0] += 1
+            total[1] += seconds
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def register_collector(self, fn):
+        """fn() -> iterable of (metric_name, labels_dict, value); sampled at export time."""
+        self._collectors.append(fn)
+
+    def quantiles(self, stage, qs=(0.5, 0.95, 0.99)):
+        with self._lock:
+            values = sorted(self._windows.get(stage, ()))
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in qs}
+
+    def render_prometheus(self):
+        lines = ["# HELP evalia_stage_duration_seconds Per-stage latency (rolling window quantiles)",
+                 "# TYPE evalia_stage_duration_seconds summary"]
+        with self._lock:
+            stages = sorted(self._totals)
+            totals = {s: tuple(self._totals[s]) for s in stages}
+            counters = dict(self._counters)
+        for stage in stages:
+            for q, v in self.quantiles(stage).items():
+                lines.append(f'evalia_stage_duration_seconds{{stage="{stage}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'evalia_stage_duration_seconds_count{{stage="{stage}"}} {totals[stage][0]}')
+            lines.append(f'evalia_stage_duration_seconds_sum{{stage="{stage}"}} {totals[stage][1]:.6f}')
+        samples = [(name, dict(labels), value) for (name, labels), value in counters.items()]
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception:
+                logger.warning("Metrics collector failed", exc_info=True)
+        for name in sorted({s[0] for s in samples}):
+            # Monotonic samples follow the Prometheus "_total" naming, so rate() works on them.
+            lines.append(f"# TYPE evalia_{name} {'counter' if name.endswith('_total') else 'gauge'}")
+            for sample_name, labels, value in samples:
+                if sample_name == name:
+                    label_str = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+                    lines.append(f"evalia_{name}{{{label_str}}} {value}" if label_str else f"evalia_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+_last_export = 0.0
+_export_lock = threading.Lock()
+
+
+def _finish(s, parent):
+    if parent is not None:
+        parent.add_child(s)
+    metrics.observe(s.name, s.duration)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a stage; nests under the current span and feeds the stage's latency window."""
+    parent = _current_span.get()
+    s = Span(name, attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException:
+        s.attrs["error"] = True
+        raise
+    finally:
+        s.duration = time.perf_counter() - s.started_at
+        _current_span.reset(token)
+        _finish(s, parent)
+
+
+def record_span(name, started_at, **attrs):
+    """Record a stage timed by hand (e.g. across async-generator yields, where a with-block can't live)."""
+    s = Span(name, attrs)
+    s.started_at = started_at
+    s.duration = time.perf_counter() - started_at
+    _finish(s, _current_span.get())
+    return s
+
+
+@contextmanager
+def start_trace(name="evaluation", **attrs):
+    """Root span for one evaluation; exports metrics (throttled) when it closes."""
+    token = _current_span.set(None)
+    try:
+        with span(name, **attrs) as root:
+            yield root
+    finally:
+        _current_span.reset(token)
+        maybe_export()
+
+
+def write_prometheus(path=METRICS_FILE):
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp, "w") as f:
+        f.write(metrics.render_prometheus())
+    os.replace(tmp, path)
+
+
+def maybe_export():
+    global _last_export
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    with _export_lock:
+        if now - _last_export < METRICS_EXPORT_INTERVAL:
+            return
+        _last_export = now
+    try:
+        write_prometheus(METRICS_FILE)
+    except OSError:
+        logger.warning("Failed to write metrics to %s", METRICS_FILE, exc_info=True)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve /metrics for Prometheus scraping from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="evalia-metrics", daemon=True).start()
+    logger.info("Metrics endpoint on http://%s:%d/metrics", host, port)
+    return server
@@ -1,8 +1,7 @@
 #---Ui Components ---
 import streamlit as st
-import os  # Added import for os
 from rendering.seal import render_evalia_seal
-from core.analysis import save_to_memory
+from core.claim_output.pdf_report import entry_digest, report_filename
 
 def spicy_tldr(analysis: dict) -> str:
     verdict = analysis.get("verdict", "Result")
@@ -90,17 +89,36 @@ def set_custom_css():
         unsafe_allow_html=True,
     )
 
-def display_verdict_tab(result, analysis_log, url_text_display, brutality_mode):
-    if result and result.get("scores"):
-        scores = result["scores"]
+def _int_scores(scores):
+    # Streamed scores arrive before validation, so they may still be strings.
+    out = {}
+    for key, val in (scores or {}).items():
+        try:
+            out[key] = int(val)
+        except (ValueError, TypeError):
+            out[key] = 0
+    return out
+
+def _verdict_sections(result, analysis_log, url_text_display, brutality_mode, complete=True):
+    """Render whatever fields of result are present; complete=False while still streaming."""
+    pending = "_Analyzing..._"
+    scores = _int_scores(result.get("scores"))
+    if scores:
         avg_reasonableness = int(sum(scores.values()) / len(scores))
         confidence = avg_reasonableness * 10
         st.markdown(f"### Persona: {'Brutal' if brutality_mode else 'Stoic'}")
         st.markdown(f"**Overall Reasonableness:** {avg_reasonableness}/10")
         st.markdown(f"**Confidence Level:** {confidence}%")
         st.progress(float(scores.get("overall_reasonableness", 0)) / 10.0)
+    if result.get("verdict") or result.get("claim_summary"):
         st.info(f"**📋 Summary:** {spicy_tldr(result)}")
+    prior = result.get("matched_prior_evaluation")
+    if prior:
+        st.caption(f"🔁 {prior.get('label', 'matched prior evaluation').capitalize()} "
+                   f"#{prior.get('evaluation_id')} from {str(prior.get('evaluated_at') or 'an earlier run')[:10]} "
+                   f"— similarity {prior.get('similarity', 0):.0%}")
 
+    if scores:
         st.markdown("### 🚪 Gates of Reason")
         gates = [
             ("🧠 Logic", "logic"),
@@ -112,19 +130,23 @@ def display_verdict_tab(result, analysis_log, url_text_display, brutality_mode):
             val = scores.get(key, 0)
             color = "🟢" if val >= 7 else "🟡" if val >= 4 else "🔴"
             with st.expander(f"{color} {label} — {val}/10", expanded=True):  # Expanded by default for thoroughness
-                st.markdown(result.get("reasoning", {}).get(key, "_No detailed analysis available._"))
+                missing = "_No detailed analysis available._" if complete else pending
+                st.markdown(result.get("reasoning", {}).get(key, missing))
 
-        # New section for additional metrics
+    # New section for additional metrics
+    metrics = [
+        ("Grounding Meter", "grounding_meter", "_No grounding available._"),
+        ("Emotion Meter", "emotion_meter", "_No emotion analysis available._"),
+        ("AI Origin Likelihood", "ai_origin", "_No AI origin analysis available._"),
+        ("Detected Style", "detected_style", "_No style detection available._"),
+    ]
+    if complete or any(key in result for _, key, _ in metrics):
         st.markdown("### 📊 Additional Metrics")
-        with st.expander("Grounding Meter", expanded=True):
-            st.markdown(result.get("grounding_meter", "_No grounding available._"))
-        with st.expander("Emotion Meter", expanded=True):
-            st.markdown(result.get("emotion_meter", "_No emotion analysis available._"))
-        with st.expander("AI Origin Likelihood", expanded=True):
-            st.markdown(result.get("ai_origin", "_No AI origin analysis available._"))
-        with st.expander("Detected Style", expanded=True):
-            st.markdown(result.get("detected_style", "_No style detection available._"))
+        for label, key, missing in metrics:
+            with st.expander(label, expanded=True):
+                st.markdown(result.get(key, missing if complete else pending))
 
+    if complete:
         st.markdown("### Trial of Evidence")
         if url_text_display:
             st.subheader("Artifact: Extracted URL Text")
@@ -137,27 +159,56 @@ def display_verdict_tab(result, analysis_log, url_text_display, brutality_mode):
                 f"Assessment: {analysis_log['image_analysis'].get('assessment','')}"
             )
 
+    if complete or "suggested_research" in result:
         st.markdown("### The Missing Piece: Suggested Research")
         for point in result.get("suggested_research", []):
             st.markdown(f"- {point}")
 
-        # New section for sources
+    # New section for sources
+    if complete or "relevant_sources" in result:
         st.markdown("### 🔗 Relevant Sources")
         for source in result.get("relevant_sources", []):
             st.markdown(f"- [{source.get('annotation', 'No description')}]({source.get('url', '#')})")
 
+    if complete or "final_commentary" in result:
         st.markdown("### Final Commentary")
         st.markdown(result.get("final_commentary", "_No commentary available._"))
 
+    if complete:
         st.markdown("## Seal of Passage")
         verdict_line = spicy_tldr(result)
         seal_png = render_evalia_seal(verdict_line, brutality_mode, "static/Evalia Logo Silver.png")
         st.image(seal_png, caption="Evalia Seal of Passage", width=300)
 
         # Removed the full JSON expander to avoid redundancy
+
+@st.fragment
+def display_verdict_tab(result, analysis_log, url_text_display, brutality_mode):
+    if result and result.get("upstream_unavailable"):
+        st.error(f"🚧 {result.get('error')}. Your claim wasn't scored; please try again in a moment.")
+    elif result and result.get("scores"):
+        _verdict_sections(result, analysis_log, url_text_display, brutality_mode)
     else:
         st.warning("⚠️ Analysis failed or no valid scores generated. Please try a clearer claim or check logs for details.")
 
+def display_verdict_stream(events, analysis_log, url_text_display, brutality_mode):
+    """Render the verdict progressively from score_claim_stream events; returns the final result.
+
+    Only the in-progress view is drawn here; the finished verdict is drawn by display_verdict_tab.
+    """
+    placeholder = st.empty()
+    partial, result = {}, None
+    for event in events:
+        if event[0] == "field":
+            partial[event[1]] = event[2]
+            with placeholder.container():
+                _verdict_sections(partial, analysis_log, url_text_display, brutality_mode, complete=False)
+        else:
+            result = event[1]
+    placeholder.empty()
+    return result
+
+@st.fragment
 def display_evidence_tab(url_text_display, img_analysis):
     if url_text_display:
         st.subheader("Extracted URL Text")
@@ -172,19 +223,27 @@ def display_evidence_tab(url_text_display, img_analysis):
     if not url_text_display and not img_analysis:
         st.write("_No evidence inputs provided._")
 
-def display_export_tab(analysis_log, generate_pdf_report, logger):
+@st.fragment
+def display_export_tab(analysis_log, generate_pdf_report, logger, memory_id=None):
     if analysis_log.get("scores") or analysis_log.get("image_analysis"):
-        save_to_memory(analysis_log)
-        st.success("✅ Analysis saved to memory.")
-        pdf_generated = generate_pdf_report(analysis_log)
-        if pdf_generated and os.path.exists(pdf_generated):
-            with open(pdf_generated, "rb") as f:
+        # memory_id is what save_to_memory returned: None when the save failed or was skipped.
+        if memory_id is not None:
+            st.success("✅ Analysis saved to memory.")
+        else:
+            st.warning("⚠️ This analysis was not saved to memory.")
+        pdf_key = f"pdf_ready_{entry_digest(analysis_log)}"
+        if not st.session_state.get(pdf_key):
+            if st.button("📄 Prepare PDF Report", key=f"prepare_{pdf_key}", use_container_width=True):
+                st.session_state[pdf_key] = True
+        if st.session_state.get(pdf_key):
+            pdf_bytes = generate_pdf_report(analysis_log)
+            if pdf_bytes:
                 st.download_button(
                     label="📄 Download PDF Report",
-                    data=f,
-                    file_name=pdf_generated,
+                    data=pdf_bytes,
+                    file_name=report_filename(analysis_log),
                     mime="application/pdf",
                     use_container_width=True
                 )
-        else:
-            st.warning("PDF generation failed.")
\ No newline at end of file
+            else:
+                st.warning("PDF generation failed.")
@@ -1,17 +1,39 @@
+import time
 import streamlit as st
-from datetime import datetime, timezone
-from core.logging_config import configure_evalia_logger
-from core.api_config import initialize_memory, OPENAI_API_KEY
-from core.analysis import score_claim
-from core.fetchers import fetch_url_text, analyze_image
-from rendering.seal import render_evalia_seal
+from core.logging_config import configure_evalia_logger, correlation_scope, new_correlation_id
+from core.api_config import (initialize_memory, OPENAI_API_KEY, STREAM_SCORING, METRICS_PORT, SERVICE_URL,
+                             JOB_QUEUE, JOB_WORKERS, JOB_POLL_SECONDS)
+from core.analysis import iter_score_claim, similarity_index
+from core.pipeline import evaluate
+from core.service_client import evaluate_remote, ServiceError
+from core.jobs import get_job_queue, launch_worker_pool, QUEUED, FAILED, FINISHED
+from core.tracing import start_metrics_server
+from core.fetchers import get_http_session
+from core.memory_store import get_memory_store
+from rendering.seal import get_seal_renderer
 from core.claim_output.pdf_report import generate_pdf_report
-from core.ui.ui_components import spicy_tldr, set_custom_css, display_verdict_tab, display_evidence_tab, display_export_tab
+from core.ui.ui_components import set_custom_css, display_verdict_tab, display_verdict_stream, display_evidence_tab, display_export_tab
+
+@st.cache_resource(show_spinner=False)
+def shared_resources():
+    """Process-wide clients and renderers, created once rather than on every rerun."""
+    initialize_memory()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    similarity_index.refresh()
+    return {
+        "memory_store": get_memory_store(),
+        "http_session": get_http_session(),
+        "seal_renderer": get_seal_renderer(),
+        "similarity_index": similarity_index,
+        # One worker pool per server process, shared by every session.
+        "job_workers": launch_worker_pool(JOB_WORKERS) if JOB_QUEUE and JOB_WORKERS else None,
+    }
 
 # Initialize
 logger = configure_evalia_logger()
-initialize_memory()
 st.set_page_config(page_title="Evalia - Claim Evaluator", layout="wide")
+shared_resources()
 set_custom_css()
 
 # UI
@@ -25,68 +47,121 @@ with col1:
 with col2:
     image_file = st.file_uploader("Upload an image or meme (optional)", type=["png", "jpg", "jpeg"], help="Upload visual content to analyze")
 
+def run_evaluation(claim_input, url_input, image_bytes, brutality_mode):
+    """Run the pipeline once and return everything the result tabs need."""
+    if SERVICE_URL:
+        return _run_remote_evaluation(claim_input, url_input, image_bytes, brutality_mode)
+    return _run_evaluation(claim_input, url_input, image_bytes, brutality_mode)
+
+def _run_remote_evaluation(claim_input, url_input, image_bytes, brutality_mode):
+    """Hand the whole evaluation to the scoring service (EVALIA_SERVICE_URL); None if it failed."""
+    run_id = new_correlation_id()
+    with correlation_scope(run_id), st.spinner("🧠 Evaluating on the Evalia service..."):
+        try:
+            run = evaluate_remote(claim_input, url_input, image_bytes, brutality_mode)
+        except ServiceError as e:
+            logger.error("Remote evaluation %s failed: %s", run_id, str(e))
+            st.error(f"❌ {e}")
+            return None
+    run.update({"image_bytes": image_bytes, "brutality_mode": brutality_mode})
+    st.success("✅ Analysis complete!")
+    return run
+
+def await_job(job_id):
+    """Poll a queued evaluation until it finishes; returns its run, or None if it failed or is gone.
+
+    Safe to call again after any rerun, reload or reconnect: the job keeps running in a
+    worker process, and this just picks it up by id.
+    """
+    queue = get_job_queue()
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    while True:
+        job = queue.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            break
+        if job["status"] == QUEUED:
+            ahead = job["queue_position"]
+            status_text.text(f"⏳ Waiting for a worker ({ahead} ahead)..." if ahead else job["progress"])
+            progress_bar.progress(0.1)
+        else:
+            status_text.text(job["progress"])
+            progress_bar.progress(0.5)
+        time.sleep(JOB_POLL_SECONDS)
+    progress_bar.empty()
+    status_text.empty()
+    if job is None or job["status"] == FAILED:
+        del st.query_params["job"]
+        st.error(f"❌ {job['error'] if job else 'That evaluation is no longer available.'}")
+        return None
+    job = queue.get(job_id, with_image=True)
+    st.success("✅ Analysis complete!")
+    return {**job["result"], "job_id": job_id, "image_bytes": job["image_bytes"],
+            "brutality_mode": job["brutality_mode"]}
+
+def _run_evaluation(claim_input, url_input, image_bytes, brutality_mode):
+    """core.pipeline.evaluate with progress, artifact status and the streamed verdict drawn as it runs."""
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    stage_status = {"artifacts": ("🔍 Gathering artifacts...", 0.2), "score": ("🧠 Processing through AI analysis...", 0.8)}
+    artifact_labels = {"url_text": "🌐 URL content fetched", "image_analysis": "🖼️ Image analyzed"}
+
+    def on_stage(stage):
+        if stage in stage_status:
+            text, fraction = stage_status[stage]
+            status_text.text(text)
+            progress_bar.progress(fraction)
+
+    def on_artifact(name, value, finished, total):
+        status_text.text(f"{artifact_labels[name]} ({finished}/{total})")
+        progress_bar.progress(0.2 + 0.6 * finished / total)
+
+    def stream_score(text_blob, brutality_mode, analysis_log, url_text):
+        live = st.empty()
+        with live.container():
+            result = display_verdict_stream(iter_score_claim(text_blob, brutality_mode),
+                                            analysis_log, url_text, brutality_mode)
+        live.empty()
+        return result
+
+    run = evaluate(claim_input, url_input, image_bytes, brutality_mode, on_artifact=on_artifact,
+                   on_stage=on_stage, scorer=stream_score if STREAM_SCORING else None)
+    progress_bar.empty()
+    status_text.text("✅ Analysis complete!")
+    return {**run, "image_bytes": image_bytes, "brutality_mode": brutality_mode}
+
 if st.button("⚡ Cross the Threshold (Run Evaluation)", key="eval_button", use_container_width=True):
     if not (claim_input.strip() or image_file or url_input):
         st.error("❌ Please provide a claim, URL, or image to evaluate.")
     else:
-        with st.container():
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            status_text.text("🔍 Gathering artifacts...")
-            progress_bar.progress(0.2)
-
-            analysis_log = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "claim": claim_input,
-                "url": url_input,
-                "image_analysis": None,
-                "scores": {},
-                "brutality_mode": brutality_mode
-            }
-
-            text_blob = claim_input
-            url_text_display = None
-            if url_input:
-                status_text.text("🌐 Fetching URL content...")
-                progress_bar.progress(0.4)
-                url_text_display = fetch_url_text(url_input)
-                text_blob += f"\n[URL Content]: {url_text_display}"
-
-            if image_file:
-                st.image(image_file, caption="📷 Uploaded Image", use_column_width=True)
-                status_text.text("🖼️ Analyzing image...")
-                progress_bar.progress(0.6)
-                analysis_log["image_analysis"] = analyze_image(image_file)
-                text_blob += (
-                    f"\n[Image Extracted Text]: {analysis_log['image_analysis'].get('extracted_text','')}"
-                    f"\n[Image Description]: {analysis_log['image_analysis'].get('description','')}"
-                    f"\n[Image Assessment]: {analysis_log['image_analysis'].get('assessment','')}"
-                )
-
-            if text_blob.strip():
-                status_text.text("🧠 Processing through AI analysis...")
-                progress_bar.progress(0.8)
-                result = score_claim(text_blob, brutality_mode)
-                analysis_log["scores"] = result.get("scores", {})
-                analysis_log["analysis"] = result
-
-            status_text.text("✅ Analysis complete!")
-            progress_bar.progress(1.0)
-
-            import time
-            time.sleep(1)
-            progress_container = st.container()
-            progress_container.empty()
-
-            tabs = st.tabs(["🏆 Verdict (Quest)", "📋 Evidence", "📤 Export"])
-            with tabs[0]:
-                display_verdict_tab(result, analysis_log, url_text_display, brutality_mode)
-            with tabs[1]:
-                display_evidence_tab(url_text_display, analysis_log.get("image_analysis"))
-            with tabs[2]:
-                display_export_tab(analysis_log, generate_pdf_report, logger)
+        image_bytes = image_file.getvalue() if image_file else None
+        if JOB_QUEUE:
+            # The job id lives in the URL, so a reload or reconnect resumes the same job.
+            st.query_params["job"] = get_job_queue().enqueue(claim_input, url_input, image_bytes, brutality_mode)
+        else:
+            st.session_state["evalia_run"] = run_evaluation(claim_input, url_input, image_bytes, brutality_mode)
+
+job_id = st.query_params.get("job") if JOB_QUEUE else None
+if job_id and (st.session_state.get("evalia_run") or {}).get("job_id") != job_id:
+    st.session_state["evalia_run"] = await_job(job_id)
+
+# Results live in session_state, so any later widget interaction (Refine, PDF, etc.)
+# redraws them without re-running the pipeline; each tab is a fragment on top of that.
+run = st.session_state.get("evalia_run")
+if run:
+    if run["image_bytes"]:
+        st.image(run["image_bytes"], caption="📷 Uploaded Image", use_column_width=True)
+    tabs = st.tabs(["🏆 Verdict (Quest)", "📋 Evidence", "📤 Export"])
+    with tabs[0]:
+        display_verdict_tab(run["result"], run["analysis_log"], run["url_text_display"], run["brutality_mode"])
+    with tabs[1]:
+        display_evidence_tab(run["url_text_display"], run["analysis_log"].get("image_analysis"))
+    with tabs[2]:
+        display_export_tab(run["analysis_log"], generate_pdf_report, logger, run.get("memory_id"))
 
 if st.button("Refine Claim", key="refine_button"):
+    st.session_state["evalia_refining"] = True
+if st.session_state.get("evalia_refining"):
     st.text_area("Edit your claim:", value=claim_input, height=180, key="refine_claim")
     st.info("Update your claim and cross the threshold again.")
 
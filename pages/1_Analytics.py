@@ -0,0 +1,104 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import datetime, timedelta, timezone
+from core.logging_config import configure_evalia_logger
+from core.memory_store import get_memory_store
+from core.rollups import ALL_TIME, GRANULARITIES, SCORE_GATES
+from core.ui.ui_components import set_custom_css
+
+logger = configure_evalia_logger()
+st.set_page_config(page_title="Evalia - History Analytics", page_icon="📊", layout="wide")
+set_custom_css()
+
+# Every chart reads pre-aggregated buckets (core.rollups), never the raw history, so the
+# cost of this page depends on the selected window, not on how many evaluations exist.
+RANGES = {
+    "Last 24 hours": ("hour", timedelta(hours=24)),
+    "Last 7 days": ("hour", timedelta(days=7)),
+    "Last 30 days": ("day", timedelta(days=30)),
+    "Last 90 days": ("day", timedelta(days=90)),
+    "Last 365 days": ("day", timedelta(days=365)),
+}
+BUCKET_FORMATS = {"hour": "%Y-%m-%dT%H", "day": "%Y-%m-%d"}
+GATE_LABELS = {
+    "logic": "🧠 Logic",
+    "natural_law": "⚖️ Natural Law",
+    "historical_accuracy": "📚 Historical Accuracy",
+    "source_credibility": "🔍 Source Credibility",
+    "overall_reasonableness": "Overall Reasonableness",
+}
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_rollups(granularity, since=None):
+    rows = get_memory_store().rollups(granularity, since)
+    df = pd.DataFrame(rows, columns=["bucket", "metric", "key", "count", "total"])
+    if granularity in BUCKET_FORMATS and not df.empty:
+        df["period"] = pd.to_datetime(df["bucket"], format=BUCKET_FORMATS[granularity])
+    return df
+
+def share(df, metric, key="yes"):
+    """Fraction of evaluations per period with metric == key."""
+    totals = df[df["metric"] == "evaluations"].set_index("period")["count"]
+    hits = df[(df["metric"] == metric) & (df["key"] == key)].set_index("period")["count"]
+    return (hits.reindex(totals.index, fill_value=0) / totals).rename(metric)
+
+st.title("📊 Evalia - History Analytics")
+st.caption("Trends across every evaluation saved to memory, from hourly and daily rollups.")
+
+all_time = load_rollups(ALL_TIME)
+if all_time.empty:
+    st.info("No evaluations recorded yet. Run an evaluation and come back.")
+    st.stop()
+
+def all_time_count(metric, key=""):
+    match = all_time[(all_time["metric"] == metric) & (all_time["key"] == key)]
+    return int(match["count"].sum())
+
+total = all_time_count("evaluations")
+overall = all_time[(all_time["metric"] == "score") & (all_time["key"] == "overall_reasonableness")]
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Evaluations", f"{total:,}")
+col2.metric("Brutality Mode", f"{all_time_count('persona', 'brutal') / total:.0%}")
+col3.metric("With URL", f"{all_time_count('had_url', 'yes') / total:.0%}")
+col4.metric("With Image", f"{all_time_count('had_image', 'yes') / total:.0%}")
+col5.metric("Avg Reasonableness", f"{(overall['total'].sum() / overall['count'].sum()) if not overall.empty else 0:.1f}/10")
+
+range_label = st.selectbox("Window", list(RANGES), index=2)
+granularity, window = RANGES[range_label]
+since = (datetime.now(timezone.utc) - window).isoformat()[:GRANULARITIES[granularity]]
+df = load_rollups(granularity, since)
+if df.empty:
+    st.info(f"No evaluations in the {range_label.lower()}.")
+    st.stop()
+
+st.markdown("### ⚖️ Verdicts over time")
+verdicts = df[df["metric"] == "verdict"].rename(columns={"key": "verdict"})
+st.plotly_chart(px.bar(verdicts, x="period", y="count", color="verdict", labels={"period": "", "count": "Evaluations"}),
+                use_container_width=True)
+
+st.markdown("### 🚪 Gates of Reason: average scores")
+gates = df[df["metric"] == "score"].copy()
+gates["average"] = gates["total"] / gates["count"]
+gates["gate"] = gates["key"].map(GATE_LABELS).fillna(gates["key"])
+st.plotly_chart(px.line(gates.sort_values("period"), x="period", y="average", color="gate", markers=True,
+                        category_orders={"gate": [GATE_LABELS[g] for g in SCORE_GATES]},
+                        labels={"period": "", "average": "Average score (0-10)"}, range_y=[0, 10]),
+                use_container_width=True)
+
+left, right = st.columns(2)
+with left:
+    st.markdown("### 🎭 Persona split")
+    personas = df[df["metric"] == "persona"].groupby("key", as_index=False)["count"].sum()
+    st.plotly_chart(px.pie(personas, names="key", values="count", hole=0.4), use_container_width=True)
+with right:
+    st.markdown("### 🌐 URL & 🖼️ image usage")
+    usage = pd.concat([share(df, "had_url"), share(df, "had_image")], axis=1).fillna(0).reset_index()
+    usage = usage.melt(id_vars="period", var_name="artifact", value_name="share")
+    usage["artifact"] = usage["artifact"].map({"had_url": "URL", "had_image": "Image"})
+    st.plotly_chart(px.line(usage, x="period", y="share", color="artifact", markers=True,
+                            labels={"period": "", "share": "Share of evaluations"}, range_y=[0, 1]),
+                    use_container_width=True)
+
+st.markdown("---")
+st.caption("Evalia © 2025 – Raw Cast Enterprises | Rollups are updated on every saved evaluation")
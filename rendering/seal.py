@@ -1,49 +1,109 @@
 """Seal rendering utilities."""
-from PIL import Image, ImageDraw, ImageFont
+import functools
 import io
+import threading
+from core.tracing import span
+from core.resources import resource
+
+W, H = 400, 300
+LOGO_SIZE = (70, 70)
+TEXT_COLOR = (234, 234, 234)
+ACCENT_TEXT = (126, 200, 255)
+
+
+class SealRenderer:
+    """Renders Seal of Passage PNGs.
+
+    Fonts and resized logos are loaded once per renderer; finished PNG bytes are
+    memoized in a bounded LRU keyed by (verdict_line, brutality_mode, logo_path).
+    """
+
+    def __init__(self, cache_size=256):
+        self._fonts = None
+        self._logos = {}
+        self._lock = threading.Lock()
+        self.render = functools.lru_cache(maxsize=cache_size)(self._render)
+
+    def _load_fonts(self):
+        if self._fonts is None:
+            from PIL import ImageFont
+            try:
+                self._fonts = (
+                    ImageFont.truetype("DejaVuSans-Bold.ttf", 25),
+                    ImageFont.truetype("DejaVuSans-Bold.ttf", 19),
+                    ImageFont.truetype("DejaVuSans.ttf", 12),
+                )
+            except Exception:
+                default = ImageFont.load_default()
+                self._fonts = (default, default, default)
+        return self._fonts
+
+    def _load_logo(self, logo_path):
+        if logo_path not in self._logos:
+            from PIL import Image
+            try:
+                self._logos[logo_path] = Image.open(logo_path).convert("RGBA").resize(LOGO_SIZE)
+            except Exception:
+                self._logos[logo_path] = None
+        return self._logos[logo_path]
+
+    @staticmethod
+    def wrap(text, font, max_width):
+        """Greedy word wrap measuring each word once (linear in the text length)."""
+        space_w = font.getlength(" ")
+        lines, current, current_w = [], [], 0.0
+        for word in text.split():
+            word_w = font.getlength(word)
+            needed = word_w if not current else current_w + space_w + word_w
+            if needed <= max_width or not current:
+                current.append(word)
+                current_w = needed
+            else:
+                lines.append(" ".join(current))
+                current, current_w = [word], word_w
+        if current:
+            lines.append(" ".join(current))
+        return lines
+
+    def _render(self, verdict_text, brutality_mode, logo_path=None):
+        from PIL import Image, ImageDraw
+        # FreeType font objects aren't safe to share across concurrent draws.
+        with self._lock:
+            title_font, verdict_font, small_font = self._load_fonts()
+            bg_color = (139, 0, 0) if brutality_mode else (75, 75, 75)
+            img = Image.new("RGB", (W, H), bg_color)
+            draw = ImageDraw.Draw(img, "RGBA")
+
+            logo = self._load_logo(logo_path) if logo_path else None
+            if logo is not None:
+                img.paste(logo, (W - 80, H - 80), logo)
+
+            draw.text((W // 2, 37), "Seal of Passage", font=title_font, fill=TEXT_COLOR, anchor="mm")
+            wrapped = "\n".join(self.wrap(verdict_text, verdict_font, int(W * 0.72)))
+            draw.multiline_text((W // 2, 195), wrapped, font=verdict_font, fill=TEXT_COLOR, anchor="mm", align="center", spacing=4)
+            draw.text((W // 2, H - 5), "Evalia", font=small_font, fill=ACCENT_TEXT, anchor="mm")
+
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        return buf.getvalue()
+
+    def render_many(self, verdicts, logo_path=None):
+        """Render seals for an iterable of (verdict_line, brutality_mode); returns PNG bytes in order.
+
+        Repeated verdicts are rendered once and served from the LRU.
+        """
+        return [self.render(verdict_line, bool(brutality_mode), logo_path) for verdict_line, brutality_mode in verdicts]
+
+
+@resource("seal_renderer")
+def get_seal_renderer():
+    return SealRenderer()
+
 
 def render_evalia_seal(verdict_text: str, brutality_mode: bool, logo_path: str = None) -> bytes:
-    W, H = 400, 300
-    bg_color = (139, 0, 0) if brutality_mode else (75, 75, 75)
-    text_color = (234, 234, 234)
-    accent_text = (126, 200, 255)
-    img = Image.new("RGB", (W, H), bg_color)
-    draw = ImageDraw.Draw(img, "RGBA")
-
-    try:
-        logo = Image.open(logo_path).convert("RGBA").resize((70, 70))
-        lx, ly = W - 80, H - 80
-        img.alpha_composite(logo, (lx, ly))
-    except Exception:
-        pass
-
-    try:
-        title_font = ImageFont.truetype("DejaVuSans-Bold.ttf", 25)
-        verdict_font = ImageFont.truetype("DejaVuSans-Bold.ttf", 19)
-        small_font = ImageFont.truetype("DejaVuSans.ttf", 12)
-    except Exception:
-        title_font = verdict_font = small_font = ImageFont.load_default()
-
-    draw.text((W // 2, 37), "Seal of Passage", font=title_font, fill=text_color, anchor="mm")
-    max_text_w = int(W * 0.72)
-    lines = []
-    words = verdict_text.split()
-    current_line = []
-    for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = draw.textbbox((0, 0), test_line, font=verdict_font)
-        if bbox[2] - bbox[0] <= max_text_w:
-            current_line.append(word)
-        else:
-            lines.append(' '.join(current_line))
-            current_line = [word]
-    if current_line:
-        lines.append(' '.join(current_line))
-    wrapped = '\n'.join(lines)
-    draw.multiline_text((W // 2, 195), wrapped, font=verdict_font, fill=text_color, anchor="mm", align="center", spacing=4)
-    draw.text((W // 2, H - 5), "Evalia", font=small_font, fill=accent_text, anchor="mm")
-
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return buf.getvalue()
+    with span("seal_render"):
+        return get_seal_renderer().render(verdict_text, bool(brutality_mode), logo_path)
+
+
+def render_evalia_seals(verdicts, logo_path: str = None) -> list:
+    return get_seal_renderer().render_many(verdicts, logo_path)